@@ -0,0 +1,26 @@
+"""add (start_dt, end_dt) index to availability_slots
+
+Revision ID: 3f9a7d2b8c61
+Revises: e2a8b4c6d913
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f9a7d2b8c61"
+down_revision = "e2a8b4c6d913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_availability_slots_start_end",
+        "availability_slots",
+        ["start_dt", "end_dt"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_availability_slots_start_end", table_name="availability_slots")
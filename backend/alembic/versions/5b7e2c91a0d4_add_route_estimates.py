@@ -0,0 +1,33 @@
+"""add route_estimates cache table
+
+Revision ID: 5b7e2c91a0d4
+Revises: bb39b3df88c1
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b7e2c91a0d4"
+down_revision = "bb39b3df88c1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "route_estimates",
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("distance_km", sa.Float(), nullable=False),
+        sa.Column("duration_min", sa.Float(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_route_estimates_expires_at", "route_estimates", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_route_estimates_expires_at", table_name="route_estimates")
+    op.drop_table("route_estimates")
@@ -0,0 +1,59 @@
+"""add delivery status to notifications
+
+Revision ID: 7a3e5c1d9b42
+Revises: 3f9a7d2b8c61
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a3e5c1d9b42"
+down_revision = "3f9a7d2b8c61"
+branch_labels = None
+depends_on = None
+
+_STATUS = sa.Enum(
+    "PENDING", "SENT", "SKIPPED", "FAILED", name="notificationstatus"
+)
+
+
+def upgrade() -> None:
+    _STATUS.create(op.get_bind(), checkfirst=True)
+    # Existing rows were dispatched by the old fire-and-forget path; mark
+    # them SENT so the outbox does not push them again.
+    with op.batch_alter_table("notifications") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "delivery_status", _STATUS, nullable=False, server_default="SENT"
+            )
+        )
+        batch_op.add_column(
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(
+            sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True)
+        )
+        batch_op.add_column(sa.Column("last_error", sa.String(255), nullable=True))
+    with op.batch_alter_table("notifications") as batch_op:
+        batch_op.alter_column(
+            "delivery_status", existing_type=_STATUS, server_default="PENDING"
+        )
+        batch_op.create_index(
+            "ix_notifications_delivery_due", ["delivery_status", "next_attempt_at"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("notifications") as batch_op:
+        batch_op.drop_index("ix_notifications_delivery_due")
+        batch_op.drop_column("last_error")
+        batch_op.drop_column("sent_at")
+        batch_op.drop_column("next_attempt_at")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("delivery_status")
+    _STATUS.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,27 @@
+"""add leave_at to bookings_v2
+
+Revision ID: 9c4d1f6e2a37
+Revises: 5b7e2c91a0d4
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c4d1f6e2a37"
+down_revision = "5b7e2c91a0d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("bookings_v2") as batch_op:
+        batch_op.add_column(
+            sa.Column("leave_at", sa.DateTime(timezone=True), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bookings_v2") as batch_op:
+        batch_op.drop_column("leave_at")
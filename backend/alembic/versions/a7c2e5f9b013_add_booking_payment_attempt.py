@@ -0,0 +1,29 @@
+"""add payment_attempt to bookings_v2
+
+Revision ID: a7c2e5f9b013
+Revises: f3b8d2a6c514
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7c2e5f9b013"
+down_revision = "f3b8d2a6c514"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("bookings_v2") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "payment_attempt", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bookings_v2") as batch_op:
+        batch_op.drop_column("payment_attempt")
@@ -0,0 +1,40 @@
+"""track failed route compactions on trips
+
+Revision ID: b6d4f1a8c279
+Revises: a7c2e5f9b013
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b6d4f1a8c279"
+down_revision = "a7c2e5f9b013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("trips") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "route_compaction_attempts",
+                sa.Integer(),
+                nullable=False,
+                server_default="0",
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                "route_compaction_failed_at",
+                sa.DateTime(timezone=True),
+                nullable=True,
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("trips") as batch_op:
+        batch_op.drop_column("route_compaction_failed_at")
+        batch_op.drop_column("route_compaction_attempts")
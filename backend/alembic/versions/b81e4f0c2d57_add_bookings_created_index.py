@@ -0,0 +1,34 @@
+"""add (created_at, id) index to bookings_v2
+
+Revision ID: b81e4f0c2d57
+Revises: 7a3e5c1d9b42
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b81e4f0c2d57"
+down_revision = "7a3e5c1d9b42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # Rows written by the CURRENT_TIMESTAMP server default lack the
+        # fractional seconds new rows and pagination cursors carry; pad them
+        # so text comparison on the raw column orders correctly.
+        op.execute(
+            "UPDATE bookings_v2 SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+    op.create_index(
+        "ix_bookings_v2_created",
+        "bookings_v2",
+        ["created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_v2_created", table_name="bookings_v2")
@@ -0,0 +1,56 @@
+"""add places and reverse_geocodes tables
+
+Revision ID: c4a7e19d3f20
+Revises: b81e4f0c2d57
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4a7e19d3f20"
+down_revision = "b81e4f0c2d57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "places",
+        sa.Column("place_id", sa.String(length=255), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lng", sa.Float(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        "reverse_geocodes",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("cell", sa.String(length=12), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("lng", sa.Float(), nullable=False),
+        sa.Column("label", sa.String(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint(
+            "cell", "lat", "lng", name="uq_reverse_geocodes_cell_lat_lng"
+        ),
+    )
+    op.create_index("ix_reverse_geocodes_cell", "reverse_geocodes", ["cell"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reverse_geocodes_cell", table_name="reverse_geocodes")
+    op.drop_table("reverse_geocodes")
+    op.drop_table("places")
@@ -0,0 +1,40 @@
+"""add trip_odometers table
+
+Revision ID: c8e3a5d7f142
+Revises: b6d4f1a8c279
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c8e3a5d7f142"
+down_revision = "b6d4f1a8c279"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trip_odometers",
+        sa.Column(
+            "booking_id",
+            sa.UUID(),
+            sa.ForeignKey("bookings_v2.id"),
+            primary_key=True,
+        ),
+        sa.Column("distance_m", sa.Float(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("ended_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_lat", sa.Float(), nullable=True),
+        sa.Column("last_lng", sa.Float(), nullable=True),
+        sa.Column("anchor_lat", sa.Float(), nullable=True),
+        sa.Column("anchor_lng", sa.Float(), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=False),
+        sa.Column("dropped", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("trip_odometers")
@@ -0,0 +1,30 @@
+"""add landmarks table
+
+Revision ID: d2f61b8a4c93
+Revises: c4a7e19d3f20
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d2f61b8a4c93"
+down_revision = "c4a7e19d3f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "landmarks",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("lng", sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("landmarks")
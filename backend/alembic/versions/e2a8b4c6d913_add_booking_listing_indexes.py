@@ -0,0 +1,32 @@
+"""add booking listing indexes
+
+Revision ID: e2a8b4c6d913
+Revises: 9c4d1f6e2a37
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e2a8b4c6d913"
+down_revision = "9c4d1f6e2a37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bookings_v2_customer_created",
+        "bookings_v2",
+        ["customer_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_bookings_v2_status_pickup_when",
+        "bookings_v2",
+        ["status", "pickup_when"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_v2_status_pickup_when", table_name="bookings_v2")
+    op.drop_index("ix_bookings_v2_customer_created", table_name="bookings_v2")
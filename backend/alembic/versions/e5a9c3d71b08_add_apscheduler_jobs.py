@@ -0,0 +1,33 @@
+"""add apscheduler_jobs table
+
+Revision ID: e5a9c3d71b08
+Revises: d2f61b8a4c93
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5a9c3d71b08"
+down_revision = "d2f61b8a4c93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same layout as apscheduler.jobstores.sqlalchemy.SQLAlchemyJobStore.
+    op.create_table(
+        "apscheduler_jobs",
+        sa.Column("id", sa.Unicode(length=191), primary_key=True),
+        sa.Column("next_run_time", sa.Float(precision=25), nullable=True),
+        sa.Column("job_state", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index(
+        "ix_apscheduler_jobs_next_run_time", "apscheduler_jobs", ["next_run_time"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_apscheduler_jobs_next_run_time", table_name="apscheduler_jobs")
+    op.drop_table("apscheduler_jobs")
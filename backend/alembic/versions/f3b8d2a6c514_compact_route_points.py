@@ -0,0 +1,31 @@
+"""add compacted route columns to trips and index route_points
+
+Revision ID: f3b8d2a6c514
+Revises: e5a9c3d71b08
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3b8d2a6c514"
+down_revision = "e5a9c3d71b08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("trips") as batch_op:
+        batch_op.add_column(sa.Column("route_polyline", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("route_offsets", sa.Text(), nullable=True))
+    op.create_index(
+        "ix_route_points_booking_ts", "route_points", ["booking_id", "ts"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_route_points_booking_ts", table_name="route_points")
+    with op.batch_alter_table("trips") as batch_op:
+        batch_op.drop_column("route_offsets")
+        batch_op.drop_column("route_polyline")
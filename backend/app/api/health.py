@@ -6,7 +6,22 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.broadcast import broadcast
+from app.core.security import password_hasher
 from app.db.database import get_async_session
+from app.services.booking_state import booking_state_cache
+from app.services.fare_meter import fare_meter
+from app.services.gazetteer import gazetteer
+from app.services.geocode_cache import autocomplete_cache, place_details_cache
+from app.services.notifications import notification_dispatcher
+from app.services.place_store import place_store
+from app.services.principal_cache import principal_cache
+from app.services.route_archive import route_archiver
+from app.services.route_cache import route_cache
+from app.services.route_ingest import route_ingestor
+from app.services.stripe_async import stripe_async
+from app.services.trip_odometer import trip_odometer
+from app.services.ws_fanout import fanout
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["health"])
@@ -26,3 +41,26 @@ async def health(db: AsyncSession = Depends(get_async_session)):
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Service unavailable",
         ) from exc
+
+
+@router.get("/health/metrics", status_code=status.HTTP_200_OK)
+async def health_metrics():
+    """Return in-process queue and cache counters for capacity planning."""
+    return {
+        "route_ingest": route_ingestor.stats(),
+        "booking_state": booking_state_cache.stats(),
+        "broadcast_history": broadcast.history.stats(),
+        "route_cache": route_cache.stats(),
+        "route_archive": route_archiver.stats(),
+        "notifications": notification_dispatcher.stats(),
+        "trip_odometer": trip_odometer.stats(),
+        "fare_meter": fare_meter.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "stripe": stripe_async.stats(),
+        "geocode_autocomplete": autocomplete_cache.stats(),
+        "geocode_place_details": place_details_cache.stats(),
+        "place_store": place_store.stats(),
+        "gazetteer": gazetteer.stats(),
+        "ws_fanout": fanout.stats(),
+    }
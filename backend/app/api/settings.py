@@ -7,9 +7,15 @@ from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies import get_current_user, get_db
+from app.schemas.landmark import LandmarkPayload, LandmarkRead
 from app.schemas.setup import SettingsPayload
 from app.schemas.user import UserRead
-from app.services.settings_service import get_settings, update_settings
+from app.services.settings_service import (
+    get_settings,
+    list_landmarks,
+    replace_landmarks,
+    update_settings,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -32,3 +38,22 @@ async def api_update_settings(
     """Persist updated configuration values."""
     logger.info("updating settings", extra={"user_id": user.id})
     return await update_settings(payload, db, user)
+
+
+@router.get("/landmarks", response_model=list[LandmarkRead])
+async def api_list_landmarks(db: AsyncSession = Depends(get_db)):
+    """Return the landmarks offered by address search."""
+    return await list_landmarks(db)
+
+
+@router.put(
+    "/landmarks", response_model=list[LandmarkRead], status_code=status.HTTP_200_OK
+)
+async def api_replace_landmarks(
+    payload: list[LandmarkPayload],
+    db: AsyncSession = Depends(get_db),
+    user: UserRead = Depends(get_current_user),
+):
+    """Replace the landmark list."""
+    logger.info("replacing landmarks", extra={"user_id": user.id})
+    return await replace_landmarks(payload, db, user)
@@ -2,7 +2,7 @@ from calendar import monthrange
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import or_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_async_session
@@ -11,6 +11,7 @@ from app.models.availability_slot import AvailabilitySlot
 from app.models.booking import Booking, BookingStatus
 from app.schemas.api_availability import AvailabilityResponse, BookingSlot
 from app.schemas.availability_slot import AvailabilitySlotCreate, AvailabilitySlotRead
+from app.services.availability_index import availability_index, overlaps_in_db
 
 router = APIRouter(
     prefix="/api/v1/availability",
@@ -31,17 +32,11 @@ async def get_availability(
     days = monthrange(start.year, start.month)[1]
     end = start + timedelta(days=days)
 
-    slot_res = await db.execute(
-        select(AvailabilitySlot).where(
-            AvailabilitySlot.start_dt < end,
-            AvailabilitySlot.end_dt > start,
-            or_(
-                AvailabilitySlot.reason.is_(None),
-                ~AvailabilitySlot.reason.like("BOOKING:%"),
-            ),
-        )
-    )
-    slots = [AvailabilitySlotRead.model_validate(s) for s in slot_res.scalars().all()]
+    await availability_index.sync(db)
+    slots = [
+        AvailabilitySlotRead.model_validate(s)
+        for s in availability_index.month_view(start, end)
+    ]
 
     booking_res = await db.execute(
         select(Booking).where(
@@ -72,16 +67,11 @@ async def create_slot(
     payload: AvailabilitySlotCreate, db: AsyncSession = Depends(get_async_session)
 ) -> AvailabilitySlotRead:
     """Create a manual availability block."""
-    overlap = await db.execute(
-        select(AvailabilitySlot).where(
-            AvailabilitySlot.end_dt > payload.start_dt,
-            AvailabilitySlot.start_dt < payload.end_dt,
-        )
-    )
-    if overlap.scalars().first():
+    if await overlaps_in_db(db, payload.start_dt, payload.end_dt):
         raise HTTPException(status_code=400, detail="overlaps existing slot")
     slot = AvailabilitySlot(**payload.model_dump())
     db.add(slot)
     await db.commit()
     await db.refresh(slot)
+    availability_index.add(slot)
     return AvailabilitySlotRead.model_validate(slot)
@@ -1,18 +1,34 @@
 """v1 booking endpoints."""
 
+import re
+import uuid
+import zlib
+from typing import Literal, Optional
+
 from app.dependencies import get_current_user_v2, get_db
-from app.models.user_v2 import User
+from app.models.booking import Booking
+from app.models.trip import Trip
+from app.models.user_v2 import User, UserRole
 from app.schemas.api_booking import (
     BookingCreateRequest,
     BookingCreateResponse,
     BookingPublic,
 )
-from app.services import booking_service
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.services import booking_service, route_archive
+from app.services.settings_service import get_admin_user_id
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/api/v1/bookings", tags=["bookings"])
 
+ROUTE_MEDIA_TYPES = {
+    "polyline": "text/plain; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
 
 @router.post(
     "", response_model=BookingCreateResponse, status_code=status.HTTP_201_CREATED
@@ -28,3 +44,115 @@ async def create_booking_endpoint(
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     booking_public = BookingPublic.model_validate(booking)
     return BookingCreateResponse(booking=booking_public)
+
+
+@router.get("/{booking_id}/route")
+async def booking_route(
+    booking_id: uuid.UUID,
+    request: Request,
+    format: Literal["polyline", "ndjson"] = "polyline",
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_v2),
+) -> Response:
+    """Stream the recorded path of a booking's trip.
+
+    ``polyline`` is the path alone as a Google encoded polyline, ready for
+    map widgets; ``ndjson`` adds each point's timestamp for replay. Archived
+    trips are served from the trip row with byte-range support; trips not
+    yet compacted are streamed from ``route_points`` in batches.
+    """
+    booking = await db.get(Booking, booking_id)
+    if booking is None or (
+        booking.customer_id != user.id
+        and user.role is not UserRole.DRIVER
+        and user.id != await get_admin_user_id(db)
+    ):
+        raise HTTPException(status_code=404, detail="booking not found")
+    trip = (
+        await db.execute(select(Trip).where(Trip.booking_id == booking_id))
+    ).scalar_one_or_none()
+    if trip is None:
+        raise HTTPException(status_code=404, detail="route not found")
+
+    media_type = ROUTE_MEDIA_TYPES[format]
+    if trip.route_polyline is not None:
+        if format == "polyline":
+            text = trip.route_polyline
+        else:
+            text = "".join(
+                [
+                    chunk
+                    async for chunk in route_archive.ndjson_chunks(
+                        route_archive.iter_track(trip)
+                    )
+                ]
+            )
+        body = text.encode()
+        etag = f'"{trip.id.hex}-{format}-{zlib.crc32(body):08x}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return _ranged_response(request, body, media_type, etag)
+
+    version = await route_archive.route_version(db, booking_id)
+    etag = f'W/"{trip.id.hex}-{format}-{version}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    chunks = (
+        route_archive.polyline_chunks
+        if format == "polyline"
+        else route_archive.ndjson_chunks
+    )
+    return StreamingResponse(
+        chunks(route_archive.iter_track(trip)),
+        media_type=media_type,
+        headers={"ETag": etag, "Accept-Ranges": "none"},
+    )
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _ranged_response(
+    request: Request, body: bytes, media_type: str, etag: str
+) -> Response:
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    byte_range = _byte_range(request, len(body), etag)
+    if byte_range is None:
+        return Response(body, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+    return Response(
+        body[start : end + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def _byte_range(request: Request, size: int, etag: str) -> Optional[tuple[int, int]]:
+    """Parse a single ``Range`` header; ``None`` means send the whole body."""
+    header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if header is None or (if_range is not None and if_range != etag):
+        return None
+    match = _BYTE_RANGE.fullmatch(header.strip())
+    if match is None or match.groups() == ("", ""):
+        # Multiple or malformed ranges; ignoring Range is always allowed.
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
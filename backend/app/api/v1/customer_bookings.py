@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.pagination import MAX_PAGE_SIZE, paginate_bookings
 from app.dependencies import get_current_user_v2, get_db
-from app.models.booking import Booking
+from app.models.booking import Booking, BookingStatus
 from app.models.user_v2 import User
 from app.schemas.booking import BookingRead
 
@@ -12,13 +15,22 @@ router = APIRouter(prefix="/api/v1/customers/me", tags=["customer-bookings"])
 
 @router.get("/bookings", response_model=list[BookingRead])
 async def list_my_bookings(
+    response: Response,
+    status: BookingStatus | None = None,
+    pickup_from: datetime | None = None,
+    pickup_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user_v2),
     db: AsyncSession = Depends(get_db),
 ) -> list[BookingRead]:
-    result = await db.execute(
-        select(Booking)
-        .where(Booking.customer_id == current_user.id)
-        .order_by(Booking.created_at.desc())
-    )
-    bookings = result.scalars().all()
+    """List the caller's bookings, newest first, one keyset page at a time."""
+    stmt = select(Booking).where(Booking.customer_id == current_user.id)
+    if status:
+        stmt = stmt.where(Booking.status == status)
+    if pickup_from:
+        stmt = stmt.where(Booking.pickup_when >= pickup_from)
+    if pickup_to:
+        stmt = stmt.where(Booking.pickup_when < pickup_to)
+    bookings = await paginate_bookings(db, stmt, response, cursor, limit)
     return [BookingRead.model_validate(b) for b in bookings]
@@ -1,17 +1,20 @@
 import json
 import uuid
+from datetime import datetime
 
+from app.api.v1.pagination import MAX_PAGE_SIZE, paginate_bookings
 from app.core.broadcast import broadcast
 from app.db.database import get_async_session
 from app.dependencies import require_admin
 from app.models.booking import Booking, BookingStatus
 from app.models.notification import NotificationType
+from app.models.settings import AdminConfig
 from app.models.user_v2 import UserRole
-from app.schemas.api_booking import BookingStatusResponse
+from app.schemas.api_booking import BookingPlanRead, BookingStatusResponse
 from app.schemas.booking import BookingRead
 from app.services import booking_service, notifications, scheduler
 from app.services.booking_updates import send_booking_update
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -24,22 +27,62 @@ router = APIRouter(
 
 @router.get("", response_model=list[BookingRead])
 async def list_bookings(
-    status: BookingStatus | None = None, db: AsyncSession = Depends(get_async_session)
+    response: Response,
+    status: BookingStatus | None = None,
+    pickup_from: datetime | None = None,
+    pickup_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_session),
 ):
     stmt = select(Booking)
     if status:
         stmt = stmt.where(Booking.status == status)
-    result = await db.execute(stmt)
-    bookings = result.scalars().all()
+    if pickup_from:
+        stmt = stmt.where(Booking.pickup_when >= pickup_from)
+    if pickup_to:
+        stmt = stmt.where(Booking.pickup_when < pickup_to)
+    bookings = await paginate_bookings(db, stmt, response, cursor, limit)
+    # leave_at is stored when the job is scheduled; only older bookings need
+    # a (bulk) recompute here.
+    await scheduler.fill_missing_leave_at(
+        db, [b for b in bookings if b.status == BookingStatus.DRIVER_CONFIRMED]
+    )
     resp: list[BookingRead] = []
     for b in bookings:
         data = BookingRead.model_validate(b)
-        if b.status == BookingStatus.DRIVER_CONFIRMED:
-            data.leave_at = await scheduler.compute_leave_at(b)
+        if b.status != BookingStatus.DRIVER_CONFIRMED:
+            data.leave_at = None
         resp.append(data)
     return resp
 
 
+@router.get("/plan", response_model=list[BookingPlanRead])
+async def plan_bookings(
+    pickup_from: datetime,
+    pickup_to: datetime,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Leave times and fare estimates for pending and confirmed bookings."""
+    stmt = (
+        select(Booking)
+        .where(
+            Booking.status.in_(
+                (BookingStatus.PENDING, BookingStatus.DRIVER_CONFIRMED)
+            ),
+            Booking.pickup_when >= pickup_from,
+            Booking.pickup_when < pickup_to,
+        )
+        .order_by(Booking.pickup_when)
+    )
+    bookings = (await db.execute(stmt)).scalars().all()
+    pricing = await db.get(AdminConfig, 1)
+    try:
+        return await scheduler.plan_bookings(bookings, pricing)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/{booking_id}/confirm", response_model=BookingStatusResponse)
 async def confirm_booking(
     booking_id: uuid.UUID, db: AsyncSession = Depends(get_async_session)
@@ -71,6 +114,7 @@ async def retry_deposit(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     leave_at = await scheduler.schedule_leave_now(booking)
+    await db.commit()
     await send_booking_update(booking, leave_at=leave_at)
     return BookingStatusResponse(status=booking.status, leave_at=leave_at)
 
@@ -3,16 +3,22 @@ import json
 import logging
 import uuid
 from datetime import datetime, timezone
+from typing import Any, Optional
 
 from app.core.broadcast import broadcast
-from app.core.security import decode_token
 from app.db.database import AsyncSessionLocal
 from app.models.booking import Booking, BookingStatus
 from app.models.notification import NotificationType
-from app.models.route_point import RoutePoint
-from app.models.user_v2 import User, UserRole
-from app.services import notifications
+from app.models.user_v2 import UserRole
+from app.schemas.booking import BookingRead
+from app.services import location_frames, notifications
+from app.services.booking_state import BookingState, booking_state_cache
+from app.services.fare_meter import fare_meter
+from app.services.principal_cache import principal_cache
+from app.services.route_ingest import route_ingestor
 from app.services.settings_service import get_admin_user_id
+from app.services.trip_odometer import OdometerReading, trip_odometer
+from app.services.ws_fanout import fanout
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 logger = logging.getLogger(__name__)
@@ -21,22 +27,20 @@ router = APIRouter()
 
 @router.websocket("/ws/bookings/{booking_id}")
 async def booking_ws(websocket: WebSocket, booking_id: uuid.UUID):
-    from app.services import booking_service
-
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=1008)
         return
 
     try:
-        payload = decode_token(token)
+        payload = principal_cache.decode(token)
         user_id = uuid.UUID(str(payload["sub"]))
     except Exception:
         await websocket.close(code=1008)
         return
 
     async with AsyncSessionLocal() as db:
-        user = await db.get(User, user_id)
+        user = await principal_cache.load_user(db, user_id)
         booking = await db.get(Booking, booking_id)
         admin_id = await get_admin_user_id(db)
         # admin_user_id may connect even without DRIVER role
@@ -47,103 +51,82 @@ async def booking_ws(websocket: WebSocket, booking_id: uuid.UUID):
         ):
             await websocket.close(code=1008)
             return
+        booking_state_cache.update(booking)
 
-    await websocket.accept()
+    subprotocol = location_frames.negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
     channel = f"booking:{booking_id}"
     logger.info(
         "ws connected",
-        extra={"booking_id": str(booking_id), "user_id": str(user_id)},
+        extra={
+            "booking_id": str(booking_id),
+            "user_id": str(user_id),
+            "subprotocol": subprotocol,
+        },
     )
     async with broadcast.subscribe(channel=channel) as subscriber:
-        send_task = asyncio.create_task(_forward_messages(websocket, subscriber))
+        send_task = asyncio.create_task(
+            _forward_messages(
+                websocket, subscriber, booking_id, binary=subprotocol is not None
+            )
+        )
         try:
             while True:
-                data = await websocket.receive_text()
-                try:
-                    payload = json.loads(data)
-                except json.JSONDecodeError:
-                    logger.warning(
-                        "invalid json",
-                        extra={"booking_id": str(booking_id), "data": data},
-                    )
-                    payload = None
+                data, payload = await _receive_frame(
+                    websocket, booking_id, binary=subprotocol is not None
+                )
+                if data is None:
+                    continue
+                fare_reading = None
                 if isinstance(payload, dict) and {"lat", "lng", "ts"} <= payload.keys():
-                    async with AsyncSessionLocal() as db:
-                        booking = await db.get(Booking, booking_id)
-                        if booking:
-                            point = RoutePoint(
-                                booking_id=booking_id,
-                                ts=datetime.fromtimestamp(payload["ts"], timezone.utc),
-                                lat=payload["lat"],
-                                lng=payload["lng"],
-                                speed=payload.get("speed"),
-                            )
-                            db.add(point)
-                            await db.commit()
-                            logger.debug(
-                                "route point saved",
+                    state = booking_state_cache.get(booking_id)
+                    if state is None:
+                        async with AsyncSessionLocal() as db:
+                            state = await booking_state_cache.load(db, booking_id)
+                    if state:
+                        ts = datetime.fromtimestamp(payload["ts"], timezone.utc)
+                        if trip_odometer.get(booking_id) is None:
+                            async with AsyncSessionLocal() as db:
+                                await trip_odometer.load(db, booking_id)
+                        reading = trip_odometer.record(
+                            booking_id, ts, payload["lat"], payload["lng"]
+                        )
+                        await route_ingestor.add(
+                            booking_id,
+                            ts=ts,
+                            lat=payload["lat"],
+                            lng=payload["lng"],
+                            speed=payload.get("speed"),
+                        )
+                        logger.debug(
+                            "route point queued",
+                            extra={
+                                "booking_id": str(booking_id),
+                                "lat": payload["lat"],
+                                "lng": payload["lng"],
+                            },
+                        )
+                        try:
+                            await _advance_status(channel, state, payload)
+                        except ValueError:
+                            # The cached status was stale; reload it on the
+                            # next frame instead of dropping the connection.
+                            logger.warning(
+                                "stale booking state",
                                 extra={
                                     "booking_id": str(booking_id),
-                                    "lat": payload["lat"],
-                                    "lng": payload["lng"],
+                                    "status": state.status,
                                 },
                             )
-
-                            if booking.status == BookingStatus.DRIVER_CONFIRMED:
-                                await booking_service.leave_booking(db, booking_id)
-                                await broadcast.publish(
-                                    channel=channel,
-                                    message=json.dumps({"status": "ON_THE_WAY"}),
-                                )
-                            elif booking.status == BookingStatus.ON_THE_WAY:
-                                distance = booking_service._haversine(
-                                    payload["lat"],
-                                    payload["lng"],
-                                    booking.pickup_lat,
-                                    booking.pickup_lng,
-                                )
-                                if distance < 50:
-                                    await booking_service.arrive_pickup(db, booking_id)
-                                    await notifications.create_notification(
-                                        db,
-                                        booking.id,
-                                        NotificationType.ARRIVED_PICKUP,
-                                        UserRole.CUSTOMER,
-                                        booking.customer_id,
-                                        {},
-                                    )
-                                    await db.commit()
-                                    await broadcast.publish(
-                                        channel=channel,
-                                        message=json.dumps(
-                                            {"status": "ARRIVED_PICKUP"}
-                                        ),
-                                    )
-                            elif booking.status == BookingStatus.IN_PROGRESS:
-                                distance = booking_service._haversine(
-                                    payload["lat"],
-                                    payload["lng"],
-                                    booking.dropoff_lat,
-                                    booking.dropoff_lng,
-                                )
-                                if distance < 50:
-                                    await booking_service.arrive_dropoff(db, booking_id)
-                                    await notifications.create_notification(
-                                        db,
-                                        booking.id,
-                                        NotificationType.ARRIVED_DROPOFF,
-                                        UserRole.CUSTOMER,
-                                        booking.customer_id,
-                                        {},
-                                    )
-                                    await db.commit()
-                                    await broadcast.publish(
-                                        channel=channel,
-                                        message=json.dumps(
-                                            {"status": "ARRIVED_DROPOFF"}
-                                        ),
-                                    )
+                            booking_state_cache.discard(booking_id)
+                        in_progress = state.status == BookingStatus.IN_PROGRESS
+                        if in_progress and fare_meter.due(booking_id):
+                            fare_reading = reading
                 await broadcast.publish(channel=channel, message=data)
+                if fare_reading is not None:
+                    # After the location frame, so watchers see the position
+                    # the fare was priced at first.
+                    await _publish_fare(channel, fare_reading)
         except WebSocketDisconnect:
             logger.info(
                 "ws disconnected",
@@ -156,6 +139,18 @@ async def booking_ws(websocket: WebSocket, booking_id: uuid.UUID):
             )
         finally:
             send_task.cancel()
+            # Another worker may pick up the driver's next connection; it
+            # resumes from the saved reading instead of the whole route.
+            try:
+                async with AsyncSessionLocal() as db:
+                    await trip_odometer.save(db, booking_id)
+            except Exception:
+                logger.exception(
+                    "odometer save failed", extra={"booking_id": str(booking_id)}
+                )
+            trip_odometer.discard(booking_id)
+            fare_meter.discard(booking_id)
+            await route_ingestor.close_booking(booking_id)
 
 
 @router.websocket("/ws/bookings/{booking_id}/watch")
@@ -166,14 +161,14 @@ async def booking_watch_ws(websocket: WebSocket, booking_id: uuid.UUID):
         return
 
     try:
-        payload = decode_token(token)
+        payload = principal_cache.decode(token)
         user_id = uuid.UUID(str(payload["sub"]))
     except Exception:
         await websocket.close(code=1008)
         return
 
     async with AsyncSessionLocal() as db:
-        user = await db.get(User, user_id)
+        user = await principal_cache.load_user(db, user_id)
         booking = await db.get(Booking, booking_id)
         admin_id = await get_admin_user_id(db)
         if (
@@ -187,21 +182,32 @@ async def booking_watch_ws(websocket: WebSocket, booking_id: uuid.UUID):
         ):
             await websocket.close(code=1008)
             return
+        booking_data = BookingRead.model_validate(booking).model_dump(mode="json")
 
-    await websocket.accept()
+    subprotocol = location_frames.negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
     channel = f"booking:{booking_id}"
     logger.info(
         "watch ws connected",
-        extra={"booking_id": str(booking_id), "user_id": str(user_id)},
+        extra={
+            "booking_id": str(booking_id),
+            "user_id": str(user_id),
+            "subprotocol": subprotocol,
+        },
     )
     async with broadcast.subscribe(channel=channel) as subscriber:
-        send_task = asyncio.create_task(_forward_messages(websocket, subscriber))
+        # Taken after subscribing so nothing falls between the two; a message
+        # may then arrive twice, which clients already tolerate.
+        await websocket.send_json(_watch_snapshot(channel, booking_data))
+        send_task = asyncio.create_task(
+            _forward_messages(websocket, subscriber, binary=subprotocol is not None)
+        )
         try:
             while True:
-                try:
-                    await websocket.receive_text()
-                except WebSocketDisconnect:
-                    raise
+                # Watchers have nothing to say; wait for the disconnect.
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
         except WebSocketDisconnect:
             logger.info(
                 "watch ws disconnected",
@@ -216,7 +222,142 @@ async def booking_watch_ws(websocket: WebSocket, booking_id: uuid.UUID):
             send_task.cancel()
 
 
-async def _forward_messages(websocket: WebSocket, subscriber):
-    async for event in subscriber:
-        logger.debug("forward", extra={"message": event.message})
-        await websocket.send_text(event.message)
+def _watch_snapshot(channel: str, booking: dict) -> dict:
+    """First message of a watch connection: the booking and its live state.
+
+    The booking and its status come from the database row, which is the
+    source of truth. Positions and the fare come from this worker's broadcast
+    history, so they are only present once another subscriber on this
+    worker has seen them.
+    """
+    history = broadcast.history.snapshot(channel)
+    points = history["points"]
+    return {
+        "type": "snapshot",
+        "booking": booking,
+        "status": booking["status"],
+        "position": points[-1] if points else None,
+        "points": points,
+        "fare": history.get("fare"),
+    }
+
+
+async def _advance_status(channel: str, state: BookingState, payload: dict) -> None:
+    """Apply the geofence transitions triggered by a driver location frame.
+
+    ``state`` comes from the booking state cache, so a database session is
+    only opened when the booking actually changes status.
+    """
+    from app.services import booking_service
+
+    if state.status == BookingStatus.DRIVER_CONFIRMED:
+        async with AsyncSessionLocal() as db:
+            await booking_service.leave_booking(db, state.booking_id)
+        await broadcast.publish(
+            channel=channel,
+            message=json.dumps({"status": "ON_THE_WAY"}),
+        )
+    elif state.status == BookingStatus.ON_THE_WAY:
+        distance = booking_service._haversine(
+            payload["lat"],
+            payload["lng"],
+            state.pickup_lat,
+            state.pickup_lng,
+        )
+        if distance < 50:
+            async with AsyncSessionLocal() as db:
+                await booking_service.arrive_pickup(db, state.booking_id)
+                await notifications.create_notification(
+                    db,
+                    state.booking_id,
+                    NotificationType.ARRIVED_PICKUP,
+                    UserRole.CUSTOMER,
+                    state.customer_id,
+                    {},
+                )
+                await db.commit()
+            await broadcast.publish(
+                channel=channel,
+                message=json.dumps({"status": "ARRIVED_PICKUP"}),
+            )
+    elif state.status == BookingStatus.IN_PROGRESS:
+        distance = booking_service._haversine(
+            payload["lat"],
+            payload["lng"],
+            state.dropoff_lat,
+            state.dropoff_lng,
+        )
+        if distance < 50:
+            async with AsyncSessionLocal() as db:
+                await booking_service.arrive_dropoff(db, state.booking_id)
+                await notifications.create_notification(
+                    db,
+                    state.booking_id,
+                    NotificationType.ARRIVED_DROPOFF,
+                    UserRole.CUSTOMER,
+                    state.customer_id,
+                    {},
+                )
+                await db.commit()
+            await broadcast.publish(
+                channel=channel,
+                message=json.dumps({"status": "ARRIVED_DROPOFF"}),
+            )
+
+
+async def _publish_fare(channel: str, reading: OdometerReading) -> None:
+    """Publish the running fare for a trip in progress to watch subscribers."""
+    quote = await fare_meter.quote(reading)
+    if quote is not None:
+        await broadcast.publish(channel=channel, message=json.dumps(quote))
+
+
+async def _receive_frame(
+    websocket: WebSocket, booking_id: uuid.UUID, *, binary: bool
+) -> tuple[Optional[str], Any]:
+    """Return the next driver frame as JSON text to publish and its payload.
+
+    Binary :mod:`location_frames` frames are accepted once negotiated and
+    republished as JSON, so watchers on either protocol can read them. The
+    text is ``None`` for frames that must be dropped, including text that is
+    not JSON.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None:
+        payload = location_frames.decode(message["bytes"]) if binary else None
+        if payload is None:
+            logger.warning(
+                "invalid binary frame",
+                extra={"booking_id": str(booking_id), "size": len(message["bytes"])},
+            )
+            return None, None
+        return json.dumps(payload), payload
+    data = message.get("text") or ""
+    try:
+        return data, json.loads(data)
+    except json.JSONDecodeError:
+        logger.warning(
+            "invalid json",
+            extra={"booking_id": str(booking_id), "data": data},
+        )
+        return None, None
+
+
+async def _forward_messages(
+    websocket: WebSocket,
+    subscriber,
+    booking_id: uuid.UUID | None = None,
+    *,
+    binary: bool = False,
+):
+    queue = fanout.queue()
+    sender = asyncio.create_task(fanout.pump(websocket, queue, binary=binary))
+    try:
+        async for event in subscriber:
+            if booking_id is not None:
+                booking_state_cache.apply_event(booking_id, event.message)
+            queue.put(event.message)
+    finally:
+        sender.cancel()
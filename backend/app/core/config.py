@@ -118,6 +118,10 @@ class Settings(BaseSettings):
     stripe_secret_key: Optional[str] = None
     stripe_webhook_secret: Optional[str] = None
     stripe_return_url: Optional[str] = None
+    # Stripe SDK calls run on their own thread pool (see stripe_async)
+    stripe_workers: int = 8
+    stripe_timeout_s: float = 30.0
+    stripe_max_network_retries: int = 2
     fcm_project_id: Optional[str] = None
     fcm_client_email: Optional[str] = None
     fcm_private_key: Optional[str] = None
@@ -129,6 +133,82 @@ class Settings(BaseSettings):
     driver_base_lat: float = -27.4698
     driver_base_lng: float = 153.0251
     leave_buffer_min: int = 5
+    leave_at_concurrency: int = 4
+    # Leave-now jobs are kept in the database; one worker (holding an advisory
+    # lock on PostgreSQL, a lock file on SQLite) runs them and polls for jobs
+    # added by the others.
+    scheduler_persist: bool = True
+    scheduler_poll_s: float = 15.0
+    scheduler_lock_path: Optional[str] = None
+    # Minimum seconds between live fare pushes for a trip in progress
+    fare_push_interval_s: float = 10.0
+    # Per-subscriber websocket send rate; pending positions are coalesced
+    ws_max_send_hz: float = 4.0
+    # Messages that may wait for one subscriber before it is disconnected
+    ws_max_pending: int = 256
+
+    # Websocket pub/sub backend: memory://, local://<hub>, redis://, postgres://
+    broadcast_url: str = "memory://"
+    # Last known state per channel, sent to subscribers when they join
+    broadcast_history_points: int = 20
+    broadcast_history_channels: int = 5000
+
+    # Outbound HTTP clients (Google, OpenRouteService, OneSignal)
+    outbound_http2: bool = True
+
+    # Directions route estimate cache
+    route_cache_max_entries: int = 5000
+    route_cache_ttl_s: float = 6 * 3600
+    route_cache_precision: int = 7
+    route_cache_bucket_min: int = 60
+    route_cache_persist: bool = True
+
+    # Simplify and encode routes of completed trips, then drop the raw points
+    route_compaction_tolerance_m: float = 5.0
+    route_compaction_max_gap_s: float = 60.0
+    route_compaction_delay_s: float = 3600.0
+    route_compaction_interval_s: float = 900.0
+    route_compaction_batch_size: int = 100
+    # Failed trips are retried after route_compaction_delay_s, this many times
+    route_compaction_max_attempts: int = 3
+
+    # bcrypt thread pool; requests waiting longer than the timeout get a 503
+    password_hash_workers: int = 4
+    password_hash_queue_timeout_s: float = 5.0
+
+    # Address search (Places Autocomplete / Details) caches
+    geocode_cache_max_entries: int = 2000
+    geocode_autocomplete_ttl_s: float = 600.0
+    geocode_details_ttl_s: float = 24 * 3600
+    geocode_details_concurrency: int = 5
+
+    # Persistent store of resolved places and reverse-geocode labels
+    place_store_persist: bool = True
+    reverse_geocode_precision: int = 7
+    reverse_geocode_match_m: float = 40.0
+
+    # Airports (comma-separated ISO countries) and landmarks answered locally
+    gazetteer_countries: str = "AU"
+    gazetteer_min_score: float = 0.6
+
+    # Decoded JWTs and user snapshots for authenticated requests
+    principal_cache_ttl_s: float = 30.0
+    principal_cache_max_entries: int = 10000
+
+    # Push notification outbox dispatcher
+    notification_workers: int = 4
+    notification_batch_size: int = 500
+    notification_max_attempts: int = 5
+    notification_retry_base_s: float = 5.0
+    notification_retry_max_s: float = 600.0
+    notification_poll_interval_s: float = 30.0
+    notification_drain_timeout_s: float = 10.0
+
+    # Route point ingestion (driver websocket)
+    route_ingest_batch_size: int = 50
+    route_ingest_flush_interval_s: float = 2.0
+    route_ingest_max_buffer: int = 5000
+    route_ingest_max_retries: int = 5
 
     # Pydantic config (v1 vs v2)
     if _P2:
@@ -0,0 +1,117 @@
+"""Pooled HTTP clients for outbound provider calls.
+
+Creating an ``httpx.AsyncClient`` per request pays TCP and TLS setup every
+time. Instead each provider gets one long-lived client with keep-alive
+pooling (and HTTP/2 when the ``h2`` package is installed), created in the
+application lifespan and reused by the service layer.
+
+Tests can route every client through an ``httpx.MockTransport`` with
+:meth:`HttpClients.use_transport`.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:  # HTTP/2 support is optional in httpx
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on installed extras
+    _HTTP2_AVAILABLE = False
+
+
+GOOGLE_MAPS = "google_maps"
+OPENROUTESERVICE = "openrouteservice"
+ONESIGNAL = "onesignal"
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """Timeout and pool limits for one outbound provider."""
+
+    timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float = 30.0
+
+
+PROVIDERS: dict[str, ProviderConfig] = {
+    GOOGLE_MAPS: ProviderConfig(
+        timeout=10.0, max_connections=20, max_keepalive_connections=10
+    ),
+    OPENROUTESERVICE: ProviderConfig(
+        timeout=5.0, max_connections=10, max_keepalive_connections=5
+    ),
+    ONESIGNAL: ProviderConfig(
+        timeout=5.0, max_connections=10, max_keepalive_connections=5
+    ),
+}
+
+
+class HttpClients:
+    """Registry of one pooled ``httpx.AsyncClient`` per provider."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._transport = transport
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        """Return the client for ``provider``, creating it on first use."""
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._build(provider)
+            self._clients[provider] = client
+        return client
+
+    def open(self) -> None:
+        """Create the clients for every known provider."""
+        for provider in PROVIDERS:
+            self.get(provider)
+
+    async def aclose(self) -> None:
+        """Close all clients and their pooled connections."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    async def use_transport(
+        self, transport: Optional[httpx.AsyncBaseTransport]
+    ) -> None:
+        """Route all clients through ``transport`` (``None`` restores the default)."""
+        await self.aclose()
+        self._transport = transport
+
+    def _build(self, provider: str) -> httpx.AsyncClient:
+        config = PROVIDERS[provider]
+        http2 = get_settings().outbound_http2 and _HTTP2_AVAILABLE
+        logger.debug(
+            "creating http client",
+            extra={"provider": provider, "http2": http2},
+        )
+        return httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=http2,
+            transport=self._transport,
+        )
+
+
+http_clients = HttpClients()
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared client for ``provider``."""
+    return http_clients.get(provider)
@@ -1,8 +1,10 @@
 """Utilities for hashing passwords and issuing JWT tokens."""
 
+import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, TypeVar
 
 from app.core.config import (
     get_settings,
@@ -14,6 +16,8 @@ settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Check a plaintext password against its hashed value."""
@@ -46,3 +50,78 @@ def decode_token(token: str):
         return payload
     except (JWTError, ExpiredSignatureError) as e:
         raise ValueError("Token is invalid or expired") from e
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when no hashing worker frees up within the queue timeout."""
+
+
+class PasswordHasher:
+    """Run bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so ``workers`` threads hash in
+    parallel while the loop keeps serving websockets. Callers wait at most
+    ``queue_timeout_s`` for a free worker and are then rejected with
+    :class:`PasswordHasherBusy` instead of piling up behind a login burst.
+    """
+
+    def __init__(self, *, workers: int = 4, queue_timeout_s: float = 5.0) -> None:
+        self.workers = workers
+        self.queue_timeout_s = queue_timeout_s
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(verify_password, plain, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = None
+        self._slots = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        if self._slots is None or self._loop is not loop:
+            # A semaphore belongs to one event loop (tests run several).
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        slots, executor = self._slots, self._executor
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise PasswordHasherBusy("password hashing is saturated") from None
+        finally:
+            self._waiting -= 1
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            slots.release()
+            self._completed += 1
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    queue_timeout_s=settings.password_hash_queue_timeout_s,
+)
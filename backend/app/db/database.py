@@ -1,5 +1,6 @@
 # app/db/database.py
 import warnings
+from datetime import datetime, timezone
 from pathlib import Path
 
 """Database connection and session management utilities."""
@@ -87,6 +88,18 @@ async def _enable_wal() -> None:
             await conn.run_sync(lambda c: c.exec_driver_sql("PRAGMA journal_mode=WAL"))
 
 
+# Synchronous URL for libraries without asyncio support (APScheduler job store)
+sync_url = url.set(drivername=url.get_backend_name())
+
+
+def as_utc(value: datetime) -> datetime:
+    """Return ``value`` as an aware UTC datetime.
+
+    SQLite hands back naive datetimes even for ``DateTime(timezone=True)``
+    columns; everything this app stores is UTC.
+    """
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
     expire_on_commit=False,
@@ -113,9 +126,13 @@ async def connect() -> None:
     # New domain models
     from app.models import availability_slot  # noqa: F401
     from app.models import booking  # noqa: F401
+    from app.models import landmark  # noqa: F401
     from app.models import notification  # noqa: F401
+    from app.models import place  # noqa: F401
+    from app.models import route_estimate  # noqa: F401
     from app.models import route_point  # noqa: F401
     from app.models import trip  # noqa: F401
+    from app.models import trip_odometer  # noqa: F401
     from app.models import user_v2  # noqa: F401
     from app.models import settings, user  # noqa: F401  # type: ignore
 
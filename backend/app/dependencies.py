@@ -6,10 +6,10 @@ from typing import AsyncGenerator, Union
 from app.core.config import get_settings
 from app.db.database import AsyncSessionLocal  # or reuse get_db()
 from app.models.user_v2 import User
+from app.services.principal_cache import principal_cache
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy import select
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 settings = get_settings()
@@ -48,12 +48,7 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.jwt_secret_key,
-            algorithms=[settings.jwt_algorithm],
-            options={"verify_sub": False},
-        )
+        payload = principal_cache.decode(token)
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token: no subject")
@@ -68,8 +63,7 @@ async def get_current_user(
     except (ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token: bad subject")
 
-    stmt = select(User).filter(User.id == user_uuid)
-    user = (await db.execute(stmt)).scalar_one_or_none()
+    user = await principal_cache.load_user(db, user_uuid)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
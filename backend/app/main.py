@@ -31,8 +31,16 @@ from app.api.v1 import bookings as bookings_v1_router
 from app.api.v1 import customer_bookings as customer_bookings_v1_router
 from app.api.v1 import driver_bookings as driver_bookings_v1_router
 from app.api.v1 import track as track_v1_router
-from app.db.database import database
-from app.services.scheduler import scheduler
+from app.api.v1.pagination import NEXT_CURSOR_HEADER
+from app.core.http import http_clients
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.db.database import AsyncSessionLocal, database
+from app.services import scheduler as scheduler_service
+from app.services.gazetteer import gazetteer
+from app.services.notifications import notification_dispatcher
+from app.services.route_cache import route_cache
+from app.services.route_ingest import route_ingestor
+from app.services.stripe_async import stripe_async
 
 
 def get_app() -> FastAPI:
@@ -43,12 +51,24 @@ def get_app() -> FastAPI:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database.connect()
+    await route_cache.purge_expired()
+    gazetteer.load_airports(settings.gazetteer_countries.split(","))
+    await gazetteer.load_landmarks(AsyncSessionLocal)
     await ws_router.broadcast.connect()
-    scheduler.start()
+    http_clients.open()
+    if scheduler_service.start_scheduler():
+        await scheduler_service.reconcile_leave_jobs()
+    route_ingestor.start()
+    notification_dispatcher.start()
     try:
         yield
     finally:
-        scheduler.shutdown()
+        await notification_dispatcher.stop()
+        await route_ingestor.stop()
+        scheduler_service.shutdown_scheduler()
+        await http_clients.aclose()
+        password_hasher.shutdown()
+        stripe_async.shutdown()
         await ws_router.broadcast.disconnect()
         await database.disconnect()
 
@@ -74,6 +94,7 @@ if not settings.env == "production":
         allow_credentials=settings.allow_credentials,
         allow_methods=settings.allow_methods,
         allow_headers=settings.allow_headers,
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 app.include_router(auth_router.router)
@@ -116,6 +137,19 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed logins and registrations while every bcrypt worker is busy."""
+    logging.getLogger("app.error").warning(
+        "password hashing saturated", extra={"path": request.url.path}
+    )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     """Log unexpected errors and return a generic message."""
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
@@ -16,3 +16,7 @@ class AvailabilitySlot(Base):
     start_dt: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     end_dt: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     reason: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_availability_slots_start_end", "start_dt", "end_dt"),
+    )
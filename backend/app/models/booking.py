@@ -1,9 +1,18 @@
 import enum
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import UUID, DateTime, Enum, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    UUID,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -59,9 +68,32 @@ class Booking(Base):
     final_payment_intent_id: Mapped[Optional[str]] = mapped_column(
         String, nullable=True
     )
+    # Part of the Stripe idempotency key; bumped after a charge definitely
+    # failed so the next attempt is not answered with the saved decline.
+    payment_attempt: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # When the driver should leave for pickup; set when the leave-now job is
+    # scheduled so listings do not need a Directions call per booking.
+    leave_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Assigned in Python so stored values carry the same (microsecond)
+    # precision as pagination cursors; see app.api.v1.pagination.
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    __table_args__ = (
+        # Keyset pagination of a customer's bookings on (created_at, id).
+        Index("ix_bookings_v2_customer_created", "customer_id", "created_at", "id"),
+        # Keyset pagination of the driver's listing of all bookings.
+        Index("ix_bookings_v2_created", "created_at", "id"),
+        # Driver listings filtered by status and pickup date range.
+        Index("ix_bookings_v2_status_pickup_when", "status", "pickup_when"),
+    )
@@ -1,10 +1,10 @@
 import enum
 import uuid
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from app.db.database import Base
-from sqlalchemy import JSON, UUID, DateTime, Enum, ForeignKey
+from sqlalchemy import JSON, UUID, DateTime, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -25,10 +25,20 @@ class NotificationRole(str, enum.Enum):
     DRIVER = "DRIVER"
 
 
+class NotificationStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    SKIPPED = "SKIPPED"
+    FAILED = "FAILED"
+
+
 class Notification(Base):
-    """Notification records for audit or debugging."""
+    """Notification records, doubling as the push delivery outbox."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_delivery_due", "delivery_status", "next_attempt_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -49,3 +59,19 @@ class Notification(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    delivery_status: Mapped[NotificationStatus] = mapped_column(
+        Enum(NotificationStatus),
+        nullable=False,
+        default=NotificationStatus.PENDING,
+        server_default=NotificationStatus.PENDING.value,
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class RouteEstimate(Base):
+    """Cached Directions result for a quantised origin/destination pair."""
+
+    __tablename__ = "route_estimates"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    distance_km: Mapped[float] = mapped_column(Float, nullable=False)
+    duration_min: Mapped[float] = mapped_column(Float, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
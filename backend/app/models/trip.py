@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import UUID, DateTime, ForeignKey, Integer
+from sqlalchemy import UUID, DateTime, ForeignKey, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
@@ -24,3 +25,12 @@ class Trip(Base):
     ended_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
     distance_meters: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     duration_seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Simplified route once the raw points are compacted; see route_archive.
+    route_polyline: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    route_offsets: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    route_compaction_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    route_compaction_failed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
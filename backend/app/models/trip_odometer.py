@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UUID, DateTime, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.database import Base
+
+
+class TripOdometerState(Base):
+    """Running odometer saved when a driver's socket closes.
+
+    Seeds the reading on reconnect, so only points recorded after
+    ``ended_at`` have to be replayed.
+    """
+
+    __tablename__ = "trip_odometers"
+
+    booking_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("bookings_v2.id"), primary_key=True
+    )
+    distance_m: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    ended_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    last_lng: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    anchor_lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    anchor_lng: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    points: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    dropped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from app.models.booking import BookingStatus
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class Location(BaseModel):
@@ -53,3 +53,13 @@ class BookingStatusResponse(BaseModel):
     status: BookingStatus
     leave_at: Optional[datetime] = None
     final_price_cents: Optional[int] = None
+
+
+class BookingPlanRead(BaseModel):
+    booking_id: uuid.UUID
+    leave_at: Optional[datetime] = None
+    distance_km: Optional[float] = None
+    duration_min: Optional[float] = None
+    estimated_price_cents: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
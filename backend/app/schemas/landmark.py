@@ -0,0 +1,19 @@
+"""Schemas for admin-maintained landmarks."""
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class LandmarkPayload(BaseModel):
+    """A named pickup/dropoff point offered by address search."""
+
+    name: str = Field(..., min_length=1, max_length=255)
+    address: str = Field(..., min_length=1)
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+
+class LandmarkRead(LandmarkPayload):
+    """Stored landmark."""
+
+    id: int
+    model_config = ConfigDict(from_attributes=True)
@@ -2,7 +2,7 @@
 
 import logging
 
-from app.core.security import create_jwt_token, hash_password, verify_password
+from app.core.security import create_jwt_token, password_hasher
 from app.dependencies import get_db
 from app.models.user_v2 import User as UserV2  # <- ORM model
 from app.schemas.auth import LoginRequest, LoginResponse, RegisterRequest
@@ -21,7 +21,9 @@ async def authenticate_user(db: AsyncSession, data: LoginRequest) -> LoginRespon
     stmt = select(UserV2).where(UserV2.email == data.email)
     user = (await db.execute(stmt)).scalar_one_or_none()
 
-    if user is None or not verify_password(data.password, user.hashed_password):
+    if user is None or not await password_hasher.verify(
+        data.password, user.hashed_password
+    ):
         logger.warning("invalid login attempt", extra={"email": data.email})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
@@ -52,7 +54,7 @@ async def register_user(db: AsyncSession, data: RegisterRequest) -> UserRead:
     user = UserV2(
         email=data.email,
         full_name=data.full_name,
-        hashed_password=hash_password(data.password),
+        hashed_password=await password_hasher.hash(data.password),
     )
 
     # Persist to database
@@ -0,0 +1,350 @@
+"""In-memory interval index over ``availability_slots``.
+
+Confirming a booking, creating a manual block and rendering the month view
+all need the slots that overlap a time range. The index is an augmented
+interval tree: an AVL tree keyed on ``(start, id)`` where every node also
+records the latest end time in its subtree. A subtree whose latest end is
+not after the query start cannot contain a match and is skipped, as is
+everything right of a node starting at or after the query end, so
+:meth:`AvailabilityIndex.overlaps` is ``O(log n)`` and
+:meth:`AvailabilityIndex.overlapping` visits ``O(log n)`` nodes per match
+however long individual slots are.
+
+The application only ever inserts slots and ``id`` is an autoincrement
+key, so :meth:`AvailabilityIndex.sync` normally costs one ``MAX(id)``
+lookup and loads only rows above the highest id already indexed, including
+rows written by other workers. Deleting or updating slots through the ORM
+invalidates every index in the process once the transaction commits, and
+the next ``sync`` rebuilds from the table; raw SQL that removes rows must
+call :meth:`AvailabilityIndex.invalidate` itself.
+
+The index is for reads. Ids can commit out of order, so ``sync`` may miss a
+row until the next invalidation. Code that writes slots (confirming a
+booking, creating a block) checks with :func:`overlaps_in_db` inside its own
+transaction instead.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.db.database import as_utc
+from app.models.availability_slot import AvailabilitySlot
+
+logger = logging.getLogger(__name__)
+
+BOOKING_REASON_PREFIX = "BOOKING:"
+
+# Bumped whenever a committed transaction deleted or updated slots.
+_generation = 0
+_STALE_KEY = "availability_index_stale"
+
+
+@dataclass(frozen=True)
+class IndexedSlot:
+    """A slot as stored in the index, with its original column values."""
+
+    id: int
+    start_dt: datetime
+    end_dt: datetime
+    reason: Optional[str]
+
+    @property
+    def start(self) -> datetime:
+        return as_utc(self.start_dt)
+
+    @property
+    def end(self) -> datetime:
+        return as_utc(self.end_dt)
+
+    @property
+    def is_booking(self) -> bool:
+        return bool(self.reason and self.reason.startswith(BOOKING_REASON_PREFIX))
+
+
+class _Node:
+    __slots__ = ("key", "end", "slot", "left", "right", "height", "max_end")
+
+    def __init__(self, slot: IndexedSlot) -> None:
+        self.key = (slot.start.timestamp(), slot.id)
+        self.end = slot.end.timestamp()
+        self.slot = slot
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.height = 1
+        self.max_end = self.end
+
+
+def _height(node: Optional[_Node]) -> int:
+    return node.height if node is not None else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+
+def _rotate_right(node: _Node) -> _Node:
+    pivot = node.left
+    assert pivot is not None
+    node.left, pivot.right = pivot.right, node
+    _update(node)
+    return _update(pivot)
+
+
+def _rotate_left(node: _Node) -> _Node:
+    pivot = node.right
+    assert pivot is not None
+    node.right, pivot.left = pivot.left, node
+    _update(node)
+    return _update(pivot)
+
+
+def _rebalance(node: _Node) -> _Node:
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        assert node.left is not None
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        assert node.right is not None
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+def _build(nodes: list[_Node], lo: int, hi: int) -> Optional[_Node]:
+    """Build a balanced subtree from ``nodes[lo:hi]``, already sorted."""
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _build(nodes, lo, mid)
+    node.right = _build(nodes, mid + 1, hi)
+    return _update(node)
+
+
+class AvailabilityIndex:
+    """Interval tree answering overlap and free-window queries."""
+
+    def __init__(self) -> None:
+        self._root: Optional[_Node] = None
+        self._ids: set[int] = set()
+        self._max_id = 0
+        self._generation = _generation
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, slot: AvailabilitySlot | IndexedSlot) -> None:
+        """Insert a slot; slots already indexed are ignored."""
+        if slot.id in self._ids:
+            return
+        node = _Node(IndexedSlot(slot.id, slot.start_dt, slot.end_dt, slot.reason))
+        self._root = self._insert(self._root, node)
+        self._ids.add(slot.id)
+        self._max_id = max(self._max_id, slot.id)
+
+    def extend(self, slots: Iterable[AvailabilitySlot | IndexedSlot]) -> None:
+        """Insert many slots, rebuilding the tree in one pass when that is cheaper."""
+        items = {
+            slot.id: IndexedSlot(slot.id, slot.start_dt, slot.end_dt, slot.reason)
+            for slot in slots
+            if slot.id not in self._ids
+        }
+        if not items:
+            return
+        if len(items) < len(self._ids) // 8:
+            for item in items.values():
+                self.add(item)
+            return
+        nodes = [*self._nodes(), *(_Node(item) for item in items.values())]
+        nodes.sort(key=lambda node: node.key)
+        self._root = _build(nodes, 0, len(nodes))
+        self._ids.update(items)
+        self._max_id = max(self._max_id, *items)
+
+    def clear(self) -> None:
+        self._root = None
+        self._ids.clear()
+        self._max_id = 0
+
+    def invalidate(self) -> None:
+        """Forget every slot so the next :meth:`sync` reloads the table."""
+        self.clear()
+
+    async def sync(self, db: AsyncSession) -> int:
+        """Bring the index up to date with the table.
+
+        Returns the number of slots loaded.
+        """
+        if self._generation != _generation:
+            self._generation = _generation
+            logger.info("availability index invalidated", extra={"size": len(self)})
+            self.clear()
+        max_id = (await db.execute(select(func.max(AvailabilitySlot.id)))).scalar()
+        max_id = max_id or 0
+        if max_id < self._max_id:
+            # The newest indexed rows are gone; reload everything.
+            logger.info(
+                "availability index rebuilt",
+                extra={"indexed_max_id": self._max_id, "max_id": max_id},
+            )
+            self.clear()
+        if max_id <= self._max_id:
+            return 0
+        result = await db.execute(
+            select(
+                AvailabilitySlot.id,
+                AvailabilitySlot.start_dt,
+                AvailabilitySlot.end_dt,
+                AvailabilitySlot.reason,
+            ).where(AvailabilitySlot.id > self._max_id)
+        )
+        rows = [IndexedSlot(*row) for row in result.all()]
+        self.extend(rows)
+        logger.debug(
+            "availability index synced",
+            extra={"added": len(rows), "size": len(self)},
+        )
+        return len(rows)
+
+    def overlapping(self, start: datetime, end: datetime) -> list[IndexedSlot]:
+        """Return slots overlapping ``[start, end)`` ordered by start time."""
+        lo, hi = as_utc(start).timestamp(), as_utc(end).timestamp()
+        found: list[IndexedSlot] = []
+        stack: list[_Node] = []
+        node = self._root
+        # In-order walk that skips subtrees ending by ``lo`` and stops at the
+        # first node starting at or after ``hi``.
+        while stack or node is not None:
+            while node is not None and node.max_end > lo:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.key[0] >= hi:
+                break
+            if node.end > lo:
+                found.append(node.slot)
+            node = node.right
+        return found
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Return whether any slot overlaps ``[start, end)``."""
+        lo, hi = as_utc(start).timestamp(), as_utc(end).timestamp()
+        node = self._root
+        while node is not None:
+            if node.key[0] < hi and node.end > lo:
+                return True
+            # If the left subtree reaches past ``lo`` but holds no match, its
+            # latest-ending slot starts at or after ``hi``, and so does every
+            # slot to the right: nothing overlaps.
+            if node.left is not None and node.left.max_end > lo:
+                node = node.left
+            else:
+                node = node.right
+        return False
+
+    def free_windows(
+        self, start: datetime, end: datetime, min_length: timedelta = timedelta(0)
+    ) -> list[tuple[datetime, datetime]]:
+        """Return the gaps in ``[start, end)`` not covered by any slot."""
+        start, end = as_utc(start), as_utc(end)
+        windows: list[tuple[datetime, datetime]] = []
+        cursor = start
+        for slot in self.overlapping(start, end):
+            if slot.start > cursor and slot.start - cursor >= min_length:
+                windows.append((cursor, slot.start))
+            cursor = max(cursor, slot.end)
+            if cursor >= end:
+                break
+        if cursor < end and end - cursor >= min_length:
+            windows.append((cursor, end))
+        return windows
+
+    def month_view(self, start: datetime, end: datetime) -> list[IndexedSlot]:
+        """Manual blocks overlapping ``[start, end)``, excluding booking holds."""
+        return [s for s in self.overlapping(start, end) if not s.is_booking]
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        return _rebalance(node)
+
+    def _nodes(self) -> list[_Node]:
+        nodes: list[_Node] = []
+        stack: list[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            nodes.append(node)
+            node = node.right
+        return nodes
+
+
+async def overlaps_in_db(db: AsyncSession, start: datetime, end: datetime) -> bool:
+    """Return whether a slot visible to ``db`` overlaps ``[start, end)``."""
+    found = await db.execute(
+        select(AvailabilitySlot.id)
+        .where(AvailabilitySlot.end_dt > start, AvailabilitySlot.start_dt < end)
+        .limit(1)
+    )
+    return found.first() is not None
+
+
+def _touches_slots(mappers: Iterable) -> bool:
+    return any(mapper.class_ is AvailabilitySlot for mapper in mappers)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(state: ORMExecuteState) -> None:
+    if (state.is_delete or state.is_update) and _touches_slots(state.all_mappers):
+        state.session.info[_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, AvailabilitySlot) for obj in session.deleted) or any(
+        isinstance(obj, AvailabilitySlot) and session.is_modified(obj)
+        for obj in session.dirty
+    ):
+        session.info[_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    global _generation
+    if session.info.pop(_STALE_KEY, False):
+        _generation += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_STALE_KEY, None)
+
+
+availability_index = AvailabilityIndex()
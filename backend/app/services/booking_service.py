@@ -9,16 +9,25 @@ import stripe
 from app.models.availability_slot import AvailabilitySlot
 from app.models.booking import Booking, BookingStatus
 from app.models.notification import NotificationType
-from app.models.route_point import RoutePoint
 from app.models.settings import AdminConfig
 from app.models.trip import Trip
+from app.models.trip_odometer import TripOdometerState
 from app.models.user_v2 import User, UserRole
 from app.schemas.api_booking import BookingCreateRequest
-from app.services import notifications, pricing_service, routing, stripe_client
+from app.services import notifications, pricing_service, routing
+from app.services.availability_index import (
+    BOOKING_REASON_PREFIX,
+    availability_index,
+    overlaps_in_db,
+)
 from app.services.booking_updates import send_booking_update
+from app.services.route_ingest import route_ingestor
 from app.services.settings_service import get_admin_user_id
+from app.services.stripe_async import outcome_unknown, stripe_async
+from app.services.trip_metrics import load_trip_metrics
+from app.services.trip_odometer import trip_odometer
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -49,6 +58,7 @@ async def create_booking(
         data.pickup.lng,
         data.dropoff.lat,
         data.dropoff.lng,
+        departure=data.pickup_when,
     )
     estimate_cents = pricing_service.estimate_fare(settings, distance_km, duration_min)
     deposit = estimate_cents // 2
@@ -97,13 +107,7 @@ async def confirm_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
     buffer = timedelta(minutes=30)
     block_start = booking.pickup_when - buffer
     block_end = booking.pickup_when + timedelta(hours=1) + buffer
-    overlap = await db.execute(
-        select(AvailabilitySlot).where(
-            AvailabilitySlot.end_dt > block_start,
-            AvailabilitySlot.start_dt < block_end,
-        )
-    )
-    if overlap.scalars().first():
+    if await overlaps_in_db(db, block_start, block_end):
         raise ValueError("booking overlaps existing slot")
 
     customer = await db.get(User, booking.customer_id)
@@ -114,7 +118,7 @@ async def confirm_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
     ):
         raise ValueError("customer has no payment method")
     try:
-        intent = stripe_client.charge_deposit(
+        intent = await stripe_async.charge_deposit(
             booking.deposit_required_cents,
             booking.id,
             public_code=booking.public_code,
@@ -124,10 +128,15 @@ async def confirm_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
             pickup_time=booking.pickup_when,
             payment_method=customer.stripe_payment_method_id,
             customer_id=customer.stripe_customer_id,
+            attempt=booking.payment_attempt,
         )
     except stripe.error.CardError as exc:
+        booking.payment_attempt += 1
+        await db.commit()
         raise HTTPException(status_code=402, detail=exc.user_message) from exc
     except stripe.error.StripeError as exc:
+        if not outcome_unknown(exc):
+            booking.payment_attempt += 1
         booking.status = BookingStatus.DEPOSIT_FAILED
         await db.commit()
         await db.refresh(booking)
@@ -138,11 +147,14 @@ async def confirm_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
     booking.status = BookingStatus.DRIVER_CONFIRMED
     booking.deposit_payment_intent_id = intent.id
     slot = AvailabilitySlot(
-        start_dt=block_start, end_dt=block_end, reason=f"BOOKING:{booking.id}"
+        start_dt=block_start,
+        end_dt=block_end,
+        reason=f"{BOOKING_REASON_PREFIX}{booking.id}",
     )
     db.add(slot)
     await db.commit()
     await db.refresh(booking)
+    availability_index.add(slot)
     await send_booking_update(booking)
     return booking
 
@@ -233,31 +245,22 @@ async def complete_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
     if booking is None or booking.status is not BookingStatus.ARRIVED_DROPOFF:
         raise ValueError("booking cannot be completed")
 
-    points = (
-        (
-            await db.execute(
-                select(RoutePoint)
-                .where(RoutePoint.booking_id == booking.id)
-                .order_by(RoutePoint.ts)
-            )
-        )
-        .scalars()
-        .all()
-    )
-    distance = 0.0
-    for p1, p2 in zip(points, points[1:]):
-        distance += _haversine(p1.lat, p1.lng, p2.lat, p2.lng)
-    duration = 0
-    if points:
-        duration = int((points[-1].ts - points[0].ts).total_seconds())
+    # Make sure points still buffered from the driver socket are included.
+    await route_ingestor.flush(booking.id)
+    # Billing always rescans the recorded route, once per trip; the driver
+    # socket's running odometer filters incrementally and is only an
+    # estimate for display.
+    metrics = await load_trip_metrics(db, booking.id)
+    distance = metrics.distance_m
+    duration = metrics.duration_s
 
     trip = (
         await db.execute(select(Trip).where(Trip.booking_id == booking.id))
     ).scalar_one()
     trip.distance_meters = int(distance)
     trip.duration_seconds = duration
-    trip.started_at = points[0].ts if points else trip.started_at
-    trip.ended_at = points[-1].ts if points else trip.ended_at
+    trip.started_at = metrics.started_at or trip.started_at
+    trip.ended_at = metrics.ended_at or trip.ended_at
 
     settings = (await db.execute(select(AdminConfig))).scalar_one()
     fare = pricing_service.estimate_fare(settings, distance / 1000, duration / 60)
@@ -271,21 +274,32 @@ async def complete_booking(db: AsyncSession, booking_id: uuid.UUID) -> Booking:
         or not customer.stripe_customer_id
     ):
         raise ValueError("customer has no payment method")
-    intent = stripe_client.charge_final(
-        remainder,
-        booking.id,
-        public_code=booking.public_code,
-        customer_email=customer.email,
-        pickup_address=booking.pickup_address,
-        dropoff_address=booking.dropoff_address,
-        pickup_time=booking.pickup_when,
-        payment_method=customer.stripe_payment_method_id,
-        customer_id=customer.stripe_customer_id,
-    )
+    try:
+        intent = await stripe_async.charge_final(
+            remainder,
+            booking.id,
+            public_code=booking.public_code,
+            customer_email=customer.email,
+            pickup_address=booking.pickup_address,
+            dropoff_address=booking.dropoff_address,
+            pickup_time=booking.pickup_when,
+            payment_method=customer.stripe_payment_method_id,
+            customer_id=customer.stripe_customer_id,
+            attempt=booking.payment_attempt,
+        )
+    except stripe.error.StripeError as exc:
+        if not outcome_unknown(exc):
+            booking.payment_attempt += 1
+            await db.commit()
+        raise
     booking.final_price_cents = fare
     booking.final_payment_intent_id = intent.id
     booking.status = BookingStatus.COMPLETED
+    await db.execute(
+        delete(TripOdometerState).where(TripOdometerState.booking_id == booking.id)
+    )
     await db.commit()
+    trip_odometer.discard(booking.id)
     await db.refresh(booking)
     await send_booking_update(booking, final_price_cents=booking.final_price_cents)
     return booking
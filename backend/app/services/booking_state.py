@@ -0,0 +1,134 @@
+"""In-memory cache of the booking fields the driver websocket needs.
+
+Every location frame runs a geofence check against the booking's pickup or
+dropoff coordinates, chosen by its current status. Reading the ``Booking``
+row for each frame is wasteful because those fields only change on a status
+transition, and every transition already goes through
+:func:`app.services.booking_updates.send_booking_update`. That function
+refreshes the cache, and status messages seen on the booking's broadcast
+channel are applied too, so location frames are served from memory and only
+state transitions touch the database.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.booking import Booking, BookingStatus
+
+# Bookings in these states never receive location frames again.
+_TERMINAL = {
+    BookingStatus.COMPLETED,
+    BookingStatus.CANCELLED,
+    BookingStatus.DECLINED,
+}
+# Lifecycle order of the enum; broadcast events can arrive after the cache was
+# already advanced locally, so they are only allowed to move a booking forward.
+_ORDER = {status: index for index, status in enumerate(BookingStatus)}
+
+
+@dataclass(frozen=True)
+class BookingState:
+    """Snapshot of the booking fields used by the geofence loop."""
+
+    booking_id: uuid.UUID
+    customer_id: uuid.UUID
+    status: BookingStatus
+    pickup_lat: float
+    pickup_lng: float
+    dropoff_lat: float
+    dropoff_lng: float
+
+    @classmethod
+    def from_booking(cls, booking: Booking) -> "BookingState":
+        return cls(
+            booking_id=booking.id,
+            customer_id=booking.customer_id,
+            status=BookingStatus(booking.status),
+            pickup_lat=booking.pickup_lat,
+            pickup_lng=booking.pickup_lng,
+            dropoff_lat=booking.dropoff_lat,
+            dropoff_lng=booking.dropoff_lng,
+        )
+
+
+class BookingStateCache:
+    """Process-wide map of booking id to :class:`BookingState`."""
+
+    def __init__(self) -> None:
+        self._states: dict[uuid.UUID, BookingState] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, booking_id: uuid.UUID) -> Optional[BookingState]:
+        """Return the cached state, or ``None`` when it must be loaded."""
+        state = self._states.get(booking_id)
+        if state is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return state
+
+    def update(self, booking: Booking) -> BookingState:
+        """Store and return the latest state of ``booking``.
+
+        Bookings that reached a terminal status are evicted rather than
+        stored, so the cache only holds active trips.
+        """
+        state = BookingState.from_booking(booking)
+        if state.status in _TERMINAL:
+            self._states.pop(state.booking_id, None)
+        else:
+            self._states[state.booking_id] = state
+        return state
+
+    def apply_event(self, booking_id: uuid.UUID, message: str) -> None:
+        """Update the cached status from a message on the booking channel.
+
+        This keeps connections in sync with transitions made by another
+        process that shares the broadcast backend. Location frames carry no
+        ``status`` and are skipped without being parsed.
+        """
+        state = self._states.get(booking_id)
+        if state is None or '"status"' not in message:
+            return
+        try:
+            status = BookingStatus(json.loads(message)["status"])
+        except (ValueError, KeyError, TypeError):
+            return
+        if status in _TERMINAL:
+            self._states.pop(booking_id, None)
+        elif _ORDER[status] > _ORDER[state.status]:
+            self._states[booking_id] = replace(state, status=status)
+
+    async def load(
+        self, db: AsyncSession, booking_id: uuid.UUID
+    ) -> Optional[BookingState]:
+        """Read the booking from the database and cache it."""
+        booking = await db.get(Booking, booking_id)
+        if booking is None:
+            self._states.pop(booking_id, None)
+            return None
+        return self.update(booking)
+
+    def discard(self, booking_id: uuid.UUID) -> None:
+        self._states.pop(booking_id, None)
+
+    def clear(self) -> None:
+        self._states.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache size and hit/miss counters."""
+        return {
+            "size": len(self._states),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+booking_state_cache = BookingStateCache()
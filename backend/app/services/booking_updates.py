@@ -7,11 +7,13 @@ from typing import Any
 
 from app.core.broadcast import broadcast
 from app.models.booking import Booking
+from app.services.booking_state import booking_state_cache
 
 
 async def send_booking_update(booking: Booking, **fields: Any) -> None:
     """Publish booking updates to the broadcast channel."""
 
+    booking_state_cache.update(booking)
     payload: dict[str, Any] = {"id": str(booking.id), "status": booking.status}
     if fields:
         payload.update(fields)
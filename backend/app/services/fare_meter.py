@@ -0,0 +1,109 @@
+"""Live fare estimates for trips in progress.
+
+While a booking is ``IN_PROGRESS`` the driver websocket prices the running
+odometer reading with :func:`pricing_service.estimate_fare` and publishes
+the result on the booking channel as a ``{"type": "fare", ...}`` message,
+where watch subscribers on any worker receive it. Pushes are coalesced to
+at most one per ``interval_s`` per booking, and the pricing row is cached
+for ``pricing_ttl_s`` so a quote does not cost a query.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.models.settings import AdminConfig
+from app.services import pricing_service
+from app.services.trip_odometer import OdometerReading
+
+
+@dataclass(frozen=True)
+class _Pricing:
+    flagfall: float
+    per_km_rate: float
+    per_minute_rate: float
+
+
+class FareMeter:
+    """Throttle and price live fare updates per booking."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        interval_s: float = 10.0,
+        pricing_ttl_s: float = 60.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self.interval_s = interval_s
+        self.pricing_ttl_s = pricing_ttl_s
+        self._last_push: dict[uuid.UUID, float] = {}
+        self._pricing: Optional[_Pricing] = None
+        self._pricing_loaded = 0.0
+        self._pushes = 0
+
+    def due(self, booking_id: uuid.UUID) -> bool:
+        """Return whether a push is due and, if so, start the next interval."""
+        now = time.monotonic()
+        last = self._last_push.get(booking_id)
+        if last is None:
+            # The first frame opens the window; a zero fare is not worth a push.
+            self._last_push[booking_id] = now
+            return False
+        if now - last < self.interval_s:
+            return False
+        self._last_push[booking_id] = now
+        return True
+
+    async def quote(self, reading: OdometerReading) -> Optional[dict[str, Any]]:
+        """Price a reading; ``None`` when pricing has not been configured."""
+        pricing = await self._get_pricing()
+        if pricing is None:
+            return None
+        distance_km = reading.distance_m / 1000
+        duration_min = reading.duration_s / 60
+        self._pushes += 1
+        return {
+            "type": "fare",
+            "fare_cents": pricing_service.estimate_fare(
+                pricing, distance_km, duration_min
+            ),
+            "distance_km": round(distance_km, 3),
+            "duration_min": round(duration_min, 1),
+        }
+
+    def invalidate_pricing(self) -> None:
+        self._pricing = None
+
+    def clear(self) -> None:
+        self._last_push.clear()
+        self._pricing = None
+
+    def discard(self, booking_id: uuid.UUID) -> None:
+        self._last_push.pop(booking_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {"active": len(self._last_push), "pushes": self._pushes}
+
+    async def _get_pricing(self) -> Optional[_Pricing]:
+        now = time.monotonic()
+        if self._pricing is None or now - self._pricing_loaded > self.pricing_ttl_s:
+            async with self._session_factory() as db:
+                row = await db.get(AdminConfig, 1)
+            if row is None:
+                return None
+            self._pricing = _Pricing(
+                float(row.flagfall), float(row.per_km_rate), float(row.per_minute_rate)
+            )
+            self._pricing_loaded = now
+        return self._pricing
+
+
+fare_meter = FareMeter(interval_s=get_settings().fare_push_interval_s)
@@ -0,0 +1,216 @@
+"""In-memory gazetteer of airports and landmarks for address search.
+
+Airports are the most common pickup and dropoff, and customers search for
+them by code ("BNE") or by name ("Brisbane Airport"). The gazetteer holds
+every airport in ``gazetteer_countries`` from :mod:`airportsdata`, plus the
+admin-maintained ``landmarks`` table, and puts them ahead of Google's
+results. Only a query that names a place outright (see
+:meth:`Gazetteer.is_exact`) is answered without a Google round trip, so
+"Sunshine Coast" or "mel" still get street and suburb results.
+
+Each place is indexed under its name (and, for airports, "<city> Airport"
+and its IATA and ICAO codes). A query scores 1.0 on an exact code or name, the
+fraction of the name it covers when it is a prefix of one, and otherwise
+the trigram similarity to the closest name. Only places scoring at least
+``min_score`` are returned; anything weaker is left to Google so partial
+street names are not mistaken for airports.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.landmark import Landmark
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalise(text: str) -> str:
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """Prefix and trigram index over airports and landmarks."""
+
+    def __init__(self, *, min_score: float = 0.6) -> None:
+        self.min_score = min_score
+        self._airports: list[dict[str, Any]] = []
+        self._landmarks: list[dict[str, Any]] = []
+        self._places: list[dict[str, Any]] = []
+        self._codes: dict[str, int] = {}
+        self._exact_names: set[str] = set()
+        # Sorted (name, place index) pairs, for prefix scans with bisect
+        self._names: list[tuple[str, int]] = []
+        self._name_trigrams: list[int] = []
+        self._trigram_index: dict[str, list[int]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def load_airports(self, countries: Iterable[str]) -> None:
+        """Index every airport with an IATA code in ``countries``."""
+        import airportsdata
+
+        wanted = {country.strip().upper() for country in countries if country.strip()}
+        airports = []
+        for code, airport in sorted(airportsdata.load("IATA").items()):
+            if airport["country"] not in wanted:
+                continue
+            city = airport["city"]
+            airports.append(
+                {
+                    "place_id": f"iata:{code}",
+                    "name": f"{airport['name']} ({code})",
+                    "address": ", ".join(
+                        part
+                        for part in (city, airport["subd"], airport["country"])
+                        if part
+                    ),
+                    "lat": airport["lat"],
+                    "lng": airport["lon"],
+                    "_codes": (code, airport["icao"]),
+                    "_aliases": (airport["name"], f"{city} Airport" if city else None),
+                    # Several airports can share a city; list the main one first.
+                    "_rank": 0 if "International" in airport["name"] else 1,
+                }
+            )
+        self._airports = airports
+        self._rebuild()
+
+    def set_landmarks(self, landmarks: Iterable[Any]) -> None:
+        """Replace the indexed landmarks with ``landmarks`` (rows or schemas)."""
+        self._landmarks = [
+            {
+                "place_id": f"landmark:{row.id}",
+                "name": row.name,
+                "address": row.address,
+                "lat": row.lat,
+                "lng": row.lng,
+                "_codes": (),
+                "_aliases": (row.name,),
+                "_rank": 0,
+            }
+            for row in landmarks
+        ]
+        self._rebuild()
+
+    async def load_landmarks(
+        self, session_factory: async_sessionmaker[AsyncSession]
+    ) -> None:
+        try:
+            async with session_factory() as db:
+                rows = (await db.execute(select(Landmark))).scalars().all()
+        except Exception:
+            logger.exception("landmark load failed")
+            return
+        self.set_landmarks(rows)
+
+    def search(self, query: str, limit: int = 5) -> list[dict[str, Any]]:
+        """Return up to ``limit`` confident matches for ``query``, best first."""
+        q = normalise(query)
+        scores: dict[int, float] = {}
+        if len(q) >= 3:
+            code = self._codes.get(q.upper())
+            if code is not None:
+                scores[code] = 1.0
+
+            start = bisect.bisect_left(self._names, (q, -1))
+            for name, index in self._names[start:]:
+                if not name.startswith(q):
+                    break
+                scores[index] = max(scores.get(index, 0.0), len(q) / len(name))
+
+            q_trigrams = trigrams(q)
+            shared: dict[int, int] = defaultdict(int)
+            for trigram in q_trigrams:
+                for position in self._trigram_index.get(trigram, ()):
+                    shared[position] += 1
+            for position, count in shared.items():
+                similarity = count / (
+                    len(q_trigrams) + self._name_trigrams[position] - count
+                )
+                index = self._names[position][1]
+                scores[index] = max(scores.get(index, 0.0), similarity)
+
+        places = self._places
+        matches = sorted(
+            (-score, places[index]["_rank"], places[index]["name"], index)
+            for index, score in scores.items()
+            if score >= self.min_score
+        )[:limit]
+        if matches:
+            self._hits += 1
+        else:
+            self._misses += 1
+        return [
+            {key: value for key, value in self._places[index].items() if key[0] != "_"}
+            for *_, index in matches
+        ]
+
+    def is_exact(self, query: str) -> bool:
+        """Whether ``query`` names a place outright, so Google can be skipped.
+
+        That is an airport code typed in capitals ("BNE", "YBBN"), a query
+        with the word "airport" in it, or the full name of an indexed place.
+        Lower-case codes are not enough: "mel" or "box" is more often the
+        start of a suburb or street.
+        """
+        text = query.strip()
+        if text.isupper() and text in self._codes:
+            return True
+        q = normalise(text)
+        return "airport" in q.split() or q in self._exact_names
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "airports": len(self._airports),
+            "landmarks": len(self._landmarks),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _rebuild(self) -> None:
+        places = self._airports + self._landmarks
+        codes: dict[str, int] = {}
+        names: set[tuple[str, int]] = set()
+        for index, place in enumerate(places):
+            for code in place["_codes"]:
+                if code:
+                    codes[code] = index
+            for alias in place["_aliases"]:
+                if alias and normalise(alias):
+                    names.add((normalise(alias), index))
+        sorted_names = sorted(names)
+        trigram_index: dict[str, list[int]] = defaultdict(list)
+        name_trigrams = []
+        for position, (name, _) in enumerate(sorted_names):
+            grams = trigrams(name)
+            name_trigrams.append(len(grams))
+            for trigram in grams:
+                trigram_index[trigram].append(position)
+        self._places = places
+        self._codes = codes
+        self._exact_names = {name for name, _ in sorted_names}
+        self._names = sorted_names
+        self._name_trigrams = name_trigrams
+        self._trigram_index = dict(trigram_index)
+
+
+_settings = get_settings()
+gazetteer = Gazetteer(min_score=_settings.gazetteer_min_score)
@@ -0,0 +1,93 @@
+"""Caches for Google Places lookups made by address search.
+
+``/geocode/search`` runs on every keystroke, and consecutive requests share
+most of their work: the same prefix is typed by many customers and the same
+``place_id`` comes back for many prefixes. :class:`GeocodeCache` keeps
+results in an LRU with a TTL and coalesces identical lookups that are
+already in flight, so a burst of equal requests costs one provider call.
+Failed lookups are not cached; every waiter sees the error.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+class GeocodeCache:
+    """LRU/TTL cache with single-flight loading."""
+
+    def __init__(self, *, max_entries: int = 2000, ttl_s: float = 600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Return the cached value for ``key``, calling ``loader`` at most once."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+        else:
+            self._misses += 1
+            future = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = future
+        # Shielded so one caller going away does not cancel the others' load.
+        return await asyncio.shield(future)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": (
+                round((self._hits + self._coalesced) / lookups, 3) if lookups else 0.0
+            ),
+        }
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await loader()
+        finally:
+            self._inflight.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + self.ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+
+_settings = get_settings()
+autocomplete_cache = GeocodeCache(
+    max_entries=_settings.geocode_cache_max_entries,
+    ttl_s=_settings.geocode_autocomplete_ttl_s,
+)
+place_details_cache = GeocodeCache(
+    max_entries=_settings.geocode_cache_max_entries,
+    ttl_s=_settings.geocode_details_ttl_s,
+)
@@ -3,14 +3,30 @@ from __future__ import annotations
 
 """Service functions wrapping external geocoding APIs."""
 
+import asyncio
 import logging
 import math
 
-import httpx
 from app.core.config import get_settings
+from app.core.http import GOOGLE_MAPS, OPENROUTESERVICE, get_http_client
+from app.services.gazetteer import gazetteer
+from app.services.geocode_cache import autocomplete_cache, place_details_cache
+from app.services.place_store import place_store
 
 logger = logging.getLogger(__name__)
 
+_DETAILS_CONCURRENCY = get_settings().geocode_details_concurrency
+_details_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def _details_semaphore() -> asyncio.Semaphore:
+    """Bound concurrent Place Details calls across all searches in the process."""
+    global _details_slots
+    loop = asyncio.get_running_loop()
+    if _details_slots is None or _details_slots[0] is not loop:
+        _details_slots = (loop, asyncio.Semaphore(_DETAILS_CONCURRENCY))
+    return _details_slots[1]
+
 
 async def reverse_geocode(lat: float, lon: float) -> str:
     """Reverse geocode coordinates to a human-readable address.
@@ -32,9 +48,16 @@ async def reverse_geocode(lat: float, lon: float) -> str:
         The formatted address returned by the geocoding provider.  If the
         provider does not supply an address, a simple "lat, lon" string is
         returned.
+
+    Labels already resolved within a few metres of the point are served from
+    :mod:`app.services.place_store` without calling the provider.
     """
 
     logger.info("reverse geocode", extra={"lat": lat, "lon": lon})
+    stored = await place_store.nearest_label(lat, lon)
+    if stored is not None:
+        return stored
+
     settings = get_settings()
     api_key = settings.ors_api_key
 
@@ -51,28 +74,30 @@ async def reverse_geocode(lat: float, lon: float) -> str:
         extra={"url": url, "lat": lat, "lon": lon},
     )
 
-    async with httpx.AsyncClient() as client:
-        try:
-            res = await client.get(url, params=params, headers=headers)
-            res.raise_for_status()
-        except Exception:
-            logger.exception("reverse geocode request failed")
-            raise
-        logger.debug(
-            "reverse geocode response",
-            extra={
-                "status": res.status_code,
-                "payload": getattr(res, "text", "")[:200],
-            },
-        )
-        data = res.json()
+    client = get_http_client(OPENROUTESERVICE)
+    try:
+        res = await client.get(url, params=params, headers=headers)
+        res.raise_for_status()
+    except Exception:
+        logger.exception("reverse geocode request failed")
+        raise
+    logger.debug(
+        "reverse geocode response",
+        extra={
+            "status": res.status_code,
+            "payload": getattr(res, "text", "")[:200],
+        },
+    )
+    data = res.json()
 
     address = data.get("features", [{}])[0].get("properties", {}).get("label")
 
     if not address:
         logger.warning("no address found", extra={"lat": lat, "lon": lon})
+        return f"{lat:.5f}, {lon:.5f}"
 
-    return address or f"{lat:.5f}, {lon:.5f}"
+    await place_store.put_label(lat, lon, address)
+    return address
 
 
 def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -91,6 +116,53 @@ def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> f
     return r * c
 
 
+async def _autocomplete(
+    client, api_key: str, query: str, lat: float | None, lon: float | None
+) -> list[dict]:
+    url = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
+    logger.debug("google autocomplete request", extra={"url": url, "query": query})
+    params = {
+        "input": query,
+        "key": api_key,
+        "components": "country:AU",
+        "types": "address",
+    }
+    if lat is not None and lon is not None:
+        params.update({"location": f"{lat},{lon}", "radius": 50000})
+    res = await client.get(url, params=params)
+    res.raise_for_status()
+    return res.json().get("predictions", [])
+
+
+async def _place_details(client, api_key: str, place_id: str) -> dict:
+    stored = await place_store.get_place(place_id)
+    if stored is not None:
+        return stored
+    url = "https://maps.googleapis.com/maps/api/place/details/json"
+    params = {
+        "place_id": place_id,
+        "key": api_key,
+        "fields": "place_id,name,formatted_address,geometry/location",
+    }
+    logger.debug(
+        "google place details request", extra={"url": url, "place_id": place_id}
+    )
+    async with _details_semaphore():
+        res = await client.get(url, params=params)
+    res.raise_for_status()
+    det = res.json().get("result", {})
+    location = det.get("geometry", {}).get("location", {})
+    place = {
+        "name": det.get("name"),
+        "address": det.get("formatted_address"),
+        "lat": location.get("lat"),
+        "lng": location.get("lng"),
+        "place_id": det.get("place_id"),
+    }
+    await place_store.put_place(place)
+    return place
+
+
 async def search_geocode(
     query: str, limit: int = 5, lat: float | None = None, lon: float | None = None
 ) -> list[dict]:
@@ -98,70 +170,81 @@ async def search_geocode(
 
     Returns dictionaries containing ``name``, ``address``, ``lat``, ``lng`` and
     ``place_id`` for each suggestion.
+
+    Airports and admin landmarks that match confidently come from
+    :mod:`app.services.gazetteer` and are listed ahead of Google's results.
+    Google is skipped only when the query names one of them outright
+    (:meth:`~app.services.gazetteer.Gazetteer.is_exact`), and its failures
+    are tolerated when there are local matches to return.
+
+    Predictions are cached per normalised query and (rounded) location bias,
+    details per ``place_id``, and identical in-flight lookups are shared; see
+    :mod:`app.services.geocode_cache`. Details for the predictions are
+    fetched concurrently, and resolved places are kept in
+    :mod:`app.services.place_store` across restarts.
     """
 
     logger.info("search geocode", extra={"query": query, "limit": limit})
+    local = gazetteer.search(query, limit)
+    remote: list[dict] = []
+    if not (local and gazetteer.is_exact(query)):
+        try:
+            remote = await _search_google(query, limit, lat, lon)
+        except Exception:
+            if not local:
+                raise
+            logger.warning(
+                "google search failed; returning gazetteer matches",
+                extra={"query": query},
+                exc_info=True,
+            )
+
+    if lat is not None and lon is not None:
+        # Nearest first within each source; local matches stay ahead.
+        for group in (local, remote):
+            for r in group:
+                if r.get("lat") is not None and r.get("lng") is not None:
+                    r["_distance"] = _haversine_distance(lat, lon, r["lat"], r["lng"])
+            group.sort(key=lambda r: r.get("_distance", float("inf")))
+            for r in group:
+                r.pop("_distance", None)
+
+    seen = {r["place_id"] for r in local}
+    results = local + [r for r in remote if r.get("place_id") not in seen]
+    results = results[:limit]
+    if not results:
+        logger.warning("no geocoding results", extra={"query": query})
+    return results
+
+
+async def _search_google(
+    query: str, limit: int, lat: float | None, lon: float | None
+) -> list[dict]:
     settings = get_settings()
     api_key = settings.google_maps_api_key
     if not api_key or api_key == "undefined":
         raise RuntimeError("GOOGLE_MAPS_API_KEY not configured")
 
-    autocomplete_url = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
-    details_url = "https://maps.googleapis.com/maps/api/place/details/json"
-    results: list[dict] = []
-
-    async with httpx.AsyncClient(timeout=10) as client:
-        logger.debug(
-            "google autocomplete request",
-            extra={"url": autocomplete_url, "query": query, "limit": limit},
-        )
-        auto_params = {
-            "input": query,
-            "key": api_key,
-            "components": "country:AU",
-            "types": "address",
-        }
-        if lat is not None and lon is not None:
-            auto_params.update({"location": f"{lat},{lon}", "radius": 50000})
-        auto_res = await client.get(autocomplete_url, params=auto_params)
-        auto_res.raise_for_status()
-        predictions = auto_res.json().get("predictions", [])[:limit]
-
-        for pred in predictions:
-            place_id = pred.get("place_id")
-            if not place_id:
-                continue
-            params = {
-                "place_id": place_id,
-                "key": api_key,
-                "fields": "place_id,name,formatted_address,geometry/location",
-            }
-            logger.debug(
-                "google place details request",
-                extra={"url": details_url, "place_id": place_id},
-            )
-            det_res = await client.get(details_url, params=params)
-            det_res.raise_for_status()
-            det = det_res.json().get("result", {})
-            location = det.get("geometry", {}).get("location", {})
-            results.append(
-                {
-                    "name": det.get("name"),
-                    "address": det.get("formatted_address"),
-                    "lat": location.get("lat"),
-                    "lng": location.get("lng"),
-                    "place_id": det.get("place_id"),
-                }
+    client = get_http_client(GOOGLE_MAPS)
+    has_bias = lat is not None and lon is not None
+    # The bias radius is 50 km, so ~1 km of rounding does not change results.
+    auto_key = (
+        " ".join(query.lower().split()),
+        round(lat, 2) if has_bias else None,
+        round(lon, 2) if has_bias else None,
+    )
+    predictions = await autocomplete_cache.get_or_load(
+        auto_key, lambda: _autocomplete(client, api_key, query, lat, lon)
+    )
+    place_ids = [p["place_id"] for p in predictions[:limit] if p.get("place_id")]
+    details = await asyncio.gather(
+        *(
+            place_details_cache.get_or_load(
+                place_id,
+                lambda place_id=place_id: _place_details(client, api_key, place_id),
             )
-
-    if lat is not None and lon is not None and results:
-        for r in results:
-            if r.get("lat") is not None and r.get("lng") is not None:
-                r["_distance"] = _haversine_distance(lat, lon, r["lat"], r["lng"])
-        results.sort(key=lambda r: r.get("_distance", float("inf")))
-        for r in results:
-            r.pop("_distance", None)
-
-    if not results:
-        logger.warning("no geocoding results", extra={"query": query})
-    return results
+            for place_id in place_ids
+        )
+    )
+    # Cached dicts are shared between requests; hand out copies.
+    return [dict(d) for d in details]
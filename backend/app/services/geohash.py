@@ -0,0 +1,67 @@
+"""Minimal geohash encoder used to quantise coordinates for cache keys."""
+
+from __future__ import annotations
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat: float, lng: float, precision: int = 7) -> str:
+    """Return the geohash of ``(lat, lng)`` with ``precision`` characters.
+
+    Precision 6 covers roughly 1.2 km x 0.6 km, precision 7 about
+    150 m x 150 m.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: list[str] = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """Return the ``(lat, lng)`` size in degrees of a cell at ``precision``."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def neighbours(lat: float, lng: float, precision: int = 7) -> list[str]:
+    """Return the cell containing ``(lat, lng)`` followed by the cells around it."""
+    dlat, dlng = cell_size(precision)
+    cells = [encode(lat, lng, precision)]
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            if i == 0 and j == 0:
+                continue
+            cell = encode(
+                max(-90.0, min(89.999999, lat + i * dlat)),
+                (lng + j * dlng + 180.0) % 360.0 - 180.0,
+                precision,
+            )
+            if cell not in cells:
+                cells.append(cell)
+    return cells
@@ -0,0 +1,68 @@
+"""Compact binary encoding of driver location frames.
+
+By default location frames are JSON text, e.g.
+``{"lat": -27.4698, "lng": 153.0251, "ts": 1700000000.0, "speed": 12.5}``
+(about 70 bytes). A client that offers the :data:`SUBPROTOCOL` websocket
+subprotocol may instead send and receive them as binary messages with a
+fixed 20-byte little-endian layout:
+
+======  =======  ==============================================
+offset  type     field
+======  =======  ==============================================
+0       float64  ``ts``, seconds since the epoch
+8       int32    ``lat``, in 1e-7 degrees (about 1 cm)
+12      int32    ``lng``, in 1e-7 degrees
+16      float32  ``speed`` in m/s, NaN when unknown
+======  =======  ==============================================
+
+Every other message (status changes, fares, snapshots) stays JSON text on
+both protocols, and clients that do not offer the subprotocol keep getting
+JSON only.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from typing import Any, Optional
+
+from starlette.websockets import WebSocket
+
+SUBPROTOCOL = "location.v1"
+FRAME = struct.Struct("<diif")
+COORD_SCALE = 1e7
+
+
+def negotiate(websocket: WebSocket) -> Optional[str]:
+    """Return :data:`SUBPROTOCOL` when the client offered it, else ``None``."""
+    offered = websocket.scope.get("subprotocols", ())
+    return SUBPROTOCOL if SUBPROTOCOL in offered else None
+
+
+def encode(payload: dict[str, Any]) -> Optional[bytes]:
+    """Return the binary frame for a JSON position, or ``None`` if it has none."""
+    speed = payload.get("speed")
+    try:
+        return FRAME.pack(
+            float(payload["ts"]),
+            round(payload["lat"] * COORD_SCALE),
+            round(payload["lng"] * COORD_SCALE),
+            math.nan if speed is None else speed,
+        )
+    except (KeyError, TypeError, ValueError, OverflowError, struct.error):
+        return None
+
+
+def decode(data: bytes) -> Optional[dict[str, Any]]:
+    """Return the frame as the JSON payload it stands for, or ``None``."""
+    if len(data) != FRAME.size:
+        return None
+    ts, lat, lng, speed = FRAME.unpack(data)
+    payload: dict[str, Any] = {
+        "lat": lat / COORD_SCALE,
+        "lng": lng / COORD_SCALE,
+        "ts": ts,
+    }
+    if not math.isnan(speed):
+        payload["speed"] = round(speed, 2)
+    return payload
@@ -1,20 +1,31 @@
-"""Notification helper service."""
+"""Notification helper service.
+
+Notifications are written to the ``notifications`` table in the caller's
+transaction and double as an outbox: :class:`NotificationDispatcher` picks
+up ``PENDING`` rows once the transaction commits, sends them to OneSignal
+with one request per group of recipients sharing a message, and records
+the outcome on each row. Failed sends are retried with exponential backoff,
+and rows left behind by a restart are delivered on the next start.
+"""
 
 import asyncio
 import json
 import logging
+import time
 import uuid
-from datetime import datetime, timezone
-from typing import Any, Callable
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
 
 import httpx
-from sqlalchemy import event
+from sqlalchemy import event, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
+from app.core.http import ONESIGNAL, get_http_client
 from app.db.database import AsyncSessionLocal
-from app.models.notification import Notification, NotificationType
+from app.models.notification import Notification, NotificationStatus, NotificationType
 from app.models.user_v2 import User as UserV2
 from app.models.user_v2 import UserRole
 
@@ -96,169 +107,383 @@ async def create_notification(
     )
     db.add(note)
     await db.flush()
-    _queue_dispatch_after_commit(
-        db,
-        to_user_id=to_user_id,
-        to_role=to_role,
-        notif_type=notif_type,
-        payload=payload_data,
-    )
+    _queue_dispatch_after_commit(db, note.id)
     return note
 
 
-async def dispatch_notification(
-    db: async_sessionmaker[AsyncSession],
-    to_user_id: uuid.UUID,
-    to_role: UserRole,
-    notif_type: NotificationType,
-    payload: dict[str, Any] | None = None,
-) -> None:
-    async with db() as session:
-        await _send_onesignal(session, to_user_id, to_role, notif_type, payload or {})
+def _onesignal_message(
+    player_ids: list[str], notif_type: NotificationType, payload: dict[str, Any]
+) -> dict[str, Any]:
+    settings = get_settings()
+    data = {"type": notif_type.value}
+    for k, v in payload.items():
+        data[k] = json.dumps(v) if not isinstance(v, str) else v
+
+    message: dict[str, Any] = {
+        "app_id": settings.onesignal_app_id,
+        "include_player_ids": player_ids,
+        "data": data,
+    }
+    notification = notification_map.get(notif_type)
+    if notification:
+        message["headings"] = {"en": str(notification.get("headings", ""))}
+        message["contents"] = {"en": str(notification.get("contents", ""))}
+    return message
 
 
 async def _send_onesignal(
-    db: AsyncSession,
-    to_user_id: uuid.UUID,
-    to_role: UserRole,
+    player_ids: list[str],
     notif_type: NotificationType,
     payload: dict[str, Any],
-) -> None:
-    """Send a OneSignal push if credentials are configured.
+) -> dict[str, Any]:
+    """Send one OneSignal push to ``player_ids`` and return the response body.
 
-    The function safely no-ops when required settings are missing or when the HTTP
-    request fails. Messages are delivered to each stored player ID for the target
-    role.
+    Raises ``httpx.HTTPError`` when the request fails.
     """
 
     settings = get_settings()
-    if not (settings.onesignal_app_id and settings.onesignal_api_key):
-        logger.warning(
-            "OneSignal disabled",
-            extra={
-                "onesignal_app_id": settings.onesignal_app_id,
-                "has_onesignal_api_key": bool(settings.onesignal_api_key),
-            },
-        )
-        return
+    message = _onesignal_message(player_ids, notif_type, payload)
+    client = get_http_client(ONESIGNAL)
+    response = await client.post(
+        "https://onesignal.com/api/v1/notifications",
+        headers={"Authorization": f"Basic {settings.onesignal_api_key}"},
+        json=message,
+    )
+    logger.info(
+        "OneSignal request",
+        extra={
+            "player_ids": player_ids,
+            "payload": message["data"],
+            "status_code": response.status_code,
+        },
+    )
+    response.raise_for_status()
+    body = response.json()
+    logger.info(
+        "OneSignal response",
+        extra={
+            "player_ids": player_ids,
+            "status_code": response.status_code,
+            "response": body,
+        },
+    )
+    return body if isinstance(body, dict) else {}
 
-    data = {"type": notif_type.value}
-    for k, v in payload.items():
-        data[k] = json.dumps(v) if not isinstance(v, str) else v
 
-    notification = notification_map.get(notif_type)
+def _is_retryable(exc: httpx.HTTPError) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return True
 
-    user = await db.get(UserV2, to_user_id)
-    if not user:
-        logger.info(
-            "Notification recipient missing",
-            extra={
-                "to_user_id": str(to_user_id),
-                "role": to_role.value,
-                "type": notif_type.value,
-            },
-        )
-        return
-
-    if user.role is not to_role:
-        logger.warning(
-            "Notification recipient role mismatch",
-            extra={
-                "to_user_id": str(to_user_id),
-                "expected_role": to_role.value,
-                "actual_role": user.role.value,
-            },
-        )
 
-    player_id = user.onesignal_player_id
-    if not player_id:
-        logger.info(
-            "Notification recipient missing OneSignal ID",
-            extra={
-                "to_user_id": str(to_user_id),
-                "role": to_role.value,
-                "type": notif_type.value,
-            },
-        )
-        return
+class NotificationDispatcher:
+    """Deliver pending outbox rows to OneSignal with bounded concurrency."""
 
-    message: dict[str, Any] = {
-        "app_id": settings.onesignal_app_id,
-        "include_player_ids": [player_id],
-        "data": data,
-    }
-    if notification:
-        message["headings"] = {"en": str(notification.get("headings", ""))}
-        message["contents"] = {"en": str(notification.get("contents", ""))}
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        workers: int = 4,
+        batch_size: int = 500,
+        max_attempts: int = 5,
+        retry_base_s: float = 5.0,
+        retry_max_s: float = 600.0,
+        poll_interval_s: float = 30.0,
+        drain_timeout_s: float = 10.0,
+        lease_s: float = 60.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.poll_interval_s = poll_interval_s
+        self.drain_timeout_s = drain_timeout_s
+        self.lease_s = lease_s
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._counts = {
+            NotificationStatus.SENT: 0,
+            NotificationStatus.SKIPPED: 0,
+            NotificationStatus.FAILED: 0,
+        }
+        self._retries = 0
+        self._requests = 0
+        self._last_run_ms = 0.0
+
+    def submit(self, notification_id: uuid.UUID) -> None:
+        """Signal that ``notification_id`` has been committed and is pending.
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://onesignal.com/api/v1/notifications",
-                headers={"Authorization": f"Basic {settings.onesignal_api_key}"},
-                json=message,
+        The row itself is the queue entry, so this only wakes the dispatch
+        loop; a notification submitted while the loop is stopped is sent
+        once it starts.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_once(self) -> int:
+        """Send every due notification and return how many were processed."""
+        started = time.perf_counter()
+        processed = 0
+        limit = self.batch_size * self.workers
+        while True:
+            rows = await self._claim(limit)
+            if rows:
+                await self._deliver(rows)
+                processed += len(rows)
+            if len(rows) < limit:
+                break
+        self._last_run_ms = (time.perf_counter() - started) * 1000
+        if processed:
+            logger.debug(
+                "notifications dispatched",
+                extra={"processed": processed, "run_ms": round(self._last_run_ms, 2)},
             )
-            logger.info(
-                "OneSignal request",
-                extra={
-                    "player_ids": [player_id],
-                    "payload": data,
-                    "request_payload": message,
-                    "status_code": response.status_code,
-                },
+        return processed
+
+    def start(self) -> None:
+        """Start the dispatch loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._wakeup.set()  # deliver rows left over from the last run
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Send what is due, then stop; anything unsent stays pending."""
+        if self._task is None:
+            return
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.drain_timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning("notification drain timed out")
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+    def stats(self) -> dict[str, Any]:
+        """Return delivery counters."""
+        return {
+            "sent": self._counts[NotificationStatus.SENT],
+            "skipped": self._counts[NotificationStatus.SKIPPED],
+            "failed": self._counts[NotificationStatus.FAILED],
+            "retries": self._retries,
+            "requests": self._requests,
+            "last_run_ms": round(self._last_run_ms, 2),
+        }
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval_s
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("notification dispatch failed")
+            if self._stopping:
+                return
+
+    async def _claim(self, limit: int) -> list[tuple[Notification, Optional[UserV2]]]:
+        """Lease up to ``limit`` due rows so no other worker sends them."""
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=self.lease_s)
+        due = or_(
+            Notification.next_attempt_at.is_(None),
+            Notification.next_attempt_at <= now,
+        )
+        async with self._session_factory() as db:
+            ids = (
+                await db.execute(
+                    select(Notification.id)
+                    .where(Notification.delivery_status == NotificationStatus.PENDING)
+                    .where(due)
+                    .order_by(Notification.created_at)
+                    .limit(limit)
+                )
+            ).scalars().all()
+            if not ids:
+                return []
+            await db.execute(
+                update(Notification)
+                .where(Notification.id.in_(ids))
+                .where(Notification.delivery_status == NotificationStatus.PENDING)
+                .where(due)
+                .values(
+                    next_attempt_at=lease_until,
+                    attempts=Notification.attempts + 1,
+                )
             )
-            response.raise_for_status()
-            logger.info(
-                "OneSignal response",
+            await db.commit()
+            result = await db.execute(
+                select(Notification, UserV2)
+                .outerjoin(UserV2, UserV2.id == Notification.to_user_id)
+                .where(Notification.id.in_(ids))
+                .where(Notification.next_attempt_at == lease_until)
+            )
+            return [(note, user) for note, user in result.all()]
+
+    async def _deliver(self, rows: list[tuple[Notification, Optional[UserV2]]]) -> None:
+        settings = get_settings()
+        outcomes: dict[uuid.UUID, tuple[NotificationStatus, Optional[str]]] = {}
+        if not (settings.onesignal_app_id and settings.onesignal_api_key):
+            logger.warning(
+                "OneSignal disabled",
                 extra={
-                    "player_ids": [player_id],
-                    "payload": data,
-                    "request_payload": message,
-                    "status_code": response.status_code,
-                    "response": response.json(),
+                    "onesignal_app_id": settings.onesignal_app_id,
+                    "has_onesignal_api_key": bool(settings.onesignal_api_key),
+                    "notifications": len(rows),
                 },
             )
-    except httpx.HTTPError as exc:
-        status_code = getattr(getattr(exc, "response", None), "status_code", None)
-        logger.exception(
-            "OneSignal send failed",
-            extra={
-                "player_ids": [player_id] if player_id else [],
-                "payload": data,
-                "request_payload": message,
-                "status_code": status_code,
-                "error": str(exc),
-            },
+            for note, _ in rows:
+                outcomes[note.id] = (NotificationStatus.SKIPPED, "onesignal disabled")
+            await self._record(rows, outcomes)
+            return
+
+        groups: dict[tuple[NotificationType, str], list[tuple[uuid.UUID, str]]]
+        groups = defaultdict(list)
+        payloads: dict[tuple[NotificationType, str], dict[str, Any]] = {}
+        for note, user in rows:
+            if user is None:
+                logger.info(
+                    "Notification recipient missing",
+                    extra={"to_user_id": str(note.to_user_id), "type": note.type.value},
+                )
+                outcomes[note.id] = (NotificationStatus.SKIPPED, "recipient missing")
+                continue
+            if user.role.value != note.to_role.value:
+                logger.warning(
+                    "Notification recipient role mismatch",
+                    extra={
+                        "to_user_id": str(note.to_user_id),
+                        "expected_role": note.to_role.value,
+                        "actual_role": user.role.value,
+                    },
+                )
+            if not user.onesignal_player_id:
+                logger.info(
+                    "Notification recipient missing OneSignal ID",
+                    extra={"to_user_id": str(note.to_user_id), "type": note.type.value},
+                )
+                outcomes[note.id] = (NotificationStatus.SKIPPED, "no player id")
+                continue
+            payload = note.payload or {}
+            key = (note.type, json.dumps(payload, sort_keys=True, default=str))
+            groups[key].append((note.id, user.onesignal_player_id))
+            payloads[key] = payload
+
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def _send(
+            notif_type: NotificationType,
+            payload: dict[str, Any],
+            batch: list[tuple[uuid.UUID, str]],
+        ) -> None:
+            player_ids = list(dict.fromkeys(player_id for _, player_id in batch))
+            async with semaphore:
+                self._requests += 1
+                try:
+                    body = await _send_onesignal(player_ids, notif_type, payload)
+                except httpx.HTTPError as exc:
+                    logger.warning(
+                        "OneSignal send failed",
+                        extra={"player_ids": player_ids, "error": str(exc)},
+                    )
+                    status = (
+                        NotificationStatus.PENDING
+                        if _is_retryable(exc)
+                        else NotificationStatus.FAILED
+                    )
+                    for note_id, _ in batch:
+                        outcomes[note_id] = (status, str(exc)[:255])
+                    return
+            errors = body.get("errors")
+            invalid = set(
+                errors.get("invalid_player_ids", []) if isinstance(errors, dict) else []
+            )
+            for note_id, player_id in batch:
+                outcomes[note_id] = (
+                    (NotificationStatus.SKIPPED, "invalid player id")
+                    if player_id in invalid
+                    else (NotificationStatus.SENT, None)
+                )
+
+        results = await asyncio.gather(
+            *(
+                _send(key[0], payloads[key], members[i : i + self.batch_size])
+                for key, members in groups.items()
+                for i in range(0, len(members), self.batch_size)
+            ),
+            return_exceptions=True,
         )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("OneSignal batch failed", exc_info=result)
+        await self._record(rows, outcomes)
 
+    async def _record(
+        self,
+        rows: list[tuple[Notification, Optional[UserV2]]],
+        outcomes: dict[uuid.UUID, tuple[NotificationStatus, Optional[str]]],
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        async with self._session_factory() as db:
+            for note, _ in rows:
+                # Batches that raised unexpectedly are retried like send errors.
+                status, error = outcomes.get(
+                    note.id, (NotificationStatus.PENDING, "dispatch error")
+                )
+                values: dict[str, Any] = {"last_error": error}
+                if status is NotificationStatus.PENDING:
+                    if note.attempts >= self.max_attempts:
+                        status = NotificationStatus.FAILED
+                    else:
+                        delay = min(
+                            self.retry_max_s,
+                            self.retry_base_s * 2 ** (note.attempts - 1),
+                        )
+                        values["next_attempt_at"] = now + timedelta(seconds=delay)
+                        self._retries += 1
+                if status is not NotificationStatus.PENDING:
+                    values["next_attempt_at"] = None
+                    self._counts[status] += 1
+                if status is NotificationStatus.SENT:
+                    values["sent_at"] = now
+                await db.execute(
+                    update(Notification)
+                    .where(Notification.id == note.id)
+                    .values(delivery_status=status, **values)
+                )
+            await db.commit()
 
-def _queue_dispatch_after_commit(
-    db: AsyncSession,
-    *,
-    to_user_id: uuid.UUID,
-    to_role: UserRole,
-    notif_type: NotificationType,
-    payload: dict[str, Any],
-) -> None:
+
+def _queue_dispatch_after_commit(db: AsyncSession, notification_id: uuid.UUID) -> None:
     sync_session = db.sync_session
     queue: list[Callable[[], None]] = sync_session.info.setdefault(
         _DISPATCH_QUEUE_KEY, []
     )
+    queue.append(lambda: notification_dispatcher.submit(notification_id))
 
-    def _schedule() -> None:
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:  # pragma: no cover - loop missing (shouldn't happen)
-            logger.exception("No running event loop to dispatch notification")
-            return
-        loop.create_task(
-            dispatch_notification(
-                AsyncSessionLocal,
-                to_user_id=to_user_id,
-                to_role=to_role,
-                notif_type=notif_type,
-                payload=dict(payload),
-            )
-        )
 
-    queue.append(_schedule)
+_settings = get_settings()
+notification_dispatcher = NotificationDispatcher(
+    workers=_settings.notification_workers,
+    batch_size=_settings.notification_batch_size,
+    max_attempts=_settings.notification_max_attempts,
+    retry_base_s=_settings.notification_retry_base_s,
+    retry_max_s=_settings.notification_retry_max_s,
+    poll_interval_s=_settings.notification_poll_interval_s,
+    drain_timeout_s=_settings.notification_drain_timeout_s,
+)
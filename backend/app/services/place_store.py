@@ -0,0 +1,207 @@
+"""Persistent store of resolved places and reverse-geocode labels.
+
+Place Details for a ``place_id`` and the address at a given spot almost
+never change, so once Google or OpenRouteService has answered, the result
+is written to the ``places`` and ``reverse_geocodes`` tables and served
+from there on.
+
+Reverse-geocode labels are bucketed by geohash cell (``precision`` 7 is
+roughly 150 m square). A lookup loads the cell containing the point and
+its eight neighbours, once per process, and returns the label of the
+nearest stored point within ``match_radius_m``. Popular pickup spots such
+as airports and hotels are then answered from memory. Labels are stored at
+coordinates rounded to ``LABEL_DIGITS`` decimals (about 1 m) and upserted,
+so resolving the same spot again replaces its row instead of adding one.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.models.place import Place, ReverseGeocode
+from app.services import geohash
+from app.services.trip_metrics import point_distance_m
+
+logger = logging.getLogger(__name__)
+
+_PLACE_FIELDS = ("place_id", "name", "address", "lat", "lng")
+LABEL_DIGITS = 5
+
+
+class PlaceStore:
+    """Place details by id and address labels by nearest stored point."""
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        *,
+        precision: int = 7,
+        match_radius_m: float = 40.0,
+        max_places: int = 20000,
+        max_cells: int = 20000,
+    ) -> None:
+        self._session_factory = session_factory
+        self.precision = precision
+        self.match_radius_m = match_radius_m
+        self.max_places = max_places
+        self.max_cells = max_cells
+        self._places: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._cells: OrderedDict[str, list[tuple[float, float, str]]] = OrderedDict()
+        self._place_hits = 0
+        self._place_misses = 0
+        self._label_hits = 0
+        self._label_misses = 0
+
+    async def get_place(self, place_id: str) -> Optional[dict[str, Any]]:
+        """Return stored details for ``place_id`` or ``None``."""
+        place = self._places.get(place_id)
+        if place is None and self._session_factory is not None:
+            try:
+                async with self._session_factory() as db:
+                    row = await db.get(Place, place_id)
+            except Exception:
+                logger.exception("place lookup failed", extra={"place_id": place_id})
+                row = None
+            if row is not None:
+                place = {field: getattr(row, field) for field in _PLACE_FIELDS}
+                self._remember_place(place)
+        if place is None:
+            self._place_misses += 1
+            return None
+        self._places.move_to_end(place_id)
+        self._place_hits += 1
+        return place
+
+    async def put_place(self, place: dict[str, Any]) -> None:
+        """Store details as returned by :func:`geocode_service._place_details`."""
+        if not place.get("place_id"):
+            return
+        place = {field: place.get(field) for field in _PLACE_FIELDS}
+        self._remember_place(place)
+        if self._session_factory is None:
+            return
+        try:
+            async with self._session_factory() as db:
+                await db.merge(Place(**place))
+                await db.commit()
+        except Exception:
+            logger.exception(
+                "place write failed", extra={"place_id": place["place_id"]}
+            )
+
+    async def nearest_label(self, lat: float, lng: float) -> Optional[str]:
+        """Return the label stored nearest to ``(lat, lng)`` within the radius."""
+        cells = geohash.neighbours(lat, lng, self.precision)
+        missing = [cell for cell in cells if cell not in self._cells]
+        if missing:
+            await self._load_cells(missing)
+        best: Optional[str] = None
+        best_m = self.match_radius_m
+        for cell in cells:
+            entries = self._cells.get(cell, ())
+            if entries:
+                self._cells.move_to_end(cell)
+            for p_lat, p_lng, label in entries:
+                distance = point_distance_m(lat, lng, p_lat, p_lng)
+                if distance <= best_m:
+                    best, best_m = label, distance
+        if best is None:
+            self._label_misses += 1
+        else:
+            self._label_hits += 1
+        return best
+
+    async def put_label(self, lat: float, lng: float, label: str) -> None:
+        """Record the address label resolved for ``(lat, lng)``."""
+        lat, lng = round(lat, LABEL_DIGITS), round(lng, LABEL_DIGITS)
+        cell = geohash.encode(lat, lng, self.precision)
+        if cell in self._cells:
+            entries = self._cells[cell]
+            entries[:] = [e for e in entries if (e[0], e[1]) != (lat, lng)]
+            entries.append((lat, lng, label))
+        if self._session_factory is None:
+            if cell not in self._cells:
+                self._remember_cell(cell, [(lat, lng, label)])
+            return
+        try:
+            async with self._session_factory() as db:
+                dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+                stmt = dialect.insert(ReverseGeocode).values(
+                    cell=cell, lat=lat, lng=lng, label=label
+                )
+                await db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["cell", "lat", "lng"],
+                        set_={"label": stmt.excluded.label, "updated_at": func.now()},
+                    )
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("reverse geocode write failed", extra={"cell": cell})
+
+    def clear(self) -> None:
+        self._places.clear()
+        self._cells.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "places": len(self._places),
+            "cells": len(self._cells),
+            "place_hits": self._place_hits,
+            "place_misses": self._place_misses,
+            "label_hits": self._label_hits,
+            "label_misses": self._label_misses,
+        }
+
+    async def _load_cells(self, cells: list[str]) -> None:
+        loaded: dict[str, list[tuple[float, float, str]]] = {cell: [] for cell in cells}
+        if self._session_factory is not None:
+            try:
+                async with self._session_factory() as db:
+                    rows = (
+                        await db.execute(
+                            select(
+                                ReverseGeocode.cell,
+                                ReverseGeocode.lat,
+                                ReverseGeocode.lng,
+                                ReverseGeocode.label,
+                            ).where(ReverseGeocode.cell.in_(cells))
+                        )
+                    ).all()
+            except Exception:
+                logger.exception("reverse geocode lookup failed")
+                return
+            for cell, p_lat, p_lng, label in rows:
+                loaded[cell].append((p_lat, p_lng, label))
+        for cell, entries in loaded.items():
+            self._remember_cell(cell, entries)
+
+    def _remember_place(self, place: dict[str, Any]) -> None:
+        self._places[place["place_id"]] = place
+        self._places.move_to_end(place["place_id"])
+        while len(self._places) > self.max_places:
+            self._places.popitem(last=False)
+
+    def _remember_cell(
+        self, cell: str, entries: list[tuple[float, float, str]]
+    ) -> None:
+        self._cells[cell] = entries
+        self._cells.move_to_end(cell)
+        while len(self._cells) > self.max_cells:
+            self._cells.popitem(last=False)
+
+
+_settings = get_settings()
+place_store = PlaceStore(
+    AsyncSessionLocal if _settings.place_store_persist else None,
+    precision=_settings.reverse_geocode_precision,
+    match_radius_m=_settings.reverse_geocode_match_m,
+)
@@ -0,0 +1,150 @@
+"""Short-lived cache of verified tokens and the users they belong to.
+
+Every authenticated request and websocket handshake decodes its JWT and
+loads the ``users_v2`` row. Both results are cached for ``ttl_s``:
+
+* decoded claims keyed by the raw token, never kept past the token's own
+  ``exp``;
+* a snapshot of the user's column values keyed by user id. A hit is merged
+  into the caller's session with ``load=False``, so handlers still get a
+  session-bound :class:`User` they can modify, without a ``SELECT``.
+
+Snapshots are dropped once a transaction that updated or deleted the user
+commits, whichever code path made the change (``update_user``,
+``delete_user``, saving a payment method, ...).
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from jose import jwt
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import get_settings
+from app.models.user_v2 import User
+
+_CHANGED_KEY = "principal_cache_changed"
+_COLUMNS = tuple(attr.key for attr in User.__mapper__.column_attrs)
+
+
+class PrincipalCache:
+    """LRU/TTL cache of decoded tokens and user snapshots."""
+
+    def __init__(self, *, ttl_s: float = 30.0, max_entries: int = 10000) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._tokens: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._users: OrderedDict[uuid.UUID, tuple[dict[str, Any], float]] = (
+            OrderedDict()
+        )
+        self._token_hits = 0
+        self._token_misses = 0
+        self._user_hits = 0
+        self._user_misses = 0
+        self._invalidations = 0
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Return the token's claims; raises :class:`jose.JWTError` if invalid."""
+        now = time.time()
+        entry = self._tokens.get(token)
+        if entry is not None and entry[1] > now:
+            self._tokens.move_to_end(token)
+            self._token_hits += 1
+            return entry[0]
+        self._token_misses += 1
+        settings = get_settings()
+        payload = jwt.decode(
+            token,
+            settings.jwt_secret_key,
+            algorithms=[settings.jwt_algorithm],
+            options={"verify_sub": False},
+        )
+        expires = now + self.ttl_s
+        if isinstance(payload.get("exp"), (int, float)):
+            expires = min(expires, payload["exp"])
+        self._store(self._tokens, token, payload, expires)
+        return payload
+
+    async def load_user(self, db: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
+        """Return the user bound to ``db``, from the snapshot when fresh."""
+        entry = self._users.get(user_id)
+        if entry is not None and entry[1] > time.time():
+            self._users.move_to_end(user_id)
+            self._user_hits += 1
+            user = User(**entry[0])
+            make_transient_to_detached(user)
+            return await db.merge(user, load=False)
+        self._user_misses += 1
+        user = await db.get(User, user_id)
+        if user is not None:
+            snapshot = {key: getattr(user, key) for key in _COLUMNS}
+            self._store(self._users, user_id, snapshot, time.time() + self.ttl_s)
+        return user
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        if self._users.pop(user_id, None) is not None:
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache sizes and hit rates."""
+        token_lookups = self._token_hits + self._token_misses
+        user_lookups = self._user_hits + self._user_misses
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "token_hit_rate": (
+                round(self._token_hits / token_lookups, 3) if token_lookups else 0.0
+            ),
+            "user_hit_rate": (
+                round(self._user_hits / user_lookups, 3) if user_lookups else 0.0
+            ),
+            "invalidations": self._invalidations,
+        }
+
+    def _store(
+        self, entries: OrderedDict, key: Any, value: Any, expires: float
+    ) -> None:
+        entries[key] = (value, expires)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_user_changes(session: Session, flush_context) -> None:
+    changed = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    changed.update(
+        obj.id
+        for obj in session.dirty
+        if isinstance(obj, User) and session.is_modified(obj)
+    )
+    if changed:
+        session.info.setdefault(_CHANGED_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+_settings = get_settings()
+principal_cache = PrincipalCache(
+    ttl_s=_settings.principal_cache_ttl_s,
+    max_entries=_settings.principal_cache_max_entries,
+)
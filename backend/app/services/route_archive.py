@@ -0,0 +1,354 @@
+"""Compaction of recorded routes for completed trips.
+
+``route_points`` keeps one row per GPS sample (two UUIDs, a timestamp and
+the coordinates), which is what billing needs while a trip is running but
+far more than anything needs afterwards. Once a booking has been completed
+for ``route_compaction_delay_s``, :class:`RouteArchiver` simplifies its
+track and stores it on the :class:`Trip` as two strings:
+
+* ``route_polyline`` - a standard Google encoded polyline (1e-5 degrees),
+  usable directly by map widgets;
+* ``route_offsets`` - seconds since ``Trip.started_at`` for each point,
+  delta-encoded with the same variable-length scheme.
+
+The raw points are then deleted. A trip whose compaction fails is retried
+after another ``route_compaction_delay_s``, at most
+``route_compaction_max_attempts`` times. Simplification is Douglas-Peucker with
+``tolerance_m`` as the error bound, plus a point at least every
+``max_gap_s`` so that waits and slow traffic still replay at the right pace.
+
+:func:`iter_track` reads a trip's route back in batches, from the archive
+or, before compaction, by streaming ``route_points`` rows; the ``*_chunks``
+helpers render those batches for the replay endpoint.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal, as_utc
+from app.models.booking import Booking, BookingStatus
+from app.models.route_point import RoutePoint
+from app.models.trip import Trip
+from app.services.trip_metrics import EARTH_RADIUS_M
+
+logger = logging.getLogger(__name__)
+
+POLYLINE_PRECISION = 1e5
+
+
+def encode_deltas(
+    rows: Iterable[Sequence[int]], previous: Optional[Sequence[int]] = None
+) -> str:
+    """Encode integer tuples as deltas with the polyline character scheme.
+
+    ``previous`` is the last row of an earlier chunk when encoding a stream.
+    """
+    chars: list[str] = []
+    for row in rows:
+        for i, value in enumerate(row):
+            delta = value - (previous[i] if previous is not None else 0)
+            delta = ~(delta << 1) if delta < 0 else delta << 1
+            while delta >= 0x20:
+                chars.append(chr((0x20 | (delta & 0x1F)) + 63))
+                delta >>= 5
+            chars.append(chr(delta + 63))
+        previous = row
+    return "".join(chars)
+
+
+def decode_deltas(text: str, dims: int) -> list[tuple[int, ...]]:
+    """Inverse of :func:`encode_deltas`."""
+    values: list[int] = []
+    current = [0] * dims
+    index = 0
+    i = 0
+    while i < len(text):
+        result = shift = 0
+        while True:
+            byte = ord(text[i]) - 63
+            i += 1
+            result |= (byte & 0x1F) << shift
+            shift += 5
+            if byte < 0x20:
+                break
+        current[index] += ~(result >> 1) if result & 1 else result >> 1
+        values.append(current[index])
+        index = (index + 1) % dims
+    return [tuple(values[j : j + dims]) for j in range(0, len(values), dims)]
+
+
+def encode_polyline(lat: Sequence[float], lng: Sequence[float]) -> str:
+    return encode_deltas(
+        (round(a * POLYLINE_PRECISION), round(b * POLYLINE_PRECISION))
+        for a, b in zip(lat, lng)
+    )
+
+
+def decode_polyline(text: str) -> list[tuple[float, float]]:
+    return [
+        (a / POLYLINE_PRECISION, b / POLYLINE_PRECISION)
+        for a, b in decode_deltas(text, 2)
+    ]
+
+
+def simplify(
+    t: np.ndarray,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    *,
+    tolerance_m: float,
+    max_gap_s: float,
+) -> np.ndarray:
+    """Return the indexes of the points to keep, in order."""
+    n = len(t)
+    if n <= 2:
+        return np.arange(n)
+    # Local equirectangular projection; metres are exact enough at trip scale.
+    scale = math.radians(1) * EARTH_RADIUS_M
+    y = (lat - lat[0]) * scale
+    x = (lng - lng[0]) * scale * math.cos(math.radians(float(lat[0])))
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        px, py = x[a + 1 : b], y[a + 1 : b]
+        dx, dy = x[b] - x[a], y[b] - y[a]
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0.0:
+            dist = np.hypot(px - x[a], py - y[a])
+        else:
+            # Distance to the segment, not the infinite line, so a track that
+            # doubles back on itself is kept.
+            u = np.clip(((px - x[a]) * dx + (py - y[a]) * dy) / length_sq, 0, 1)
+            dist = np.hypot(px - (x[a] + u * dx), py - (y[a] + u * dy))
+        worst = int(np.argmax(dist))
+        if dist[worst] > tolerance_m:
+            split = a + 1 + worst
+        elif t[b] - t[a] > max_gap_s:
+            split = int(np.searchsorted(t, (t[a] + t[b]) / 2))
+            split = min(max(split, a + 1), b - 1)
+        else:
+            continue
+        keep[split] = True
+        stack.append((a, split))
+        stack.append((split, b))
+    return np.flatnonzero(keep)
+
+
+def decode_track(trip: Trip) -> tuple[list[datetime], list[float], list[float]]:
+    """Timestamps and coordinates of a compacted trip's route."""
+    points = decode_polyline(trip.route_polyline or "")
+    offsets = [row[0] for row in decode_deltas(trip.route_offsets or "", 1)]
+    started_at = as_utc(trip.started_at)
+    ts = [started_at + timedelta(seconds=s) for s in offsets]
+    return ts, [p[0] for p in points], [p[1] for p in points]
+
+
+Track = list[tuple[datetime, float, float]]
+
+
+async def iter_track(
+    trip: Trip,
+    *,
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    batch_size: int = 1000,
+) -> AsyncIterator[Track]:
+    """Yield ``trip``'s route as batches of ``(ts, lat, lng)``."""
+    if trip.route_polyline is not None:
+        yield list(zip(*decode_track(trip)))
+        return
+    async with session_factory() as db:
+        result = await db.stream(
+            select(RoutePoint.ts, RoutePoint.lat, RoutePoint.lng)
+            .where(RoutePoint.booking_id == trip.booking_id)
+            .order_by(RoutePoint.ts)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield [(as_utc(ts), lat, lng) for ts, lat, lng in rows]
+
+
+async def polyline_chunks(batches: AsyncIterator[Track]) -> AsyncIterator[str]:
+    """Render batches as one continuous encoded polyline."""
+    previous: Optional[tuple[int, int]] = None
+    async for batch in batches:
+        rows = [
+            (round(lat * POLYLINE_PRECISION), round(lng * POLYLINE_PRECISION))
+            for _, lat, lng in batch
+        ]
+        if rows:
+            yield encode_deltas(rows, previous)
+            previous = rows[-1]
+
+
+async def ndjson_chunks(batches: AsyncIterator[Track]) -> AsyncIterator[str]:
+    """Render batches as one ``{"ts", "lat", "lng"}`` object per line."""
+    async for batch in batches:
+        yield "".join(
+            json.dumps(
+                {"ts": ts.isoformat(), "lat": lat, "lng": lng}, separators=(",", ":")
+            )
+            + "\n"
+            for ts, lat, lng in batch
+        )
+
+
+async def route_version(db: AsyncSession, booking_id: uuid.UUID) -> str:
+    """Cheap fingerprint of a trip's raw points, for ETags before compaction."""
+    count, last = (
+        await db.execute(
+            select(func.count(), func.max(RoutePoint.ts)).where(
+                RoutePoint.booking_id == booking_id
+            )
+        )
+    ).one()
+    return f"{count}-{as_utc(last).timestamp():.6f}" if last else "0"
+
+
+class RouteArchiver:
+    """Replace completed trips' route points with a simplified encoding."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        tolerance_m: float = 5.0,
+        max_gap_s: float = 60.0,
+        delay_s: float = 3600.0,
+        batch_size: int = 100,
+        max_attempts: int = 3,
+    ) -> None:
+        self._session_factory = session_factory
+        self.tolerance_m = tolerance_m
+        self.max_gap_s = max_gap_s
+        self.delay_s = delay_s
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._trips = 0
+        self._points_in = 0
+        self._points_out = 0
+        self._errors = 0
+
+    async def compact_trip(self, db: AsyncSession, trip: Trip) -> tuple[int, int]:
+        """Encode ``trip``'s route, delete its points and commit.
+
+        Returns the number of raw and of kept points.
+        """
+        rows = (
+            await db.execute(
+                select(RoutePoint.ts, RoutePoint.lat, RoutePoint.lng)
+                .where(RoutePoint.booking_id == trip.booking_id)
+                .order_by(RoutePoint.ts)
+            )
+        ).all()
+        kept: Sequence[int] = []
+        polyline = offsets = ""
+        if rows:
+            ts, lat, lng = zip(*rows)
+            t = np.fromiter((as_utc(v).timestamp() for v in ts), dtype=float)
+            la = np.asarray(lat, dtype=float)
+            ln = np.asarray(lng, dtype=float)
+            kept = simplify(
+                t, la, ln, tolerance_m=self.tolerance_m, max_gap_s=self.max_gap_s
+            )
+            start = as_utc(trip.started_at).timestamp()
+            polyline = encode_polyline(la[kept], ln[kept])
+            offsets = encode_deltas((round(t[i] - start),) for i in kept)
+        trip.route_polyline = polyline
+        trip.route_offsets = offsets
+        await db.execute(
+            delete(RoutePoint).where(RoutePoint.booking_id == trip.booking_id)
+        )
+        await db.commit()
+        self._trips += 1
+        self._points_in += len(rows)
+        self._points_out += len(kept)
+        return len(rows), len(kept)
+
+    async def run_once(self) -> int:
+        """Compact one batch of eligible trips; return how many were done."""
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.delay_s)
+        async with self._session_factory() as db:
+            trip_ids = (
+                await db.execute(
+                    select(Trip.id)
+                    .join(Booking, Booking.id == Trip.booking_id)
+                    .where(
+                        Booking.status == BookingStatus.COMPLETED,
+                        Trip.route_polyline.is_(None),
+                        Trip.ended_at < cutoff,
+                        Trip.route_compaction_attempts < self.max_attempts,
+                        or_(
+                            Trip.route_compaction_failed_at.is_(None),
+                            Trip.route_compaction_failed_at < cutoff,
+                        ),
+                    )
+                    .order_by(Trip.ended_at)
+                    .limit(self.batch_size)
+                )
+            ).scalars().all()
+        done = 0
+        for trip_id in trip_ids:
+            # One session per trip, so a failure only loses that trip.
+            async with self._session_factory() as db:
+                trip = await db.get(Trip, trip_id)
+                try:
+                    raw, kept = await self.compact_trip(db, trip)
+                except Exception:
+                    self._errors += 1
+                    logger.exception(
+                        "route compaction failed", extra={"trip_id": str(trip_id)}
+                    )
+                    await db.rollback()
+                    await db.execute(
+                        update(Trip)
+                        .where(Trip.id == trip_id)
+                        .values(
+                            route_compaction_attempts=(
+                                Trip.route_compaction_attempts + 1
+                            ),
+                            route_compaction_failed_at=now,
+                        )
+                    )
+                    await db.commit()
+                    continue
+            done += 1
+            logger.debug(
+                "route compacted",
+                extra={"trip_id": str(trip_id), "points": raw, "kept": kept},
+            )
+        return done
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "trips": self._trips,
+            "points_in": self._points_in,
+            "points_out": self._points_out,
+            "errors": self._errors,
+        }
+
+
+_settings = get_settings()
+route_archiver = RouteArchiver(
+    tolerance_m=_settings.route_compaction_tolerance_m,
+    max_gap_s=_settings.route_compaction_max_gap_s,
+    delay_s=_settings.route_compaction_delay_s,
+    batch_size=_settings.route_compaction_batch_size,
+    max_attempts=_settings.route_compaction_max_attempts,
+)
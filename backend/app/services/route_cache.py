@@ -0,0 +1,181 @@
+"""Cache for Directions route estimates.
+
+Booking creation, leave-time scheduling and the driver booking list all ask
+for the same driver-base to pickup routes over and over. Estimates are keyed
+on the geohash of the origin and destination plus a departure-time bucket,
+kept in an in-memory LRU with a TTL and, optionally, written through to the
+``route_estimates`` table so warm entries survive restarts.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal, as_utc
+from app.models.route_estimate import RouteEstimate
+from app.services import geohash
+
+logger = logging.getLogger(__name__)
+
+
+class RouteCache:
+    """LRU/TTL cache of ``(distance_km, duration_min)`` route estimates."""
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+        *,
+        max_entries: int = 5000,
+        ttl_s: float = 6 * 3600,
+        precision: int = 7,
+        bucket_min: int = 60,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.precision = precision
+        self.bucket_min = bucket_min
+        self._entries: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+        self._hits = 0
+        self._persistent_hits = 0
+        self._misses = 0
+
+    def key(
+        self,
+        origin_lat: float,
+        origin_lng: float,
+        dest_lat: float,
+        dest_lng: float,
+        departure: datetime | None = None,
+    ) -> str:
+        """Build the cache key for a route departing at ``departure``."""
+        ts = (departure or datetime.now(timezone.utc)).timestamp()
+        bucket = int(ts // (self.bucket_min * 60))
+        return ":".join(
+            (
+                geohash.encode(origin_lat, origin_lng, self.precision),
+                geohash.encode(dest_lat, dest_lng, self.precision),
+                str(bucket),
+            )
+        )
+
+    async def get(self, key: str) -> Optional[tuple[float, float]]:
+        """Return a cached estimate, consulting the persistent store on a miss."""
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None:
+            distance_km, duration_min, expires = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return distance_km, duration_min
+            del self._entries[key]
+
+        if self._session_factory is not None:
+            try:
+                async with self._session_factory() as db:
+                    row = await db.get(RouteEstimate, key)
+            except Exception:
+                logger.exception("route cache lookup failed", extra={"key": key})
+                row = None
+            if row is not None:
+                expires = as_utc(row.expires_at).timestamp()
+                if expires > now:
+                    self._remember(key, row.distance_km, row.duration_min, expires)
+                    self._persistent_hits += 1
+                    return row.distance_km, row.duration_min
+
+        self._misses += 1
+        return None
+
+    async def set(
+        self,
+        key: str,
+        distance_km: float,
+        duration_min: float,
+        *,
+        departure: datetime | None = None,
+    ) -> None:
+        """Store an estimate in memory and, when configured, in the database.
+
+        Predictions for a future ``departure`` do not go stale the way live
+        traffic does, so they are kept at least until their bucket has passed.
+        """
+        expires = time.time() + self.ttl_s
+        if departure is not None:
+            bucket_s = self.bucket_min * 60
+            bucket_end = (departure.timestamp() // bucket_s + 1) * bucket_s
+            expires = max(expires, bucket_end)
+        self._remember(key, distance_km, duration_min, expires)
+        if self._session_factory is None:
+            return
+        try:
+            async with self._session_factory() as db:
+                await db.merge(
+                    RouteEstimate(
+                        key=key,
+                        distance_km=distance_km,
+                        duration_min=duration_min,
+                        expires_at=datetime.fromtimestamp(expires, timezone.utc),
+                    )
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("route cache write failed", extra={"key": key})
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent store."""
+        if self._session_factory is None:
+            return 0
+        async with self._session_factory() as db:
+            result = await db.execute(
+                delete(RouteEstimate).where(
+                    RouteEstimate.expires_at <= datetime.now(timezone.utc)
+                )
+            )
+            await db.commit()
+        return result.rowcount or 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache size and hit/miss counters."""
+        lookups = self._hits + self._persistent_hits + self._misses
+        return {
+            "size": len(self._entries),
+            "hits": self._hits,
+            "persistent_hits": self._persistent_hits,
+            "misses": self._misses,
+            "hit_rate": (
+                round((self._hits + self._persistent_hits) / lookups, 3)
+                if lookups
+                else 0.0
+            ),
+        }
+
+    def _remember(
+        self, key: str, distance_km: float, duration_min: float, expires: float
+    ) -> None:
+        self._entries[key] = (distance_km, duration_min, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_settings = get_settings()
+route_cache = RouteCache(
+    AsyncSessionLocal if _settings.route_cache_persist else None,
+    max_entries=_settings.route_cache_max_entries,
+    ttl_s=_settings.route_cache_ttl_s,
+    precision=_settings.route_cache_precision,
+    bucket_min=_settings.route_cache_bucket_min,
+)
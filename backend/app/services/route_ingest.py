@@ -0,0 +1,243 @@
+"""Buffered ingestion of driver route points.
+
+Location frames arrive at roughly 1 Hz per active trip. Writing each one in
+its own transaction makes the database fsync the bottleneck, so points are
+queued per booking and written in bulk ``INSERT`` statements whenever a
+booking's buffer reaches ``max_batch`` points or every ``flush_interval``
+seconds, whichever comes first.
+
+Each booking is written in its own statement, so a bad row (say, for a
+booking that has since been deleted) only holds back that booking's
+points. Failed points are retried up to ``max_retries`` times before being
+dropped, and each buffer is capped at ``max_buffer`` points, oldest first,
+so a stuck booking cannot grow memory without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.models.route_point import RoutePoint
+
+logger = logging.getLogger(__name__)
+
+
+class RoutePointIngestor:
+    """Queue route points per booking and flush them in batches."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        *,
+        max_batch: int = 50,
+        flush_interval: float = 2.0,
+        max_buffer: int = 5000,
+        max_retries: int = 5,
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self._buffers: dict[uuid.UUID, list[dict[str, Any]]] = {}
+        self._failures: dict[uuid.UUID, int] = {}
+        self._points_dropped = 0
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set[asyncio.Task] = set()
+        self._flushes = 0
+        self._points_written = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    async def add(
+        self,
+        booking_id: uuid.UUID,
+        ts: datetime,
+        lat: float,
+        lng: float,
+        speed: float | None = None,
+    ) -> None:
+        """Queue a point, flushing the booking's buffer once it is full."""
+        buffer = self._buffers.setdefault(booking_id, [])
+        buffer.append(
+            {
+                "id": uuid.uuid4(),
+                "booking_id": booking_id,
+                "ts": ts,
+                "lat": lat,
+                "lng": lng,
+                "speed": speed,
+            }
+        )
+        if len(buffer) > self.max_buffer:
+            overflow = len(buffer) - self.max_buffer
+            del buffer[:overflow]
+            self._points_dropped += overflow
+            logger.warning(
+                "route point buffer full, dropping oldest",
+                extra={"booking_id": str(booking_id), "dropped": overflow},
+            )
+        if len(buffer) >= self.max_batch and booking_id not in self._failures:
+            await self.flush(booking_id)
+
+    async def flush(self, booking_id: uuid.UUID | None = None) -> int:
+        """Write queued points to the database and return how many were saved.
+
+        When ``booking_id`` is given only that booking's buffer is flushed
+        and a failure is raised to the caller. Otherwise every booking is
+        flushed separately and failures are logged.
+        """
+        if booking_id is not None:
+            return await self._flush_booking(booking_id)
+        written = 0
+        for pending in list(self._buffers):
+            try:
+                written += await self._flush_booking(pending)
+            except Exception:
+                pass  # logged in _flush_booking(); points were requeued
+        return written
+
+    async def _flush_booking(self, booking_id: uuid.UUID) -> int:
+        rows = self._buffers.pop(booking_id, None)
+        if not rows:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as db:
+                await db.execute(insert(RoutePoint), rows)
+                await db.commit()
+        except BaseException as exc:
+            self._requeue(booking_id, rows, exc)
+            raise
+        self._failures.pop(booking_id, None)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._flushes += 1
+        self._points_written += len(rows)
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        logger.debug(
+            "route points flushed",
+            extra={
+                "points": len(rows),
+                "booking_id": str(booking_id),
+                "flush_ms": round(elapsed_ms, 2),
+                "queue_depth": self.queue_depth,
+            },
+        )
+        return len(rows)
+
+    def _requeue(
+        self, booking_id: uuid.UUID, rows: list[dict[str, Any]], exc: BaseException
+    ) -> None:
+        if not isinstance(exc, Exception):
+            # Cancelled mid-write: keep the points for the next flush.
+            self._buffers[booking_id] = rows + self._buffers.get(booking_id, [])
+            return
+        failures = self._failures.get(booking_id, 0) + 1
+        if failures >= self.max_retries:
+            self._failures.pop(booking_id, None)
+            self._points_dropped += len(rows)
+            logger.exception(
+                "route point flush failed, dropping points",
+                extra={
+                    "booking_id": str(booking_id),
+                    "points": len(rows),
+                    "attempts": failures,
+                },
+            )
+            return
+        self._failures[booking_id] = failures
+        logger.exception(
+            "route point flush failed",
+            extra={
+                "booking_id": str(booking_id),
+                "points": len(rows),
+                "attempts": failures,
+            },
+        )
+        buffer = rows + self._buffers.get(booking_id, [])
+        overflow = max(0, len(buffer) - self.max_buffer)
+        self._points_dropped += overflow
+        self._buffers[booking_id] = buffer[overflow:]
+
+    async def close_booking(self, booking_id: uuid.UUID) -> None:
+        """Flush a booking's points when its driver socket goes away.
+
+        The write runs in its own task so that it completes even if the
+        socket handler is cancelled while waiting for it.
+        """
+        if booking_id not in self._buffers:
+            return
+        task = asyncio.ensure_future(self.flush(booking_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            pass  # logged in _flush_booking()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of points waiting to be written."""
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue depth and flush latency counters."""
+        return {
+            "queue_depth": self.queue_depth,
+            "bookings_buffered": len(self._buffers),
+            "flushes": self._flushes,
+            "points_written": self._points_written,
+            "points_dropped": self._points_dropped,
+            "bookings_failing": len(self._failures),
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "max_flush_ms": round(self._max_flush_ms, 2),
+            "avg_flush_ms": (
+                round(self._total_flush_ms / self._flushes, 2) if self._flushes else 0.0
+            ),
+        }
+
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write any remaining points."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+_settings = get_settings()
+route_ingestor = RoutePointIngestor(
+    max_batch=_settings.route_ingest_batch_size,
+    flush_interval=_settings.route_ingest_flush_interval_s,
+    max_buffer=_settings.route_ingest_max_buffer,
+    max_retries=_settings.route_ingest_max_retries,
+)
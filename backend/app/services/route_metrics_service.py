@@ -4,9 +4,8 @@ import logging
 from datetime import datetime
 from typing import Union
 
-import httpx
-
 from app.core.config import get_settings
+from app.core.http import GOOGLE_MAPS, get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -51,10 +50,10 @@ async def get_route_metrics(
             "ride_time": ride_time,
         },
     )
-    async with httpx.AsyncClient(timeout=10) as client:
-        res = await client.get(GOOGLE_DISTANCE_MATRIX_URL, params=params)
-        res.raise_for_status()
-        data = res.json()
+    client = get_http_client(GOOGLE_MAPS)
+    res = await client.get(GOOGLE_DISTANCE_MATRIX_URL, params=params)
+    res.raise_for_status()
+    data = res.json()
     if data.get("status") != "OK":
         message = data.get("error_message") or data.get("status", "error")
         logger.error("distance matrix error", extra={"error": message})
@@ -1,77 +1,253 @@
-"""Helpers for Google Directions API."""
+"""Helpers for the Google Directions and Distance Matrix APIs."""
 
 import asyncio
+import time
+from datetime import datetime, timezone
 from math import atan2, cos, radians, sin, sqrt
-from typing import Tuple
+from typing import Callable, Iterator, Optional, Sequence, Tuple
 
 import httpx
 
 from app.core.config import get_settings
+from app.core.http import GOOGLE_MAPS, get_http_client
+from app.services.route_cache import route_cache
 
 settings = get_settings()
 
+DIRECTIONS_URL = "https://maps.googleapis.com/maps/api/directions/json"
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+# Distance Matrix limits per request (standard plan)
+MATRIX_MAX_ORIGINS = 25
+MATRIX_MAX_DESTINATIONS = 25
+MATRIX_MAX_ELEMENTS = 100
+
+# (origin_lat, origin_lng, dest_lat, dest_lng, departure)
+Leg = Tuple[float, float, float, float, Optional[datetime]]
+
 
 async def estimate_route(
     pickup_lat: float,
     pickup_lng: float,
     dropoff_lat: float,
     dropoff_lng: float,
+    departure: datetime | None = None,
 ) -> Tuple[float, float]:
     """Return (distance_km, duration_min) between two coordinates.
 
     In test environments or when no Google API key is configured, fall back to
     a simple haversine distance calculation with an assumed average speed of
     60 km/h to avoid external network calls.
+
+    ``departure`` is sent to Google as ``departure_time`` so the duration
+    reflects predicted traffic; past or missing departures mean "now".
+    Results are cached per quantised origin/destination and departure
+    bucket; see :mod:`app.services.route_cache`.
     """
 
     if settings.env == "test" or not settings.google_maps_api_key:
-        r = 6371.0
-        dlat = radians(dropoff_lat - pickup_lat)
-        dlng = radians(dropoff_lng - pickup_lng)
-        a = (
-            sin(dlat / 2) ** 2
-            + cos(radians(pickup_lat)) * cos(radians(dropoff_lat)) * sin(dlng / 2) ** 2
-        )
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        distance_km = r * c
-        duration_min = distance_km  # 60 km/h average speed
-        return distance_km, duration_min
+        return _haversine_estimate(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+
+    cache_key = route_cache.key(
+        pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, departure
+    )
+    cached = await route_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
+    # Google rejects departure times in the past.
+    if departure is not None and departure > datetime.now(timezone.utc):
+        departure_time: int | str = int(departure.timestamp())
+    else:
+        departure_time = "now"
     params = {
         "origin": f"{pickup_lat},{pickup_lng}",
         "destination": f"{dropoff_lat},{dropoff_lng}",
+        "departure_time": departure_time,
         "key": settings.google_maps_api_key,
     }
-    url = "https://maps.googleapis.com/maps/api/directions/json"
-    async with httpx.AsyncClient() as client:
-        for attempt in range(3):
+    data = await _get_json(DIRECTIONS_URL, params)
+    _raise_for_status(data)
+    routes = data.get("routes") or []
+    if not routes or not routes[0].get("legs"):
+        raise ValueError("no route found")
+    leg = routes[0]["legs"][0]
+    distance_km = leg["distance"]["value"] / 1000.0
+    duration = leg.get("duration_in_traffic") or leg["duration"]
+    duration_min = duration["value"] / 60.0
+    await route_cache.set(cache_key, distance_km, duration_min, departure=departure)
+    return distance_km, duration_min
+
+
+async def estimate_routes(
+    legs: Sequence[Leg],
+) -> list[Optional[Tuple[float, float]]]:
+    """Return ``(distance_km, duration_min)`` for each leg, or ``None``.
+
+    Legs missing from the route cache are sent to the Distance Matrix API.
+    Legs departing in the same cache bucket share one ``departure_time``
+    (the start of the bucket, or "now"). The API bills every origin x
+    destination element, so legs are only batched when they share an origin
+    (one row) or a destination (one column); see :func:`_matrix_chunks`.
+    Legs Google has no route for come back as
+    ``None``; a failed request raises :class:`ValueError` as
+    :func:`estimate_route` does.
+    """
+
+    if settings.env == "test" or not settings.google_maps_api_key:
+        return [_haversine_estimate(*leg[:4]) for leg in legs]
+
+    results: list[Optional[Tuple[float, float]]] = [None] * len(legs)
+    keys = [route_cache.key(*leg) for leg in legs]
+    now = time.time()
+    groups: dict[int | str, list[int]] = {}
+    for index, (leg, key) in enumerate(zip(legs, keys)):
+        cached = await route_cache.get(key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            groups.setdefault(_matrix_departure(leg[4], now), []).append(index)
+
+    semaphore = asyncio.Semaphore(settings.leave_at_concurrency)
+
+    async def _fetch(departure_time: int | str, chunk: list[int]) -> None:
+        origins = list(dict.fromkeys(_point(*legs[i][:2]) for i in chunk))
+        destinations = list(dict.fromkeys(_point(*legs[i][2:4]) for i in chunk))
+        params = {
+            "origins": "|".join(origins),
+            "destinations": "|".join(destinations),
+            "departure_time": departure_time,
+            "units": "metric",
+            "key": settings.google_maps_api_key,
+        }
+        async with semaphore:
+            data = await _get_json(DISTANCE_MATRIX_URL, params)
+        _raise_for_status(data)
+        rows = data.get("rows") or []
+        for i in chunk:
+            leg = legs[i]
             try:
-                resp = await client.get(url, params=params, timeout=10)
-            except httpx.RequestError as exc:
-                if attempt == 2:
-                    raise ValueError("route service unavailable") from exc
-            else:
-                if resp.status_code < 500:
-                    resp.raise_for_status()
-                    data = resp.json()
-                    status = data.get("status")
-                    error_message = data.get("error_message")
-                    if status != "OK":
-                        if status == "ZERO_RESULTS":
-                            raise ValueError("no route found")
-                        if status == "REQUEST_DENIED":
-                            raise ValueError(error_message or "request denied")
-                        raise ValueError(
-                            error_message or f"route error: {status.lower()}"
-                        )
-                    routes = data.get("routes") or []
-                    if not routes or not routes[0].get("legs"):
-                        raise ValueError("no route found")
-                    leg = routes[0]["legs"][0]
-                    distance_km = leg["distance"]["value"] / 1000.0
-                    duration_min = leg["duration"]["value"] / 60.0
-                    return distance_km, duration_min
-                if attempt == 2:
-                    raise ValueError("route service unavailable")
+                element = rows[origins.index(_point(*leg[:2]))]["elements"][
+                    destinations.index(_point(*leg[2:4]))
+                ]
+            except (IndexError, KeyError):
+                continue
+            if element.get("status") != "OK":
+                continue
+            distance_km = element["distance"]["value"] / 1000.0
+            duration = element.get("duration_in_traffic") or element["duration"]
+            results[i] = (distance_km, duration["value"] / 60.0)
+            await route_cache.set(keys[i], *results[i], departure=leg[4])
+
+    await asyncio.gather(
+        *(
+            _fetch(departure_time, chunk)
+            for departure_time, indexes in groups.items()
+            for chunk in _matrix_chunks(legs, indexes)
+        )
+    )
+    return results
+
+
+def _haversine_estimate(
+    pickup_lat: float, pickup_lng: float, dropoff_lat: float, dropoff_lng: float
+) -> Tuple[float, float]:
+    r = 6371.0
+    dlat = radians(dropoff_lat - pickup_lat)
+    dlng = radians(dropoff_lng - pickup_lng)
+    a = (
+        sin(dlat / 2) ** 2
+        + cos(radians(pickup_lat)) * cos(radians(dropoff_lat)) * sin(dlng / 2) ** 2
+    )
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    distance_km = r * c
+    duration_min = distance_km  # 60 km/h average speed
+    return distance_km, duration_min
+
+
+def _point(lat: float, lng: float) -> str:
+    return f"{lat},{lng}"
+
+
+def _matrix_departure(departure: datetime | None, now: float) -> int | str:
+    """Shared ``departure_time`` for legs in ``departure``'s cache bucket."""
+    # Google rejects departure times in the past.
+    if departure is None or departure.timestamp() <= now:
+        return "now"
+    bucket_s = route_cache.bucket_min * 60
+    bucket_start = int(departure.timestamp() // bucket_s * bucket_s)
+    return max(bucket_start, int(now) + 60)
+
+
+def _matrix_chunks(legs: Sequence[Leg], indexes: list[int]) -> Iterator[list[int]]:
+    """Split legs into requests that are billed only for the pairs they need.
+
+    Legs from one origin to several destinations go out as a row, legs from
+    several origins to one destination as a column, and every other leg as
+    a request of its own, so each element returned is one distinct leg.
+    Rows and columns are cut to the per-request limits.
+    """
+    rows: dict[str, list[int]] = {}
+    for i in indexes:
+        rows.setdefault(_point(*legs[i][:2]), []).append(i)
+    columns: dict[str, list[int]] = {}
+    for row in rows.values():
+        if len({_point(*legs[i][2:4]) for i in row}) > 1:
+            yield from _limit_points(
+                row,
+                lambda i: _point(*legs[i][2:4]),
+                min(MATRIX_MAX_DESTINATIONS, MATRIX_MAX_ELEMENTS),
+            )
+        else:
+            columns.setdefault(_point(*legs[row[0]][2:4]), []).extend(row)
+    for column in columns.values():
+        yield from _limit_points(
+            column,
+            lambda i: _point(*legs[i][:2]),
+            min(MATRIX_MAX_ORIGINS, MATRIX_MAX_ELEMENTS),
+        )
+
+
+def _limit_points(
+    indexes: list[int], point: Callable[[int], str], limit: int
+) -> Iterator[list[int]]:
+    """Cut ``indexes`` into chunks with at most ``limit`` distinct points."""
+    chunk: list[int] = []
+    points: set[str] = set()
+    for i in indexes:
+        if point(i) not in points and len(points) == limit:
+            yield chunk
+            chunk, points = [], set()
+        chunk.append(i)
+        points.add(point(i))
+    if chunk:
+        yield chunk
+
+
+def _raise_for_status(data: dict) -> None:
+    status = data.get("status")
+    error_message = data.get("error_message")
+    if status != "OK":
+        if status == "ZERO_RESULTS":
+            raise ValueError("no route found")
+        if status == "REQUEST_DENIED":
+            raise ValueError(error_message or "request denied")
+        raise ValueError(error_message or f"route error: {str(status).lower()}")
+
+
+async def _get_json(url: str, params: dict) -> dict:
+    """GET ``url``, retrying connection errors and 5xx responses."""
+    client = get_http_client(GOOGLE_MAPS)
+    for attempt in range(3):
+        try:
+            resp = await client.get(url, params=params)
+        except httpx.RequestError as exc:
+            if attempt == 2:
+                raise ValueError("route service unavailable") from exc
+        else:
+            if resp.status_code < 500:
+                resp.raise_for_status()
+                return resp.json()
+            if attempt == 2:
+                raise ValueError("route service unavailable")
             await asyncio.sleep(2**attempt)
     raise ValueError("route service unavailable")
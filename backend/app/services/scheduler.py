@@ -1,18 +1,176 @@
-"""Scheduler for leave-now notifications."""
+"""Scheduler for leave-now notifications.
 
+Leave-now jobs live in the ``apscheduler_jobs`` table (unless
+``scheduler_persist`` is off), so they survive deploys and crashes. Every
+worker starts the scheduler so it can add jobs, but only the elected runner
+runs them; the others stay paused. On PostgreSQL the runner is whichever
+worker, on any host, holds a session advisory lock; a SQLite database is
+local to one host, so there a lock file is enough. The runner polls the
+table every ``scheduler_poll_s`` to pick up jobs added by other workers,
+and on startup :func:`reconcile_leave_jobs` restores any job that is
+missing. The runner also compacts the routes of completed trips
+periodically.
+
+The SQLAlchemy job store does blocking I/O, so coroutines add and remove
+jobs through :func:`_in_executor` rather than on the event loop.
+"""
+
+import asyncio
+import logging
+import tempfile
 import uuid
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Optional, Sequence
 
 from app.core.config import get_settings
-from app.db.database import AsyncSessionLocal
+from app.db.database import AsyncSessionLocal, sync_url
+from app.models.booking import Booking, BookingStatus
 from app.models.notification import NotificationType
 from app.models.user_v2 import UserRole
-from app.services import booking_service, notifications, routing
+from app.services import booking_service, notifications, pricing_service, routing
+from app.services.route_archive import route_archiver
+from app.services.pricing_service import PricingLike
 from app.services.settings_service import get_admin_user_id
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import column, create_engine, select, table, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.pool import NullPool
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
-scheduler = AsyncIOScheduler(timezone=settings.app_tz)
+
+JOBS_TABLE = "apscheduler_jobs"
+LEAVE_NOW_PREFIX = "leave-now:"
+# pg_try_advisory_lock key for runner election ("leav").
+RUNNER_LOCK_KEY = 0x6C656176
+_jobs = table(JOBS_TABLE, column("id"))
+
+
+def _jobstores() -> dict:
+    stores = {"memory": MemoryJobStore()}
+    stores["default"] = (
+        SQLAlchemyJobStore(url=str(sync_url), tablename=JOBS_TABLE)
+        if settings.scheduler_persist
+        else MemoryJobStore()
+    )
+    return stores
+
+
+scheduler = AsyncIOScheduler(
+    timezone=settings.app_tz,
+    jobstores=_jobstores(),
+    # A job missed while no worker was running fires once, however late.
+    job_defaults={"coalesce": True, "misfire_grace_time": None},
+)
+_lock_file: Optional[IO] = None
+_lock_connection: Optional[Connection] = None
+
+
+def leave_now_job_id(booking_id: uuid.UUID) -> str:
+    return f"{LEAVE_NOW_PREFIX}{booking_id}"
+
+
+def start_scheduler() -> bool:
+    """Start the scheduler; return whether this worker runs the jobs."""
+    runner = not settings.scheduler_persist or _acquire_lock()
+    scheduler.start(paused=not runner)
+    if runner and settings.scheduler_persist:
+        scheduler.add_job(
+            _poll_job_store,
+            "interval",
+            seconds=settings.scheduler_poll_s,
+            id="poll-job-store",
+            jobstore="memory",
+            replace_existing=True,
+        )
+    if runner:
+        scheduler.add_job(
+            route_archiver.run_once,
+            "interval",
+            seconds=settings.route_compaction_interval_s,
+            id="compact-routes",
+            jobstore="memory",
+            replace_existing=True,
+        )
+    logger.info("scheduler started", extra={"runner": runner})
+    return runner
+
+
+def shutdown_scheduler() -> None:
+    global _lock_file, _lock_connection
+    scheduler.shutdown()
+    if _lock_file is not None:
+        _lock_file.close()
+        _lock_file = None
+    if _lock_connection is not None:
+        # Closing the session releases the advisory lock.
+        engine = _lock_connection.engine
+        _lock_connection.close()
+        engine.dispose()
+        _lock_connection = None
+
+
+def _acquire_lock() -> bool:
+    if sync_url.get_backend_name() == "postgresql":
+        return _acquire_advisory_lock()
+    return _acquire_file_lock()
+
+
+def _acquire_advisory_lock() -> bool:
+    """Take the runner lock on a connection kept open for the process."""
+    global _lock_connection
+    if _lock_connection is not None:
+        return True
+    engine = create_engine(sync_url, poolclass=NullPool)
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": RUNNER_LOCK_KEY}
+        ).scalar()
+    except Exception:
+        connection.close()
+        engine.dispose()
+        raise
+    if not locked:
+        connection.close()
+        engine.dispose()
+        return False
+    _lock_connection = connection
+    return True
+
+
+def _acquire_file_lock() -> bool:
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    import fcntl
+
+    path = settings.scheduler_lock_path or str(
+        Path(tempfile.gettempdir()) / "leave-now-scheduler.lock"
+    )
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+
+def _poll_job_store() -> None:
+    """No-op; waking the scheduler makes it look for jobs added elsewhere."""
+
+
+async def _in_executor(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a job store call in a thread; the scheduler methods are thread-safe."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
 
 
 async def compute_leave_at(booking) -> datetime:
@@ -22,21 +180,229 @@ async def compute_leave_at(booking) -> datetime:
         settings.driver_base_lng,
         booking.pickup_lat,
         booking.pickup_lng,
+        departure=booking.pickup_when,
     )
+    return _leave_at(booking, duration_min)
+
+
+@dataclass
+class BookingPlan:
+    """Leave time and fare estimate for one booking."""
+
+    booking_id: uuid.UUID
+    leave_at: Optional[datetime]
+    distance_km: Optional[float]
+    duration_min: Optional[float]
+    estimated_price_cents: Optional[int]
+
+
+def _leave_at(booking, duration_min: float) -> datetime:
     return booking.pickup_when - timedelta(
         minutes=duration_min + settings.leave_buffer_min
     )
 
 
+async def plan_bookings(
+    bookings: Sequence, pricing: Optional[PricingLike] = None
+) -> list[BookingPlan]:
+    """Estimate leave times and, given ``pricing``, fares for many bookings.
+
+    The driver-base to pickup legs and, for fares, the pickup to dropoff
+    legs all go through one :func:`routing.estimate_routes` call. The base
+    legs share a Distance Matrix row and each fare leg is billed as a single
+    element, rather than one Directions request each. Fields are ``None``
+    where no route was found.
+    """
+    legs: list[routing.Leg] = [
+        (
+            settings.driver_base_lat,
+            settings.driver_base_lng,
+            b.pickup_lat,
+            b.pickup_lng,
+            b.pickup_when,
+        )
+        for b in bookings
+    ]
+    if pricing is not None:
+        legs += [
+            (b.pickup_lat, b.pickup_lng, b.dropoff_lat, b.dropoff_lng, b.pickup_when)
+            for b in bookings
+        ]
+    estimates = await routing.estimate_routes(legs)
+    plans = []
+    for i, booking in enumerate(bookings):
+        to_pickup = estimates[i]
+        trip = estimates[len(bookings) + i] if pricing is not None else None
+        plans.append(
+            BookingPlan(
+                booking_id=booking.id,
+                leave_at=_leave_at(booking, to_pickup[1]) if to_pickup else None,
+                distance_km=trip[0] if trip else None,
+                duration_min=trip[1] if trip else None,
+                estimated_price_cents=(
+                    pricing_service.estimate_fare(pricing, *trip) if trip else None
+                ),
+            )
+        )
+    return plans
+
+
 async def schedule_leave_now(booking):
+    """Schedule the leave-now job and record ``leave_at`` on the booking.
+
+    The caller is responsible for committing the booking's session.
+    """
     leave_at = await compute_leave_at(booking)
-    scheduler.add_job(_leave_now_job, "date", run_date=leave_at, args=[booking.id])
+    await _in_executor(_add_leave_now_job, booking.id, leave_at)
+    booking.leave_at = leave_at
     return leave_at
 
 
+def _add_leave_now_job(booking_id: uuid.UUID, run_date: datetime) -> None:
+    scheduler.add_job(
+        _leave_now_job,
+        "date",
+        run_date=run_date,
+        args=[booking_id],
+        id=leave_now_job_id(booking_id),
+        replace_existing=True,
+    )
+
+
+async def reconcile_leave_jobs(
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+) -> dict[str, int]:
+    """Make the job store match the confirmed bookings still to be picked up.
+
+    One query on ``ix_bookings_v2_status_pickup_when`` finds the bookings and
+    one on the job table's primary key finds the scheduled ids, so restart
+    cost does not depend on unpickling jobs. Missing jobs are added (bookings
+    without a ``leave_at`` are planned in one batch); a leave time that has
+    already passed fires once, now. Jobs for bookings that are no longer
+    confirmed or whose pickup has passed are removed.
+    """
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        bookings = (
+            await db.execute(
+                select(
+                    Booking.id,
+                    Booking.pickup_lat,
+                    Booking.pickup_lng,
+                    Booking.pickup_when,
+                    Booking.leave_at,
+                ).where(
+                    Booking.status == BookingStatus.DRIVER_CONFIRMED,
+                    Booking.pickup_when > now,
+                )
+            )
+        ).all()
+        if settings.scheduler_persist:
+            scheduled = set(
+                (
+                    await db.execute(
+                        select(_jobs.c.id).where(
+                            _jobs.c.id.like(f"{LEAVE_NOW_PREFIX}%")
+                        )
+                    )
+                ).scalars()
+            )
+        else:
+            scheduled = {
+                job.id
+                for job in scheduler.get_jobs()
+                if job.id.startswith(LEAVE_NOW_PREFIX)
+            }
+
+        missing = [b for b in bookings if leave_now_job_id(b.id) not in scheduled]
+        leave_at = {b.id: b.leave_at for b in missing}
+        unplanned = [b for b in missing if b.leave_at is None]
+        if unplanned:
+            try:
+                plans = await plan_bookings(unplanned)
+            except ValueError:
+                logger.warning(
+                    "leave times unavailable", extra={"count": len(unplanned)}
+                )
+                plans = []
+            planned = [p for p in plans if p.leave_at is not None]
+            for plan in planned:
+                leave_at[plan.booking_id] = plan.leave_at
+            if planned:
+                await db.execute(
+                    update(Booking),
+                    [{"id": p.booking_id, "leave_at": p.leave_at} for p in planned],
+                )
+                await db.commit()
+
+    added = 0
+    for booking_id, run_date in leave_at.items():
+        if run_date is None:
+            continue
+        if run_date.tzinfo is None:
+            run_date = run_date.replace(tzinfo=timezone.utc)
+        await _in_executor(_add_leave_now_job, booking_id, max(run_date, now))
+        added += 1
+
+    wanted = {leave_now_job_id(b.id) for b in bookings}
+    removed = 0
+    for job_id in scheduled - wanted:
+        try:
+            await _in_executor(scheduler.remove_job, job_id)
+        except JobLookupError:
+            continue
+        removed += 1
+
+    counts = {
+        "confirmed": len(bookings),
+        "scheduled": len(scheduled),
+        "added": added,
+        "removed": removed,
+    }
+    logger.info("leave-now jobs reconciled", extra=counts)
+    return counts
+
+
+async def fill_missing_leave_at(db: AsyncSession, bookings: Iterable) -> int:
+    """Compute and persist ``leave_at`` for bookings that lack it.
+
+    Routes are planned in one batch (see :func:`plan_bookings`). Bookings
+    whose route cannot be estimated are left without a ``leave_at``.
+    Returns the number of bookings updated.
+    """
+    missing = [b for b in bookings if b.leave_at is None]
+    if not missing:
+        return 0
+    try:
+        plans = await plan_bookings(missing)
+    except ValueError:
+        logger.warning("leave times unavailable", extra={"count": len(missing)})
+        return 0
+    updated = []
+    for booking, plan in zip(missing, plans):
+        if plan.leave_at is None:
+            logger.warning(
+                "leave time unavailable", extra={"booking_id": str(booking.id)}
+            )
+            continue
+        booking.leave_at = plan.leave_at
+        updated.append(booking)
+    if updated:
+        await db.commit()
+        for booking in updated:
+            # ``updated_at`` is set by the database and expired on commit.
+            await db.refresh(booking)
+    return len(updated)
+
+
 async def _leave_now_job(booking_id: uuid.UUID):
     async with AsyncSessionLocal() as session:
-        booking = await booking_service.leave_booking(session, booking_id)
+        try:
+            booking = await booking_service.leave_booking(session, booking_id)
+        except ValueError:
+            # The driver already left, or the booking was cancelled.
+            logger.info("leave-now job skipped", extra={"booking_id": str(booking_id)})
+            return
         admin_user_id = await get_admin_user_id(session)
         await notifications.create_notification(
             session,
@@ -4,13 +4,17 @@ import logging
 import uuid
 
 from fastapi import Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies import get_db
+from app.models.landmark import Landmark
 from app.models.settings import AdminConfig
+from app.schemas.landmark import LandmarkPayload
 from app.schemas.setup import SettingsPayload
 from app.schemas.user import UserRead
+from app.services.fare_meter import fare_meter
+from app.services.gazetteer import gazetteer
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +82,30 @@ async def update_settings(data: SettingsPayload, db: AsyncSession, user: UserRea
     row.per_minute_rate = data.per_minute_rate
 
     await db.commit()  # commit first
+    fare_meter.invalidate_pricing()
     # await db.refresh(row)  # then refresh (transaction is open for read)
 
     return SettingsPayload.model_validate(row, from_attributes=True)
+
+
+async def list_landmarks(db: AsyncSession) -> list[Landmark]:
+    """Return the landmarks offered by address search."""
+    result = await db.execute(select(Landmark).order_by(Landmark.name))
+    return list(result.scalars().all())
+
+
+async def replace_landmarks(
+    data: list[LandmarkPayload], db: AsyncSession, user: UserRead
+) -> list[Landmark]:
+    """Replace the landmark list and re-index it for address search."""
+    await ensure_admin(user, db)
+    logger.info(
+        "replacing landmarks",
+        extra={"user_id": getattr(user, "id", "unknown"), "count": len(data)},
+    )
+    await db.execute(delete(Landmark))
+    rows = [Landmark(**item.model_dump()) for item in data]
+    db.add_all(rows)
+    await db.commit()
+    gazetteer.set_landmarks(rows)
+    return sorted(rows, key=lambda row: row.name)
@@ -7,7 +7,7 @@ from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import select
 
-from app.core.security import hash_password
+from app.core.security import password_hasher
 from app.models.settings import AdminConfig
 from app.models.user_v2 import User
 from app.schemas.setup import SettingsPayload, SetupPayload
@@ -27,7 +27,7 @@ async def complete_initial_setup(db: AsyncSession, data: SetupPayload):
     admin_user = User(
         email=data.admin_email,
         full_name=data.full_name,
-        hashed_password=hash_password(data.admin_password),
+        hashed_password=await password_hasher.hash(data.admin_password),
     )
     db.add(admin_user)
     await db.flush()
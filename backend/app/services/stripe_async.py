@@ -0,0 +1,182 @@
+"""Async facade over :mod:`app.services.stripe_client`.
+
+The Stripe SDK is synchronous, so calling it from a request handler stalls
+every other request and websocket on the worker for the whole round trip.
+:class:`AsyncStripe` runs the ``stripe_client`` helpers on a dedicated
+thread pool and gives up waiting after ``timeout_s``.
+
+Charges carry an idempotency key derived from the booking id, the payment
+type, the amount, the payment method and the booking's ``payment_attempt``.
+Retrying a charge whose outcome is unknown (a timeout, a dropped
+connection, a double click) therefore returns the original PaymentIntent
+instead of charging twice; a different amount or card is a new charge.
+Stripe replays a saved decline for the same key, so callers bump
+``payment_attempt`` after a definite failure (see :func:`outcome_unknown`)
+and the next try is a fresh charge. The helpers are looked up on
+``stripe_client`` at call time, so the offline ``_StubStripe`` and test
+patches work unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import stripe
+
+from app.core.config import get_settings
+from app.services import stripe_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StripeTimeout(stripe.error.APIConnectionError):
+    """Raised when a Stripe call outlives ``timeout_s``.
+
+    The request may still complete at Stripe; retrying a charge reuses its
+    idempotency key, so it cannot be applied twice.
+    """
+
+
+def idempotency_key(
+    payment_type: str,
+    booking_id: uuid.UUID,
+    amount_cents: int,
+    payment_method: str,
+    attempt: int = 0,
+) -> str:
+    """Stable key for one charge attempt against a booking."""
+    digest = hashlib.sha256(
+        f"{amount_cents}:{payment_method}:{attempt}".encode()
+    ).hexdigest()
+    return f"booking-{booking_id}-{payment_type}-{digest[:16]}"
+
+
+def outcome_unknown(exc: Exception) -> bool:
+    """Whether a failed charge may still have gone through at Stripe.
+
+    Only then must a retry reuse the idempotency key; after any other error
+    the booking's ``payment_attempt`` should be bumped.
+    """
+    return isinstance(exc, stripe.error.APIConnectionError)
+
+
+class AsyncStripe:
+    """Run Stripe helpers on a bounded executor with a timeout."""
+
+    def __init__(self, *, workers: int = 8, timeout_s: float = 30.0) -> None:
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._calls = 0
+        self._errors = 0
+        self._timeouts = 0
+
+    async def charge_deposit(
+        self,
+        amount_cents: int,
+        booking_id: uuid.UUID,
+        *,
+        attempt: int = 0,
+        **kwargs: Any,
+    ) -> Any:
+        key = idempotency_key(
+            "deposit", booking_id, amount_cents, kwargs["payment_method"], attempt
+        )
+        return await self._run(
+            stripe_client.charge_deposit,
+            amount_cents,
+            booking_id,
+            idempotency_key=key,
+            **kwargs,
+        )
+
+    async def charge_final(
+        self,
+        amount_cents: int,
+        booking_id: uuid.UUID,
+        *,
+        attempt: int = 0,
+        **kwargs: Any,
+    ) -> Any:
+        key = idempotency_key(
+            "final", booking_id, amount_cents, kwargs["payment_method"], attempt
+        )
+        return await self._run(
+            stripe_client.charge_final,
+            amount_cents,
+            booking_id,
+            idempotency_key=key,
+            **kwargs,
+        )
+
+    async def create_customer(self, email: str, name: str, phone: str | None = None):
+        return await self._run(stripe_client.create_customer, email, name, phone)
+
+    async def create_setup_intent(self, customer_id: str, booking_reference: str):
+        return await self._run(
+            stripe_client.create_setup_intent, customer_id, booking_reference
+        )
+
+    async def set_default_payment_method(
+        self, customer_id: str, payment_method: str
+    ) -> None:
+        await self._run(
+            stripe_client.set_default_payment_method, customer_id, payment_method
+        )
+
+    async def detach_payment_method(self, payment_method: str) -> None:
+        await self._run(stripe_client.detach_payment_method, payment_method)
+
+    async def get_payment_method_details(self, payment_method_id: str) -> dict:
+        return await self._run(
+            stripe_client.get_payment_method_details, payment_method_id
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self._calls,
+            "errors": self._errors,
+            "timeouts": self._timeouts,
+        }
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="stripe"
+            )
+        self._calls += 1
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, call), self.timeout_s
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.error(
+                "stripe call timed out",
+                extra={"call": getattr(func, "__name__", str(func))},
+            )
+            raise StripeTimeout("Stripe did not respond in time") from None
+        except Exception:
+            self._errors += 1
+            raise
+
+
+_settings = get_settings()
+stripe_async = AsyncStripe(
+    workers=_settings.stripe_workers, timeout_s=_settings.stripe_timeout_s
+)
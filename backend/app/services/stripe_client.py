@@ -66,6 +66,8 @@ if settings.env == "test" or not settings.stripe_secret_key or real_stripe is No
 else:
     stripe = real_stripe  # type: ignore
     stripe.api_key = settings.stripe_secret_key or ""
+    # The SDK retries connection errors itself, reusing the idempotency key.
+    stripe.max_network_retries = settings.stripe_max_network_retries
 
 
 logger = logging.getLogger(__name__)
@@ -213,6 +215,7 @@ def charge_deposit(
     pickup_time: datetime | None = None,
     payment_method: str,
     customer_id: str | None = None,
+    idempotency_key: str | None = None,
 ):
     """Charge a deposit using a stored payment method."""
 
@@ -249,6 +252,9 @@ def charge_deposit(
     if settings.stripe_return_url:
         params["return_url"] = settings.stripe_return_url
 
+    if idempotency_key:
+        params["idempotency_key"] = idempotency_key
+
     return stripe.PaymentIntent.create(**params)
 
 
@@ -263,6 +269,7 @@ def charge_final(
     pickup_time: datetime | None = None,
     payment_method: str,
     customer_id: str | None = None,
+    idempotency_key: str | None = None,
 ):
     """Charge the remaining fare amount."""
     if not payment_method:
@@ -298,4 +305,7 @@ def charge_final(
     if settings.stripe_return_url:
         params["return_url"] = settings.stripe_return_url
 
+    if idempotency_key:
+        params["idempotency_key"] = idempotency_key
+
     return stripe.PaymentIntent.create(**params)
@@ -0,0 +1,137 @@
+"""Trip distance and duration from recorded route points.
+
+Only the ``(ts, lat, lng)`` columns are read and the whole track is handled
+as NumPy arrays, so a long trip costs a few vector operations rather than
+one ORM object and one Python-level haversine call per point.
+
+Before summing, two kinds of bad samples are removed:
+
+* outliers - points that imply a speed above ``max_speed_mps`` both coming
+  in and going out (a single GPS spike), or at the ends of the track;
+* jitter - segments starting at a point that stays within
+  ``stationary_radius_m`` of where it is ``stationary_window_s`` later,
+  which is how a parked car's wandering fix looks.
+"""
+
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import as_utc
+from app.models.route_point import RoutePoint
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@dataclass(frozen=True)
+class TripMetrics:
+    """Summary of a recorded trip."""
+
+    distance_m: float
+    duration_s: int
+    started_at: Optional[datetime]
+    ended_at: Optional[datetime]
+    points: int
+    dropped: int
+    end_lat: Optional[float] = None
+    end_lng: Optional[float] = None
+
+
+def haversine_m(
+    lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray
+) -> np.ndarray:
+    """Element-wise great-circle distance in metres."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def point_distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+
+def compute_metrics(
+    ts: Sequence[datetime],
+    lat: Sequence[float],
+    lng: Sequence[float],
+    *,
+    max_speed_mps: float = 70.0,
+    stationary_radius_m: float = 10.0,
+    stationary_window_s: float = 10.0,
+) -> TripMetrics:
+    """Compute distance and duration for points ordered by timestamp."""
+    n = len(ts)
+    if n == 0:
+        return TripMetrics(0.0, 0, None, None, 0, 0)
+
+    t = np.fromiter((as_utc(v).timestamp() for v in ts), dtype=float, count=n)
+    la = np.asarray(lat, dtype=float)
+    ln = np.asarray(lng, dtype=float)
+
+    keep = np.ones(n, dtype=bool)
+    if n > 1:
+        seg = haversine_m(la[:-1], ln[:-1], la[1:], ln[1:])
+        fast = seg / np.maximum(np.diff(t), 1e-3) > max_speed_mps
+        # A point is a spike when the segments on both sides of it are too
+        # fast; the first and last points only have one side.
+        keep[1:-1] = ~(fast[:-1] & fast[1:])
+        keep[0] = not (fast[0] and (n == 2 or not fast[1]))
+        keep[-1] = not (fast[-1] and (n == 2 or not fast[-2]))
+        if n == 2 and not keep.any():
+            keep[:] = True  # nothing to compare against; trust both points
+
+    kept = np.flatnonzero(keep)
+    t, la, ln = t[kept], la[kept], ln[kept]
+    distance = 0.0
+    if len(kept) > 1:
+        seg = haversine_m(la[:-1], ln[:-1], la[1:], ln[1:])
+        ahead = np.minimum(
+            np.searchsorted(t, t + stationary_window_s), len(kept) - 1
+        )
+        wander = haversine_m(la, ln, la[ahead], ln[ahead])
+        stationary = (wander < stationary_radius_m)[:-1]
+        distance = float(seg[~stationary].sum())
+
+    first, last = int(kept[0]), int(kept[-1])
+    return TripMetrics(
+        distance_m=distance,
+        duration_s=int(t[-1] - t[0]),
+        started_at=ts[first],
+        ended_at=ts[last],
+        points=len(kept),
+        dropped=n - len(kept),
+        end_lat=float(la[-1]),
+        end_lng=float(ln[-1]),
+    )
+
+
+async def load_trip_metrics(db: AsyncSession, booking_id: uuid.UUID) -> TripMetrics:
+    """Compute metrics for a booking's recorded route."""
+    rows = (
+        await db.execute(
+            select(RoutePoint.ts, RoutePoint.lat, RoutePoint.lng)
+            .where(RoutePoint.booking_id == booking_id)
+            .order_by(RoutePoint.ts)
+        )
+    ).all()
+    if not rows:
+        return compute_metrics((), (), ())
+    ts, lat, lng = zip(*rows)
+    return compute_metrics(ts, lat, lng)
@@ -0,0 +1,213 @@
+"""Running trip odometer updated from driver location frames.
+
+Each active booking keeps an :class:`OdometerReading` that is advanced as
+websocket frames arrive, so showing a running fare does not need to
+re-read ``route_points``. Readings live in the process holding the
+driver's socket. When the socket closes the reading is saved to
+``trip_odometers``; a reconnect, on any worker, seeds from that row and
+replays only the points recorded after it. Only a booking with no saved
+reading (a worker crashed) is seeded by rescanning the whole route.
+
+The filters mirror :mod:`app.services.trip_metrics` in incremental form:
+a point implying more than ``max_speed_mps`` is held back until the next
+point confirms it, and distance only accrues once the position moves
+``stationary_radius_m`` away from the last counted point, so a parked
+car's wandering fix adds nothing.
+
+Because it sees points one at a time the odometer can differ slightly from
+:func:`~app.services.trip_metrics.compute_metrics`, which has the whole
+track; completion bills from the latter, so readings are for display only.
+Completion therefore does not use the odometer: it rescans the route once
+per trip, which keeps the bill exact.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import as_utc
+from app.models.route_point import RoutePoint
+from app.models.trip_odometer import TripOdometerState
+from app.services.trip_metrics import (
+    TripMetrics,
+    load_trip_metrics,
+    point_distance_m,
+)
+
+
+@dataclass
+class OdometerReading:
+    """Distance and time covered so far by one booking."""
+
+    distance_m: float = 0.0
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    last_lat: Optional[float] = None
+    last_lng: Optional[float] = None
+    anchor_lat: Optional[float] = None
+    anchor_lng: Optional[float] = None
+    points: int = 0
+    dropped: int = 0
+    candidate: Optional[tuple[datetime, float, float]] = None
+
+    @property
+    def duration_s(self) -> int:
+        if self.started_at is None or self.ended_at is None:
+            return 0
+        return int((as_utc(self.ended_at) - as_utc(self.started_at)).total_seconds())
+
+    @classmethod
+    def from_metrics(cls, metrics: TripMetrics) -> "OdometerReading":
+        return cls(
+            distance_m=metrics.distance_m,
+            started_at=metrics.started_at,
+            ended_at=metrics.ended_at,
+            last_lat=metrics.end_lat,
+            last_lng=metrics.end_lng,
+            anchor_lat=metrics.end_lat,
+            anchor_lng=metrics.end_lng,
+            points=metrics.points,
+            dropped=metrics.dropped,
+        )
+
+
+_SAVED_FIELDS = (
+    "distance_m",
+    "started_at",
+    "ended_at",
+    "last_lat",
+    "last_lng",
+    "anchor_lat",
+    "anchor_lng",
+    "points",
+    "dropped",
+)
+
+
+class TripOdometer:
+    """Per-booking running totals fed by the driver websocket."""
+
+    def __init__(
+        self, *, max_speed_mps: float = 70.0, stationary_radius_m: float = 10.0
+    ) -> None:
+        self.max_speed_mps = max_speed_mps
+        self.stationary_radius_m = stationary_radius_m
+        self._readings: dict[uuid.UUID, OdometerReading] = {}
+
+    def get(self, booking_id: uuid.UUID) -> Optional[OdometerReading]:
+        return self._readings.get(booking_id)
+
+    async def load(self, db: AsyncSession, booking_id: uuid.UUID) -> OdometerReading:
+        """Return the reading for ``booking_id``, seeding it from the database."""
+        reading = self._readings.get(booking_id)
+        if reading is not None:
+            return reading
+        saved = await db.get(TripOdometerState, booking_id)
+        if saved is None:
+            reading = OdometerReading.from_metrics(
+                await load_trip_metrics(db, booking_id)
+            )
+            self._readings[booking_id] = reading
+            return reading
+        reading = OdometerReading(
+            **{field: getattr(saved, field) for field in _SAVED_FIELDS}
+        )
+        self._readings[booking_id] = reading
+        query = select(RoutePoint.ts, RoutePoint.lat, RoutePoint.lng).where(
+            RoutePoint.booking_id == booking_id
+        )
+        if saved.ended_at is not None:
+            query = query.where(RoutePoint.ts > saved.ended_at)
+        for ts, lat, lng in (await db.execute(query.order_by(RoutePoint.ts))).all():
+            self.record(booking_id, ts, lat, lng)
+        return reading
+
+    async def save(self, db: AsyncSession, booking_id: uuid.UUID) -> None:
+        """Persist the booking's reading, if there is one, and commit."""
+        reading = self._readings.get(booking_id)
+        if reading is None:
+            return
+        await db.merge(
+            TripOdometerState(
+                booking_id=booking_id,
+                **{field: getattr(reading, field) for field in _SAVED_FIELDS},
+            )
+        )
+        await db.commit()
+
+    def record(
+        self, booking_id: uuid.UUID, ts: datetime, lat: float, lng: float
+    ) -> OdometerReading:
+        """Advance the booking's reading with one location sample."""
+        reading = self._readings.setdefault(booking_id, OdometerReading())
+        if reading.ended_at is None or reading.last_lat is None:
+            self._accept(reading, ts, lat, lng)
+            return reading
+        if as_utc(ts) <= as_utc(reading.ended_at):
+            return reading  # late or duplicate frame
+
+        last = (reading.ended_at, reading.last_lat, reading.last_lng)
+        if self._too_fast(*last, ts, lat, lng):
+            candidate = reading.candidate
+            if candidate is not None and not self._too_fast(*candidate, ts, lat, lng):
+                # Two consistent points after a jump: the jump was real.
+                reading.candidate = None
+                self._accept(reading, *candidate)
+                self._accept(reading, ts, lat, lng)
+            else:
+                if candidate is not None:
+                    reading.dropped += 1
+                reading.candidate = (ts, lat, lng)
+            return reading
+
+        if reading.candidate is not None:
+            reading.dropped += 1  # a lone spike
+            reading.candidate = None
+        self._accept(reading, ts, lat, lng)
+        return reading
+
+    def discard(self, booking_id: uuid.UUID) -> None:
+        self._readings.pop(booking_id, None)
+
+    def clear(self) -> None:
+        self._readings.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"active": len(self._readings)}
+
+    def _too_fast(
+        self,
+        ts1: datetime,
+        lat1: float,
+        lng1: float,
+        ts2: datetime,
+        lat2: float,
+        lng2: float,
+    ) -> bool:
+        dt = max((as_utc(ts2) - as_utc(ts1)).total_seconds(), 1e-3)
+        return point_distance_m(lat1, lng1, lat2, lng2) / dt > self.max_speed_mps
+
+    def _accept(
+        self, reading: OdometerReading, ts: datetime, lat: float, lng: float
+    ) -> None:
+        if reading.anchor_lat is None or reading.anchor_lng is None:
+            reading.anchor_lat, reading.anchor_lng = lat, lng
+        else:
+            moved = point_distance_m(reading.anchor_lat, reading.anchor_lng, lat, lng)
+            if moved >= self.stationary_radius_m:
+                reading.distance_m += moved
+                reading.anchor_lat, reading.anchor_lng = lat, lng
+        if reading.started_at is None:
+            reading.started_at = ts
+        reading.ended_at = ts
+        reading.last_lat, reading.last_lng = lat, lng
+        reading.points += 1
+
+
+trip_odometer = TripOdometer()
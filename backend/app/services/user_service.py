@@ -10,11 +10,11 @@ from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import hash_password
+from app.core.security import password_hasher
 from app.models.user_v2 import User
 from app.schemas.api_booking import StripePaymentMethod
 from app.schemas.user import UserCreate, UserRead, UserUpdate
-from app.services import stripe_client
+from app.services.stripe_async import stripe_async
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +40,7 @@ async def create_user(db: AsyncSession, data: UserCreate) -> UserRead:
     user = User(
         email=data.email,
         full_name=data.full_name,
-        hashed_password=hash_password(data.password),
+        hashed_password=await password_hasher.hash(data.password),
         phone=data.phone,  # Store phone when provided
     )
     db.add(user)
@@ -91,7 +91,7 @@ async def update_user(
 
     # Handle password specially; everything else set directly
     if "password" in update_data:
-        user.hashed_password = hash_password(update_data.pop("password"))
+        user.hashed_password = await password_hasher.hash(update_data.pop("password"))
 
     for field, value in update_data.items():
         if hasattr(user, field):
@@ -128,14 +128,14 @@ async def create_setup_intent_for_user(db: AsyncSession, user: User) -> str:
     """Ensure a customer exists and return a SetupIntent client secret."""
 
     if user.stripe_customer_id is None:
-        stripe_customer = stripe_client.create_customer(
+        stripe_customer = await stripe_async.create_customer(
             user.email, user.full_name, user.phone
         )
         user.stripe_customer_id = stripe_customer.id
         await db.flush()
         await db.flush()
 
-    setup_intent = stripe_client.create_setup_intent(
+    setup_intent = await stripe_async.create_setup_intent(
         user.stripe_customer_id, str(user.id)
     )
     return setup_intent.client_secret
@@ -147,7 +147,7 @@ async def save_payment_method(
     """Persist a confirmed payment method and set it as default."""
 
     if user.stripe_customer_id is None:
-        stripe_customer = stripe_client.create_customer(
+        stripe_customer = await stripe_async.create_customer(
             user.email, user.full_name, user.phone
         )
         user.stripe_customer_id = stripe_customer.id
@@ -157,7 +157,9 @@ async def save_payment_method(
         "set_default_payment_method:start",
         extra={"user_id": user.id, "payment_method_id": payment_method_id},
     )
-    stripe_client.set_default_payment_method(user.stripe_customer_id, payment_method_id)
+    await stripe_async.set_default_payment_method(
+        user.stripe_customer_id, payment_method_id
+    )
     logger.info(
         "set_default_payment_method:success",
         extra={"user_id": user.id, "payment_method_id": payment_method_id},
@@ -190,7 +192,7 @@ async def remove_payment_method(db: AsyncSession, user: User) -> None:
     """Detach and clear the stored payment method for a user."""
 
     if user.stripe_payment_method_id:
-        stripe_client.detach_payment_method(user.stripe_payment_method_id)
+        await stripe_async.detach_payment_method(user.stripe_payment_method_id)
         user.stripe_payment_method_id = None
         await db.flush()
 
@@ -201,5 +203,7 @@ async def get_payment_method(user: User) -> StripePaymentMethod:
     if not user.stripe_payment_method_id:
         raise HTTPException(status_code=404)
 
-    details = stripe_client.get_payment_method_details(user.stripe_payment_method_id)
+    details = await stripe_async.get_payment_method_details(
+        user.stripe_payment_method_id
+    )
     return StripePaymentMethod(**details)
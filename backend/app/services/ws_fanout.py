@@ -0,0 +1,171 @@
+"""Bounded, coalescing send queues for booking websocket subscribers.
+
+Every message on a booking channel used to be written to each subscriber as
+it arrived, so a client on a slow mobile link built an unbounded backlog of
+stale positions in the server. Each subscriber now gets a
+:class:`SubscriberQueue`:
+
+* a position frame replaces any position still waiting to be sent, and a
+  ``{"type": "fare"}`` message any waiting fare, so at most one of each is
+  pending and the client always gets the newest;
+* everything else (status changes in particular) is queued in order and
+  never dropped. A subscriber that lets more than ``max_pending`` messages
+  pile up is disconnected instead, so the queue stays bounded.
+
+:meth:`Fanout.pump` drains the queue at no more than ``max_send_hz``
+messages per second, sending positions as binary frames to subscribers that
+negotiated :mod:`~app.services.location_frames`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from fastapi import WebSocket
+
+from app.core.config import get_settings
+from app.services import location_frames
+
+POSITION = "position"
+
+
+class SubscriberOverflow(Exception):
+    """The subscriber fell more than ``max_pending`` messages behind."""
+
+
+def _classify(message: Any) -> tuple[Optional[str], Any]:
+    """Return the message's parsed payload and the slot it may overwrite.
+
+    The slot is ``None`` for messages that must always be sent.
+    """
+    try:
+        payload = json.loads(message) if isinstance(message, str) else message
+    except ValueError:
+        return None, None
+    if not isinstance(payload, dict) or "status" in payload:
+        return None, payload
+    if payload.get("type") == "fare":
+        return "fare", payload
+    if "lat" in payload and "lng" in payload and "type" not in payload:
+        return POSITION, payload
+    return None, payload
+
+
+class SubscriberQueue:
+    """Messages waiting to be sent to one subscriber."""
+
+    def __init__(self, fanout: "Fanout", *, max_pending: int = 256) -> None:
+        self._fanout = fanout
+        self.max_pending = max_pending
+        self.overflowed = False
+        self._pending: OrderedDict[Hashable, tuple[Any, Any]] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._sequence = itertools.count()
+
+    def put(self, message: Any) -> None:
+        if self.overflowed:
+            return
+        slot, payload = _classify(message)
+        key: Hashable = slot or next(self._sequence)
+        if self._pending.pop(key, None) is not None:
+            self._fanout._coalesced += 1
+        # Re-inserted at the end: the newer position goes after any status
+        # queued since the one it replaces.
+        self._pending[key] = (message, payload)
+        if len(self._pending) > self.max_pending:
+            self.overflowed = True
+            self._pending.clear()
+            self._fanout._overflowed += 1
+        self._ready.set()
+
+    async def get(self) -> Any:
+        return (await self.next())[1]
+
+    async def next(self) -> tuple[Optional[str], Any, Any]:
+        """Wait for the oldest pending message; return ``(slot, message, payload)``.
+
+        Raises :class:`SubscriberOverflow` once the queue has overflowed.
+        """
+        while not self._pending:
+            if self.overflowed:
+                raise SubscriberOverflow
+            self._ready.clear()
+            await self._ready.wait()
+        key, (message, payload) = self._pending.popitem(last=False)
+        return (key if isinstance(key, str) else None), message, payload
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class Fanout:
+    """Factory and sender for :class:`SubscriberQueue`, with shared counters."""
+
+    def __init__(
+        self,
+        *,
+        max_send_hz: float = 4.0,
+        max_pending: int = 256,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self.max_send_hz = max_send_hz
+        self.max_pending = max_pending
+        self._sleep = sleep
+        self._subscribers = 0
+        self._sent = 0
+        self._binary = 0
+        self._coalesced = 0
+        self._overflowed = 0
+
+    def queue(self) -> SubscriberQueue:
+        return SubscriberQueue(self, max_pending=self.max_pending)
+
+    async def pump(
+        self, websocket: WebSocket, queue: SubscriberQueue, *, binary: bool = False
+    ) -> None:
+        """Send queued messages to ``websocket`` until cancelled.
+
+        With ``binary``, positions go out as :mod:`location_frames` frames.
+        A subscriber whose queue overflows is closed with 1013 (try again
+        later); its client reconnects and gets a fresh snapshot.
+        """
+        self._subscribers += 1
+        try:
+            while True:
+                try:
+                    slot, message, payload = await queue.next()
+                except SubscriberOverflow:
+                    await websocket.close(code=1013)
+                    return
+                frame = None
+                if binary and slot == POSITION:
+                    frame = location_frames.encode(payload)
+                if frame is not None:
+                    await websocket.send_bytes(frame)
+                    self._binary += 1
+                else:
+                    await websocket.send_text(message)
+                self._sent += 1
+                if self.max_send_hz > 0:
+                    await self._sleep(1 / self.max_send_hz)
+        finally:
+            self._subscribers -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "subscribers": self._subscribers,
+            "sent": self._sent,
+            "binary": self._binary,
+            "coalesced": self._coalesced,
+            "overflowed": self._overflowed,
+        }
+
+
+_settings = get_settings()
+fanout = Fanout(
+    max_send_hz=_settings.ws_max_send_hz, max_pending=_settings.ws_max_pending
+)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Compare availability overlap checks: the indexed SQL query the index
+replaced versus AvailabilityIndex.sync() + overlaps() per request, with and
+without a multi-year block in the table.
+
+Example:
+  python benchmarks/bench_availability_index.py
+  python benchmarks/bench_availability_index.py --slots 100000 --queries 2000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.models.availability_slot import AvailabilitySlot  # noqa: E402
+from app.services.availability_index import AvailabilityIndex  # noqa: E402
+
+BASE = datetime(2030, 1, 1, tzinfo=timezone.utc)
+SPAN_MIN = 10 * 365 * 24 * 60
+
+
+def build_rows(count: int, rng: random.Random, long_block: bool) -> list[dict]:
+    # Spread slots over roughly ten years with 30 minute to 8 hour durations.
+    rows = []
+    for _ in range(count):
+        start = BASE + timedelta(minutes=rng.randrange(SPAN_MIN))
+        end = start + timedelta(minutes=rng.randrange(30, 8 * 60))
+        rows.append({"start_dt": start, "end_dt": end, "reason": None})
+    if long_block:
+        start = BASE + timedelta(days=365)
+        rows.append(
+            {"start_dt": start, "end_dt": start + timedelta(days=3 * 365), "reason": None}
+        )
+    return rows
+
+
+async def sql_overlaps(db: AsyncSession, start: datetime, end: datetime) -> bool:
+    # The query confirm_booking ran before the index, served by
+    # ix_availability_slots_start_end.
+    result = await db.execute(
+        select(AvailabilitySlot.id)
+        .where(AvailabilitySlot.start_dt < end, AvailabilitySlot.end_dt > start)
+        .limit(1)
+    )
+    return result.first() is not None
+
+
+async def run_case(args: argparse.Namespace, long_block: bool) -> None:
+    rng = random.Random(args.seed)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(AvailabilitySlot.__table__.create)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        await db.execute(insert(AvailabilitySlot), build_rows(args.slots, rng, long_block))
+        await db.commit()
+
+    queries = []
+    for _ in range(args.queries):
+        start = BASE + timedelta(minutes=rng.randrange(SPAN_MIN))
+        queries.append((start, start + timedelta(hours=rng.randrange(1, 6))))
+
+    index = AvailabilityIndex()
+    async with session_factory() as db:
+        t0 = time.perf_counter()
+        await index.sync(db)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        via_sql = [await sql_overlaps(db, a, b) for a, b in queries]
+        sql_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        via_index = []
+        for a, b in queries:
+            await index.sync(db)
+            via_index.append(index.overlaps(a, b))
+        index_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for a, b in queries:
+            index.overlaps(a, b)
+        tree_s = time.perf_counter() - t0
+    await engine.dispose()
+
+    if via_sql != via_index:
+        raise SystemExit("index and SQL query disagree")
+
+    label = "with a 3-year block" if long_block else "short slots only"
+    n = args.queries
+    print(f"slots: {args.slots}  queries: {n}  ({label})")
+    print(f"  index build:          {build_s * 1000:9.1f} ms")
+    print(f"  indexed SQL query:    {sql_s * 1e6 / n:9.1f} us/query")
+    print(f"  sync() + overlaps():  {index_s * 1e6 / n:9.1f} us/query")
+    print(f"  overlaps() alone:     {tree_s * 1e6 / n:9.1f} us/query")
+    print(f"  speedup incl. sync:   {sql_s / index_s:9.1f}x")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slots", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    await run_case(args, long_block=False)
+    await run_case(args, long_block=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
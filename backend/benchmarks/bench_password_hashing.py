@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure event-loop latency seen by websocket traffic during a burst of
+concurrent logins, with bcrypt verified inline (before) versus on the
+PasswordHasher thread pool (after).
+
+A ticker coroutine stands in for a websocket: it wakes every --tick-ms and
+records how late it was, which is the delay every socket in the process
+would see before its next frame is handled.
+
+Example:
+  python benchmarks/bench_password_hashing.py
+  python benchmarks/bench_password_hashing.py --logins 64 --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.security import (  # noqa: E402
+    PasswordHasher,
+    hash_password,
+    verify_password,
+)
+
+
+async def ticker(interval: float, lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def login_inline(hashed: str) -> bool:
+    return verify_password("correct horse", hashed)
+
+
+async def run(label: str, login, hashed: str, args: argparse.Namespace) -> None:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(args.tick_ms / 1000, lags, stop))
+    await asyncio.sleep(0.1)  # baseline ticks before the burst
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed) for _ in range(args.logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await tick
+    assert all(results)
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{label:8s} logins {args.logins} in {elapsed:6.2f} s  "
+        f"loop lag p50 {statistics.median(lags_ms):7.1f} ms  "
+        f"p99 {p99:7.1f} ms  max {lags_ms[-1]:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tick-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    hashed = hash_password("correct horse")
+    hasher = PasswordHasher(workers=args.workers, queue_timeout_s=60.0)
+    try:
+        await run("inline", login_inline, hashed, args)
+        await run(
+            "pool",
+            lambda h: hasher.verify("correct horse", h),
+            hashed,
+            args,
+        )
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
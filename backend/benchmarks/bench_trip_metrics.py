@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Compare trip distance computation: ORM rows + Python haversine loop versus
+column select + NumPy (app.services.trip_metrics).
+
+Example:
+  python benchmarks/bench_trip_metrics.py
+  python benchmarks/bench_trip_metrics.py --points 7200 --repeat 5
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.models.route_point import RoutePoint  # noqa: E402
+from app.services.booking_service import _haversine  # noqa: E402
+from app.services.trip_metrics import load_trip_metrics  # noqa: E402
+
+
+async def seed(db: AsyncSession, booking_id: uuid.UUID, count: int) -> None:
+    # A 1 Hz track heading roughly north-east at 10-25 m/s.
+    rng = random.Random(1)
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    lat, lng = -27.47, 153.02
+    rows = []
+    for i in range(count):
+        step = rng.uniform(10, 25) / 111_000
+        heading = rng.uniform(0, math.pi / 2)
+        lat += step * math.cos(heading)
+        lng += step * math.sin(heading)
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "booking_id": booking_id,
+                "ts": start + timedelta(seconds=i),
+                "lat": lat,
+                "lng": lng,
+            }
+        )
+    await db.execute(insert(RoutePoint), rows)
+    await db.commit()
+
+
+async def orm_loop(db: AsyncSession, booking_id: uuid.UUID) -> float:
+    points = (
+        (
+            await db.execute(
+                select(RoutePoint)
+                .where(RoutePoint.booking_id == booking_id)
+                .order_by(RoutePoint.ts)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    distance = 0.0
+    for p1, p2 in zip(points, points[1:]):
+        distance += _haversine(p1.lat, p1.lng, p2.lat, p2.lng)
+    return distance
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=7200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(RoutePoint.__table__.create)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    booking_id = uuid.uuid4()
+    async with session_factory() as db:
+        await seed(db, booking_id, args.points)
+
+    timings: dict[str, list[float]] = {"orm loop": [], "numpy": []}
+    results: dict[str, float] = {}
+    for _ in range(args.repeat):
+        async with session_factory() as db:
+            t0 = time.perf_counter()
+            results["orm loop"] = await orm_loop(db, booking_id)
+            timings["orm loop"].append(time.perf_counter() - t0)
+        async with session_factory() as db:
+            t0 = time.perf_counter()
+            results["numpy"] = (await load_trip_metrics(db, booking_id)).distance_m
+            timings["numpy"].append(time.perf_counter() - t0)
+    await engine.dispose()
+
+    print(f"points: {args.points}  repeat: {args.repeat}")
+    for name, values in timings.items():
+        best = min(values) * 1000
+        print(f"{name:9s} best {best:8.1f} ms  distance {results[name] / 1000:.3f} km")
+    print(f"speedup:  {min(timings['orm loop']) / min(timings['numpy']):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -164,6 +164,39 @@ async def override_get_db():
     app.dependency_overrides.clear()
 
 
+# --- Outbound provider calls routed through httpx.MockTransport ---
+
+
+@pytest_asyncio.fixture
+async def mock_http():
+    """Install a request handler for every shared outbound HTTP client."""
+    from app.core.http import http_clients
+
+    async def _install(handler):
+        await http_clients.use_transport(httpx.MockTransport(handler))
+
+    yield _install
+    await http_clients.use_transport(None)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_route_cache(monkeypatch):
+    """Give each test an empty, memory-only route estimate cache."""
+    from app.services import routing
+    from app.services.route_cache import RouteCache
+
+    monkeypatch.setattr(routing, "route_cache", RouteCache())
+
+
+@pytest.fixture(autouse=True)
+def _fresh_place_store(monkeypatch):
+    """Give each test an empty, memory-only place store."""
+    from app.services import geocode_service
+    from app.services.place_store import PlaceStore
+
+    monkeypatch.setattr(geocode_service, "place_store", PlaceStore())
+
+
 # --- Async HTTP client for integration tests ---
 
 
@@ -234,3 +267,41 @@ async def user_headers(async_session: AsyncSession) -> dict[str, str]:
     settings_service._cached_admin_user_id = None
     token = create_jwt_token(user.id)
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_availability_index():
+    """Tests delete slots with raw SQL, which the index cannot observe."""
+    from app.services.availability_index import availability_index
+
+    availability_index.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_principal_cache():
+    """Users are created and removed outside the ORM paths the cache watches."""
+    from app.services.principal_cache import principal_cache
+
+    principal_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_geocode_cache():
+    """Tests reuse queries and place ids with different mocked responses."""
+    from app.services.geocode_cache import autocomplete_cache, place_details_cache
+
+    autocomplete_cache.clear()
+    place_details_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_fare_meter():
+    """Drop cached pricing and push times so tests don't see each other's."""
+    from app.services.fare_meter import fare_meter
+
+    fare_meter.clear()
+    yield
+    fare_meter.clear()
@@ -0,0 +1,129 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.core.security import create_jwt_token, hash_password
+from app.db.database import AsyncSessionLocal
+from app.models.booking import Booking, BookingStatus
+from app.models.route_point import RoutePoint
+from app.models.trip import Trip
+from app.models.user_v2 import User, UserRole
+from app.services.route_archive import RouteArchiver, decode_polyline
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+pytestmark = pytest.mark.asyncio
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+async def _trip_with_points(
+    async_session: AsyncSession, points: int
+) -> tuple[Booking, dict[str, str]]:
+    user = User(
+        email=f"route{uuid.uuid4().hex}@example.com",
+        full_name="Route",
+        hashed_password=hash_password("pass"),
+        role=UserRole.CUSTOMER,
+    )
+    async_session.add(user)
+    await async_session.flush()
+    booking = Booking(
+        public_code=uuid.uuid4().hex[:6].upper(),
+        customer_id=user.id,
+        pickup_address="A",
+        pickup_lat=-27.47,
+        pickup_lng=153.02,
+        dropoff_address="B",
+        dropoff_lat=-27.47,
+        dropoff_lng=153.05,
+        pickup_when=START,
+        passengers=1,
+        estimated_price_cents=1000,
+        deposit_required_cents=500,
+        status=BookingStatus.COMPLETED,
+    )
+    async_session.add(booking)
+    await async_session.flush()
+    async_session.add(
+        Trip(
+            booking_id=booking.id,
+            started_at=START,
+            ended_at=START + timedelta(seconds=points - 1),
+        )
+    )
+    async_session.add_all(
+        RoutePoint(
+            booking_id=booking.id,
+            ts=START + timedelta(seconds=i),
+            lat=-27.47 + (i % 2) * 0.001,
+            lng=153.02 + i * 0.0001,
+        )
+        for i in range(points)
+    )
+    await async_session.commit()
+    return booking, {"Authorization": f"Bearer {create_jwt_token(user.id)}"}
+
+
+async def test_route_streams_raw_points_before_compaction(
+    client: AsyncClient, async_session: AsyncSession
+):
+    booking, headers = await _trip_with_points(async_session, 2500)
+    url = f"/api/v1/bookings/{booking.id}/route"
+
+    res = await client.get(url, params={"format": "ndjson"}, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert len(lines) == 2500
+    assert lines[0] == {"ts": START.isoformat(), "lat": -27.47, "lng": 153.02}
+
+    res = await client.get(url, headers=headers)
+    path = decode_polyline(res.text)
+    assert len(path) == 2500
+    assert path[-1] == pytest.approx((-27.469, 153.2699))
+
+    etag = res.headers["etag"]
+    res = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+
+
+async def test_route_serves_archive_with_ranges(
+    client: AsyncClient, async_session: AsyncSession
+):
+    booking, headers = await _trip_with_points(async_session, 50)
+    await RouteArchiver(AsyncSessionLocal, delay_s=0).run_once()
+    url = f"/api/v1/bookings/{booking.id}/route"
+
+    res = await client.get(url, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["accept-ranges"] == "bytes"
+    full = res.content
+    etag = res.headers["etag"]
+
+    res = await client.get(url, headers={**headers, "Range": "bytes=4-"})
+    assert res.status_code == 206
+    assert res.content == full[4:]
+    assert res.headers["content-range"] == f"bytes 4-{len(full) - 1}/{len(full)}"
+
+    res = await client.get(
+        url, headers={**headers, "Range": "bytes=0-3", "If-Range": '"stale"'}
+    )
+    assert res.status_code == 200 and res.content == full
+
+    res = await client.get(url, headers={**headers, "Range": f"bytes={len(full)}-"})
+    assert res.status_code == 416
+
+    res = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+
+
+async def test_route_hidden_from_other_customers(
+    client: AsyncClient, async_session: AsyncSession, admin_headers
+):
+    booking, _ = await _trip_with_points(async_session, 3)
+    _, other = await _trip_with_points(async_session, 3)
+    url = f"/api/v1/bookings/{booking.id}/route"
+    assert (await client.get(url, headers=other)).status_code == 404
+    assert (await client.get(url, headers=admin_headers)).status_code == 200
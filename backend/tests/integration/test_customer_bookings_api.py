@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -45,3 +46,73 @@ async def test_list_my_bookings(client: AsyncClient, async_session: AsyncSession
     data = res.json()
     assert len(data) == 1
     assert data[0]["id"] == str(booking.id)
+
+
+async def test_list_my_bookings_keyset_pages(
+    client: AsyncClient, async_session: AsyncSession
+):
+    user = User(
+        email=f"pages{uuid.uuid4()}@example.com",
+        full_name="Pages",
+        hashed_password=hash_password("pass"),
+        role=UserRole.CUSTOMER,
+    )
+    async_session.add(user)
+    await async_session.flush()
+    for i in range(5):
+        async_session.add(
+            Booking(
+                public_code=uuid.uuid4().hex[:8],
+                customer_id=user.id,
+                pickup_address="A",
+                pickup_lat=1.0,
+                pickup_lng=2.0,
+                dropoff_address="B",
+                dropoff_lat=3.0,
+                dropoff_lng=4.0,
+                pickup_when=datetime.now(timezone.utc) + timedelta(days=i + 1),
+                passengers=1,
+                estimated_price_cents=1000,
+                deposit_required_cents=500,
+                status=BookingStatus.COMPLETED if i == 0 else BookingStatus.PENDING,
+            )
+        )
+    await async_session.commit()
+
+    headers = {"Authorization": f"Bearer {create_jwt_token(user.id)}"}
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    pages = 0
+    while True:
+        res = await client.get(
+            "/api/v1/customers/me/bookings", headers=headers, params=params
+        )
+        assert res.status_code == 200
+        seen.extend(b["id"] for b in res.json())
+        pages += 1
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "cursor": cursor}
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 5
+
+    # Without a cursor or limit the whole listing comes back in one response.
+    res = await client.get("/api/v1/customers/me/bookings", headers=headers)
+    assert [b["id"] for b in res.json()] == seen
+    assert "X-Next-Cursor" not in res.headers
+
+    res = await client.get(
+        "/api/v1/customers/me/bookings",
+        headers=headers,
+        params={"status": "COMPLETED"},
+    )
+    assert len(res.json()) == 1
+
+    res = await client.get(
+        "/api/v1/customers/me/bookings",
+        headers=headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert res.status_code == 400
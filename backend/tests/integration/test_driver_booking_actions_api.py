@@ -12,7 +12,9 @@ from app.models.user_v2 import User, UserRole
 pytestmark = pytest.mark.asyncio
 
 
-async def _create_booking(async_session) -> Booking:
+async def _create_booking(
+    async_session, status: BookingStatus = BookingStatus.PENDING
+) -> Booking:
     user = User(
         email=f"c{uuid.uuid4()}@example.com",
         full_name="C",
@@ -36,7 +38,7 @@ async def _create_booking(async_session) -> Booking:
         passengers=1,
         estimated_price_cents=1000,
         deposit_required_cents=500,
-        status=BookingStatus.PENDING,
+        status=status,
     )
     async_session.add(booking)
     await async_session.commit()
@@ -72,6 +74,46 @@ async def test_driver_confirm_booking(
     await async_session.refresh(booking)
     assert booking.status == BookingStatus.DRIVER_CONFIRMED
     assert booking.deposit_payment_intent_id == "pi_test"
+    assert booking.leave_at is not None
+
+
+async def test_driver_list_uses_stored_leave_at(
+    async_session, client: AsyncClient, monkeypatch: MonkeyPatch, admin_headers
+):
+    stored = await _create_booking(async_session, BookingStatus.DRIVER_CONFIRMED)
+    stored.leave_at = stored.pickup_when - timedelta(minutes=30)
+    missing = await _create_booking(async_session, BookingStatus.DRIVER_CONFIRMED)
+    await async_session.commit()
+
+    calls = {"count": 0}
+
+    async def fake_route(*args, **kwargs):
+        calls["count"] += 1
+        return (10, 20)
+
+    monkeypatch.setattr("app.services.routing.estimate_route", fake_route)
+
+    res = await client.get(
+        "/api/v1/driver/bookings",
+        params={"status": "DRIVER_CONFIRMED"},
+        headers=admin_headers,
+    )
+    assert res.status_code == 200
+    by_id = {b["id"]: b for b in res.json()}
+    assert by_id[str(stored.id)]["leave_at"] is not None
+    assert by_id[str(missing.id)]["leave_at"] is not None
+    await async_session.refresh(missing)
+    assert missing.leave_at is not None
+
+    # Every confirmed booking now has a stored leave time.
+    calls["count"] = 0
+    res = await client.get(
+        "/api/v1/driver/bookings",
+        params={"status": "DRIVER_CONFIRMED"},
+        headers=admin_headers,
+    )
+    assert res.status_code == 200
+    assert calls["count"] == 0
 
 
 async def test_driver_decline_booking(
@@ -88,3 +130,39 @@ async def test_driver_decline_booking(
 
     await async_session.refresh(booking)
     assert booking.status == BookingStatus.DECLINED
+
+
+async def test_driver_plan_batches_leave_at_and_fares(
+    async_session, client: AsyncClient, monkeypatch: MonkeyPatch, admin_headers
+):
+    pending = await _create_booking(async_session)
+    confirmed = await _create_booking(async_session, BookingStatus.DRIVER_CONFIRMED)
+
+    calls = []
+
+    async def fake_routes(legs):
+        calls.append(legs)
+        return [(10.0, 20.0) for _ in legs]
+
+    monkeypatch.setattr("app.services.routing.estimate_routes", fake_routes)
+
+    res = await client.get(
+        "/api/v1/driver/bookings/plan",
+        params={
+            "pickup_from": (pending.pickup_when - timedelta(hours=1)).isoformat(),
+            "pickup_to": (pending.pickup_when + timedelta(hours=1)).isoformat(),
+        },
+        headers=admin_headers,
+    )
+    assert res.status_code == 200
+    plans = {p["booking_id"]: p for p in res.json()}
+    assert {str(pending.id), str(confirmed.id)} <= set(plans)
+    # One batch: a base -> pickup and a pickup -> dropoff leg per booking.
+    assert len(calls) == 1
+    assert len(calls[0]) == 2 * len(plans)
+    plan = plans[str(pending.id)]
+    assert plan["distance_km"] == 10.0
+    assert plan["estimated_price_cents"] == 0  # admin_headers sets zero rates
+    leave_at = datetime.fromisoformat(plan["leave_at"]).replace(tzinfo=None)
+    pickup_when = pending.pickup_when.replace(tzinfo=None)
+    assert leave_at == pickup_when - timedelta(minutes=25)
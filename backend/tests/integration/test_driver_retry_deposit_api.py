@@ -88,3 +88,37 @@ async def test_retry_deposit_creates_new_intent(
     await async_session.refresh(booking)
     assert booking.status is BookingStatus.DRIVER_CONFIRMED
     assert booking.deposit_payment_intent_id == "pi_retry"
+
+
+async def test_declined_deposit_retries_with_new_idempotency_key(
+    async_session, client: AsyncClient, monkeypatch: MonkeyPatch, admin_headers
+):
+    booking = await _create_booking(async_session)
+    keys: list[str] = []
+
+    class FakePI:
+        id = "pi_after_decline"
+
+    def charge(_amount, _booking_id, **kwargs):
+        keys.append(kwargs["idempotency_key"])
+        if len(keys) == 1:
+            raise stripe.error.CardError("declined", None, "card_declined")
+        return FakePI()
+
+    async def fake_route(*args, **kwargs):
+        return (0, 0)
+
+    monkeypatch.setattr("app.services.stripe_client.charge_deposit", charge)
+    monkeypatch.setattr("app.services.routing.estimate_route", fake_route)
+
+    url = f"/api/v1/driver/bookings/{booking.id}/confirm"
+    res = await client.post(url, headers=admin_headers)
+    assert res.status_code == 402
+
+    res = await client.post(url, headers=admin_headers)
+    assert res.status_code == 200
+    await async_session.refresh(booking)
+    assert booking.status is BookingStatus.DRIVER_CONFIRMED
+    assert booking.deposit_payment_intent_id == "pi_after_decline"
+    # Reusing the first key would have Stripe replay the saved decline.
+    assert len(set(keys)) == 2
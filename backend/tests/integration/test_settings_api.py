@@ -108,3 +108,41 @@ async def test_put_settings_updates_values(
     resp_data = get_resp.json()
     for k, v in new_values.model_dump(exclude={"admin_user_id"}).items():
         assert resp_data[k] == v
+
+
+@pytest.mark.asyncio
+async def test_put_landmarks_replaces_and_indexes(
+    client: AsyncClient, admin_headers: Dict[str, str]
+):
+    from app.services.gazetteer import gazetteer
+
+    landmark = {
+        "name": "Howard Smith Wharves",
+        "address": "5 Boundary St, Brisbane City QLD 4000",
+        "lat": -27.4634,
+        "lng": 153.0356,
+    }
+    resp = await client.put(
+        "/settings/landmarks", headers=admin_headers, json=[landmark]
+    )
+    assert resp.status_code == 200
+    [stored] = resp.json()
+    assert stored["name"] == landmark["name"]
+
+    get_resp = await client.get("/settings/landmarks")
+    assert get_resp.json() == [stored]
+    assert gazetteer.search("howard smith wharves")[0]["place_id"] == (
+        f"landmark:{stored['id']}"
+    )
+
+    cleared = await client.put("/settings/landmarks", headers=admin_headers, json=[])
+    assert cleared.json() == []
+    assert gazetteer.search("howard smith wharves") == []
+
+
+@pytest.mark.asyncio
+async def test_put_landmarks_requires_admin(
+    client: AsyncClient, user_headers: Dict[str, str]
+):
+    resp = await client.put("/settings/landmarks", headers=user_headers, json=[])
+    assert resp.status_code == 403
@@ -2,7 +2,6 @@ import asyncio
 import json
 import uuid
 from datetime import datetime, timedelta, timezone
-from unittest.mock import AsyncMock
 
 import pytest
 from starlette.testclient import TestClient
@@ -10,7 +9,7 @@ from starlette.testclient import TestClient
 from app.core.security import create_jwt_token, hash_password
 from app.main import app
 from app.models.booking import Booking, BookingStatus
-from app.models.notification import NotificationType
+from app.models.notification import Notification, NotificationRole, NotificationType
 from app.models.settings import AdminConfig
 from app.models.trip import Trip
 from app.models.user_v2 import User, UserRole
@@ -91,9 +90,8 @@ async def test_first_location_update_sets_on_the_way(async_session):
 
 
 async def test_approaching_pickup_sets_arrived_pickup(async_session, mocker):
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     driver, booking = await _create_booking(async_session, BookingStatus.ON_THE_WAY)
     token = create_jwt_token(driver.id)
@@ -109,17 +107,16 @@ async def test_approaching_pickup_sets_arrived_pickup(async_session, mocker):
     await async_session.refresh(booking)
     assert booking.status is BookingStatus.ARRIVED_PICKUP
     await asyncio.sleep(0)
-    dispatch.assert_awaited()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.ARRIVED_PICKUP
+    submit.assert_called()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.ARRIVED_PICKUP
 
 
 async def test_approaching_dropoff_sets_arrived_dropoff(async_session, mocker):
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     driver, booking = await _create_booking(async_session, BookingStatus.IN_PROGRESS)
     token = create_jwt_token(driver.id)
@@ -135,8 +132,38 @@ async def test_approaching_dropoff_sets_arrived_dropoff(async_session, mocker):
     await async_session.refresh(booking)
     assert booking.status is BookingStatus.ARRIVED_DROPOFF
     await asyncio.sleep(0)
-    dispatch.assert_awaited()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.ARRIVED_DROPOFF
+    submit.assert_called()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.ARRIVED_DROPOFF
+
+
+async def test_watchers_receive_throttled_live_fare(async_session, monkeypatch):
+    from app.services.fare_meter import fare_meter
+
+    driver, booking = await _create_booking(async_session, BookingStatus.IN_PROGRESS)
+    cfg = await async_session.get(AdminConfig, 1)
+    cfg.flagfall = 5
+    await async_session.commit()
+    monkeypatch.setattr(fare_meter, "interval_s", 0.0)
+    token = create_jwt_token(driver.id)
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            f"/ws/bookings/{booking.id}/watch?token={token}"
+        ) as watch, client.websocket_connect(
+            f"/ws/bookings/{booking.id}?token={token}"
+        ) as ws:
+            assert watch.receive_json()["type"] == "snapshot"
+            # One frame at a time; queued positions would be coalesced.
+            ws.send_text(json.dumps({"lat": -27.05, "lng": 153.05, "ts": 1}))
+            messages = [watch.receive_json()]
+            ws.send_text(json.dumps({"lat": -27.05, "lng": 153.06, "ts": 61}))
+            messages += [watch.receive_json() for _ in range(2)]
+    # The first frame only opens the throttle window; the fare for the
+    # second frame follows that frame.
+    assert [m.get("ts") for m in messages[:2]] == [1, 61]
+    assert messages[2]["type"] == "fare"
+    assert messages[2]["fare_cents"] == 500
+    assert messages[2]["duration_min"] == 1.0
+    assert messages[2]["distance_km"] == pytest.approx(0.99, abs=0.01)
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1 import driver_bookings
 from app.core.security import hash_password
 from app.models.booking import Booking, BookingStatus
-from app.models.notification import NotificationType
+from app.models.notification import Notification, NotificationRole, NotificationType
 from app.models.user_v2 import User, UserRole
 
 pytestmark = pytest.mark.asyncio
@@ -47,9 +47,8 @@ async def _make_booking(async_session: AsyncSession, status: BookingStatus) -> B
 
 async def test_confirm_booking_dispatch(async_session: AsyncSession, mocker) -> None:
     booking = await _make_booking(async_session, BookingStatus.PENDING)
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     mocker.patch(
         "app.services.booking_service.confirm_booking",
@@ -69,18 +68,17 @@ async def test_confirm_booking_dispatch(async_session: AsyncSession, mocker) ->
     await driver_bookings.confirm_booking(booking.id, db=async_session)
     await asyncio.sleep(0)
 
-    dispatch.assert_awaited_once()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.CONFIRMATION
+    submit.assert_called_once()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.CONFIRMATION
 
 
 async def test_leave_booking_dispatch(async_session: AsyncSession, mocker) -> None:
     booking = await _make_booking(async_session, BookingStatus.DRIVER_CONFIRMED)
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     mocker.patch(
         "app.services.booking_service.leave_booking",
@@ -91,18 +89,17 @@ async def test_leave_booking_dispatch(async_session: AsyncSession, mocker) -> No
     await driver_bookings.leave_booking(booking.id, db=async_session)
     await asyncio.sleep(0)
 
-    dispatch.assert_awaited_once()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.ON_THE_WAY
+    submit.assert_called_once()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.ON_THE_WAY
 
 
 async def test_start_trip_dispatch(async_session: AsyncSession, mocker) -> None:
     booking = await _make_booking(async_session, BookingStatus.ARRIVED_PICKUP)
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     mocker.patch(
         "app.services.booking_service.start_trip",
@@ -114,19 +111,18 @@ async def test_start_trip_dispatch(async_session: AsyncSession, mocker) -> None:
     await driver_bookings.start_trip(booking.id, db=async_session)
     await asyncio.sleep(0)
 
-    dispatch.assert_awaited_once()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.STARTED
+    submit.assert_called_once()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.STARTED
 
 
 async def test_complete_booking_dispatch(async_session: AsyncSession, mocker) -> None:
     booking = await _make_booking(async_session, BookingStatus.IN_PROGRESS)
     booking.final_price_cents = 1000
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
     mocker.patch(
         "app.services.booking_service.complete_booking",
@@ -138,8 +134,8 @@ async def test_complete_booking_dispatch(async_session: AsyncSession, mocker) ->
     await driver_bookings.complete_booking(booking.id, db=async_session)
     await asyncio.sleep(0)
 
-    dispatch.assert_awaited_once()
-    call = dispatch.await_args_list[0]
-    assert call.kwargs["to_user_id"] == booking.customer_id
-    assert call.kwargs["to_role"] is UserRole.CUSTOMER
-    assert call.kwargs["notif_type"] is NotificationType.COMPLETED
+    submit.assert_called_once()
+    note = await async_session.get(Notification, submit.call_args_list[0].args[0])
+    assert note.to_user_id == booking.customer_id
+    assert note.to_role is NotificationRole.CUSTOMER
+    assert note.type is NotificationType.COMPLETED
@@ -111,12 +111,14 @@ async def test_driver_and_owner_channels(async_session):
         ) as driver_ws, client.websocket_connect(
             f"/ws/bookings/{booking.id}/watch?token={customer_token}"
         ) as owner_ws:
+            assert owner_ws.receive_json()["type"] == "snapshot"
             payload = {"lat": 1.0, "lng": 2.0, "ts": 1}
             driver_ws.send_text(json.dumps(payload))
             assert owner_ws.receive_json() == payload
             assert driver_ws.receive_json() == payload
 
             owner_ws.send_text(json.dumps({"lat": 9, "lng": 9, "ts": 1}))
+            driver_ws.send_text("not json")  # dropped, never republished
             payload2 = {"lat": 3.0, "lng": 4.0, "ts": 2}
             driver_ws.send_text(json.dumps(payload2))
             assert owner_ws.receive_json() == payload2
@@ -132,6 +134,61 @@ async def test_admin_can_watch_booking(async_session):
         ) as driver_ws, client.websocket_connect(
             f"/ws/bookings/{booking.id}/watch?token={driver_token}"
         ) as admin_ws:
+            assert admin_ws.receive_json()["type"] == "snapshot"
             payload = {"lat": 5.0, "lng": 6.0, "ts": 3}
             driver_ws.send_text(json.dumps(payload))
             assert admin_ws.receive_json() == payload
+
+
+async def test_late_watcher_receives_snapshot(async_session):
+    driver, customer, booking = await _prepare_data(async_session)
+    driver_token = create_jwt_token(driver.id)
+    customer_token = create_jwt_token(customer.id)
+
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            f"/ws/bookings/{booking.id}?token={driver_token}"
+        ) as driver_ws:
+            frames = [{"lat": 1.0, "lng": 2.0 + i, "ts": i} for i in range(3)]
+            for frame in frames:
+                driver_ws.send_text(json.dumps(frame))
+                driver_ws.receive_json()
+            with client.websocket_connect(
+                f"/ws/bookings/{booking.id}/watch?token={customer_token}"
+            ) as owner_ws:
+                snapshot = owner_ws.receive_json()
+
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["booking"]["id"] == str(booking.id)
+    assert snapshot["status"] == "IN_PROGRESS"
+    assert snapshot["points"] == frames
+    assert snapshot["position"] == frames[-1]
+
+
+async def test_binary_location_frames(async_session):
+    from app.services import location_frames
+
+    driver, customer, booking = await _prepare_data(async_session)
+    driver_token = create_jwt_token(driver.id)
+    customer_token = create_jwt_token(customer.id)
+    binary = [location_frames.SUBPROTOCOL]
+
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            f"/ws/bookings/{booking.id}?token={driver_token}", subprotocols=binary
+        ) as driver_ws, client.websocket_connect(
+            f"/ws/bookings/{booking.id}/watch?token={customer_token}",
+            subprotocols=binary,
+        ) as binary_ws, client.websocket_connect(
+            f"/ws/bookings/{booking.id}/watch?token={customer_token}"
+        ) as json_ws:
+            assert driver_ws.accepted_subprotocol == location_frames.SUBPROTOCOL
+            assert json_ws.accepted_subprotocol is None
+            binary_ws.receive_json()
+            json_ws.receive_json()
+
+            frame = {"lat": 1.5, "lng": 2.25, "ts": 7.0, "speed": 12.5}
+            driver_ws.send_bytes(location_frames.encode(frame))
+            assert location_frames.decode(binary_ws.receive_bytes()) == frame
+            assert json_ws.receive_json() == frame
+            assert location_frames.decode(driver_ws.receive_bytes()) == frame
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.core.broadcast import ChannelHistory, LocalHubBackend, create_broadcast
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_local_hub_delivers_across_instances():
+    worker_a = create_broadcast("local://workers")
+    worker_b = create_broadcast("local://workers")
+    other = create_broadcast("local://elsewhere")
+    assert isinstance(worker_a._backend, LocalHubBackend)
+
+    for b in (worker_a, worker_b, other):
+        await b.connect()
+    try:
+        async with worker_b.subscribe("booking:1") as sub_b, other.subscribe(
+            "booking:1"
+        ) as sub_other:
+            await worker_a.publish("booking:1", "hello")
+            event = await asyncio.wait_for(sub_b.get(), timeout=1)
+            assert event.message == "hello"
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(sub_other.get(), timeout=0.05)
+
+            # History is kept by the receiving worker, not the publisher.
+            await worker_a.publish("booking:1", '{"lat": 1.0, "lng": 2.0}')
+            await asyncio.wait_for(sub_b.get(), timeout=1)
+            assert worker_b.history.snapshot("booking:1")["points"] == [
+                {"lat": 1.0, "lng": 2.0}
+            ]
+            assert worker_a.history.snapshot("booking:1") == {"points": []}
+    finally:
+        for b in (worker_a, worker_b, other):
+            await b.disconnect()
+
+
+async def test_channel_history_keeps_latest_state_and_recent_points():
+    history = ChannelHistory(points=2, max_channels=1)
+    history.record("booking:1", '{"id": "1", "status": "ON_THE_WAY"}')
+    for ts in range(3):
+        history.record("booking:1", {"lat": 1.0, "lng": 2.0, "ts": ts})
+    history.record("booking:1", '{"status": "IN_PROGRESS"}')
+    history.record("booking:1", '{"type": "fare", "fare_cents": 700}')
+    history.record("booking:1", "not json")
+
+    snapshot = history.snapshot("booking:1")
+    assert [p["ts"] for p in snapshot["points"]] == [1, 2]
+    assert snapshot["status"] == {"id": "1", "status": "IN_PROGRESS"}
+    assert snapshot["fare"]["fare_cents"] == 700
+
+    history.record("booking:2", '{"status": "ON_THE_WAY"}')
+    assert history.snapshot("booking:1") == {"points": []}
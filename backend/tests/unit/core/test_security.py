@@ -1,6 +1,11 @@
+import asyncio
 import uuid
 
+import pytest
+
 from app.core.security import (
+    PasswordHasher,
+    PasswordHasherBusy,
     create_jwt_token,
     decode_token,
     hash_password,
@@ -40,3 +45,20 @@ def test_decode_token_invalid():
         assert False, "Expected ValueError for invalid token"
     except ValueError as e:
         assert "invalid or expired" in str(e).lower()
+
+
+async def test_password_hasher_runs_off_loop_and_rejects_when_saturated():
+    hasher = PasswordHasher(workers=1, queue_timeout_s=0.01)
+    try:
+        hashed = await hasher.hash("mysecret")
+        assert await hasher.verify("mysecret", hashed) is True
+
+        # With the only worker busy, a second caller gives up after the timeout.
+        first = asyncio.create_task(hasher.verify("mysecret", hashed))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.verify("mysecret", hashed)
+        assert await first is True
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
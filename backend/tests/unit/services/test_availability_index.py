@@ -0,0 +1,143 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete
+
+from app.models.availability_slot import AvailabilitySlot
+from app.services.availability_index import (
+    AvailabilityIndex,
+    IndexedSlot,
+    overlaps_in_db,
+)
+
+BASE = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _slot(slot_id: int, start_h: float, end_h: float, reason=None) -> IndexedSlot:
+    return IndexedSlot(
+        slot_id,
+        BASE + timedelta(hours=start_h),
+        BASE + timedelta(hours=end_h),
+        reason,
+    )
+
+
+def _at(hours: float) -> datetime:
+    return BASE + timedelta(hours=hours)
+
+
+def test_overlap_accounts_for_long_slots():
+    index = AvailabilityIndex()
+    index.extend([_slot(1, 0, 48), _slot(2, 50, 51), _slot(3, 60, 61)])
+
+    assert [s.id for s in index.overlapping(_at(40), _at(50.5))] == [1, 2]
+    assert index.overlaps(_at(47), _at(49))
+    # Touching endpoints do not overlap.
+    assert not index.overlaps(_at(48), _at(50))
+    assert not index.overlaps(_at(51), _at(60))
+
+
+def test_tree_matches_linear_scan_with_long_slots():
+    rng = random.Random(7)
+    slots = [_slot(1, 0, 3 * 365 * 24)]  # one block spanning three years
+    for slot_id in range(2, 400):
+        start = rng.uniform(0, 1000)
+        slots.append(_slot(slot_id, start, start + rng.uniform(0.5, 8)))
+    index = AvailabilityIndex()
+    index.extend(slots[:200])
+    for slot in slots[200:]:
+        index.add(slot)
+
+    for _ in range(200):
+        a = rng.uniform(-10, 1100)
+        b = a + rng.uniform(0.1, 6)
+        expected = sorted(
+            (s for s in slots if s.start < _at(b) and s.end > _at(a)),
+            key=lambda s: (s.start, s.id),
+        )
+        assert index.overlapping(_at(a), _at(b)) == expected
+        assert index.overlaps(_at(a), _at(b)) == bool(expected)
+
+
+def test_naive_datetimes_are_treated_as_utc():
+    index = AvailabilityIndex()
+    index.add(
+        IndexedSlot(1, datetime(2030, 1, 1, 10), datetime(2030, 1, 1, 11), None)
+    )
+    assert index.overlaps(_at(10.5), _at(12))
+
+
+def test_free_windows_and_month_view():
+    index = AvailabilityIndex()
+    index.extend(
+        [
+            _slot(1, 1, 3, "Maintenance"),
+            _slot(2, 2, 4, "BOOKING:abc"),
+            _slot(3, 4.5, 5),
+        ]
+    )
+
+    assert index.free_windows(_at(0), _at(6)) == [
+        (_at(0), _at(1)),
+        (_at(4), _at(4.5)),
+        (_at(5), _at(6)),
+    ]
+    assert index.free_windows(_at(0), _at(6), timedelta(minutes=45)) == [
+        (_at(0), _at(1)),
+        (_at(5), _at(6)),
+    ]
+    assert [s.id for s in index.month_view(_at(0), _at(6))] == [1, 3]
+
+
+def test_add_is_idempotent():
+    index = AvailabilityIndex()
+    index.add(_slot(1, 0, 1))
+    index.add(_slot(1, 0, 1))
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_loads_new_rows_and_rebuilds_after_delete(async_session):
+    """Only MAX(id) is checked; ORM deletes invalidate the index on commit."""
+    await async_session.execute(delete(AvailabilitySlot))
+    first = AvailabilitySlot(start_dt=_at(0), end_dt=_at(1), reason="a")
+    async_session.add(first)
+    await async_session.commit()
+
+    index = AvailabilityIndex()
+    assert await index.sync(async_session) == 1
+    assert await index.sync(async_session) == 0
+
+    second = AvailabilitySlot(start_dt=_at(2), end_dt=_at(3), reason="b")
+    async_session.add(second)
+    await async_session.commit()
+    assert await index.sync(async_session) == 1
+    assert index.overlaps(_at(2.5), _at(4))
+
+    await async_session.execute(
+        delete(AvailabilitySlot).where(AvailabilitySlot.id == first.id)
+    )
+    await async_session.commit()
+    await index.sync(async_session)
+    assert len(index) == 1
+    assert not index.overlaps(_at(0), _at(1))
+
+
+@pytest.mark.asyncio
+async def test_db_check_sees_rows_committed_out_of_id_order(async_session):
+    """A row below the index's watermark is missed by sync but not by the DB."""
+    await async_session.execute(delete(AvailabilitySlot))
+    async_session.add(AvailabilitySlot(id=10, start_dt=_at(0), end_dt=_at(1)))
+    await async_session.commit()
+    index = AvailabilityIndex()
+    await index.sync(async_session)
+
+    # Allocated before id 10 but committed after it.
+    async_session.add(AvailabilitySlot(id=5, start_dt=_at(2), end_dt=_at(3)))
+    await async_session.commit()
+    await index.sync(async_session)
+
+    assert not index.overlaps(_at(2), _at(3))
+    assert await overlaps_in_db(async_session, _at(2.5), _at(4))
+    assert not await overlaps_in_db(async_session, _at(1), _at(2))
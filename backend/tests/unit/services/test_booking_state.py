@@ -0,0 +1,72 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.booking import BookingStatus
+from app.services import booking_updates
+from app.services.booking_state import BookingStateCache, booking_state_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+def _booking(status: BookingStatus) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        customer_id=uuid.uuid4(),
+        status=status,
+        pickup_lat=-27.0,
+        pickup_lng=153.0,
+        dropoff_lat=-27.1,
+        dropoff_lng=153.1,
+    )
+
+
+async def test_update_and_get_counts_hits_and_misses():
+    cache = BookingStateCache()
+    booking = _booking(BookingStatus.DRIVER_CONFIRMED)
+
+    assert cache.get(booking.id) is None
+    cache.update(booking)
+    state = cache.get(booking.id)
+
+    assert state.status is BookingStatus.DRIVER_CONFIRMED
+    assert state.pickup_lat == -27.0
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+async def test_terminal_status_evicts_booking():
+    cache = BookingStateCache()
+    booking = _booking(BookingStatus.ARRIVED_DROPOFF)
+    cache.update(booking)
+
+    booking.status = BookingStatus.COMPLETED
+    state = cache.update(booking)
+
+    assert state.status is BookingStatus.COMPLETED
+    assert cache.stats()["size"] == 0
+
+
+async def test_apply_event_only_moves_status_forward():
+    cache = BookingStateCache()
+    booking = _booking(BookingStatus.ARRIVED_PICKUP)
+    cache.update(booking)
+
+    cache.apply_event(booking.id, json.dumps({"status": "ON_THE_WAY"}))
+    assert cache.get(booking.id).status is BookingStatus.ARRIVED_PICKUP
+
+    cache.apply_event(booking.id, json.dumps({"lat": 1, "lng": 2, "ts": 3}))
+    cache.apply_event(booking.id, json.dumps({"status": "IN_PROGRESS"}))
+    assert cache.get(booking.id).status is BookingStatus.IN_PROGRESS
+
+
+async def test_send_booking_update_refreshes_cache(mocker):
+    mocker.patch.object(booking_updates.broadcast, "publish", mocker.AsyncMock())
+    mocker.patch.object(booking_updates.broadcast, "_listener_task", object())
+    booking = _booking(BookingStatus.ON_THE_WAY)
+
+    await booking_updates.send_booking_update(booking)
+
+    assert booking_state_cache.get(booking.id).status is BookingStatus.ON_THE_WAY
+    booking_state_cache.discard(booking.id)
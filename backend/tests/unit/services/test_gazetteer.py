@@ -0,0 +1,110 @@
+import httpx
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from app.schemas.landmark import LandmarkRead
+from app.services import geocode_service
+from app.services.gazetteer import Gazetteer
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(scope="module")
+def au_gazetteer() -> Gazetteer:
+    gazetteer = Gazetteer()
+    gazetteer.load_airports(["AU"])
+    return gazetteer
+
+
+async def test_airports_match_by_code_name_and_prefix(au_gazetteer: Gazetteer):
+    for query in ("BNE", "bne", "Brisbane Airport", "brisbane internationa"):
+        results = au_gazetteer.search(query)
+        assert results[0]["place_id"] == "iata:BNE", query
+        assert results[0]["lat"] == pytest.approx(-27.38, abs=0.01)
+    assert au_gazetteer.search("Sydney Airport")[0]["place_id"] == "iata:SYD"
+
+
+async def test_weak_matches_are_left_to_google(au_gazetteer: Gazetteer):
+    assert au_gazetteer.search("Bris") == []
+    assert au_gazetteer.search("Brisbane") == []
+    assert au_gazetteer.search("12 Queen St") == []
+
+
+async def test_landmarks_are_searchable():
+    gazetteer = Gazetteer()
+    gazetteer.set_landmarks(
+        [
+            LandmarkRead(
+                id=7,
+                name="Emporium Hotel",
+                address="1000 Ann St",
+                lat=-27.45,
+                lng=153.03,
+            )
+        ]
+    )
+    assert gazetteer.search("emporium hotl") == [
+        {
+            "place_id": "landmark:7",
+            "name": "Emporium Hotel",
+            "address": "1000 Ann St",
+            "lat": -27.45,
+            "lng": 153.03,
+        }
+    ]
+
+
+async def test_search_geocode_answers_airports_locally(
+    monkeypatch: MonkeyPatch, mock_http, au_gazetteer: Gazetteer
+):
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("Google should not be called")
+
+    await mock_http(handler)
+    monkeypatch.setattr(geocode_service, "gazetteer", au_gazetteer)
+
+    for query in ("BNE", "YBBN", "Brisbane Airport"):
+        results = await geocode_service.search_geocode(query)
+        assert [r["place_id"] for r in results][:1] == ["iata:BNE"], query
+
+
+async def test_exact_only_for_codes_airport_queries_and_full_names(
+    au_gazetteer: Gazetteer,
+):
+    assert au_gazetteer.is_exact("MEL")
+    assert au_gazetteer.is_exact("Sunshine Coast Airport")
+    assert au_gazetteer.is_exact("brisbane international airport")
+    for query in ("mel", "syd", "per", "box", "Sunshine Coast", "Port Macquarie"):
+        assert not au_gazetteer.is_exact(query), query
+
+
+async def test_search_geocode_merges_gazetteer_ahead_of_google(
+    monkeypatch: MonkeyPatch, mock_http, au_gazetteer: Gazetteer
+):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "autocomplete" in request.url.path:
+            return httpx.Response(
+                200, json={"predictions": [{"place_id": "street-1"}]}
+            )
+        return httpx.Response(
+            200,
+            json={
+                "result": {
+                    "name": "Melba St",
+                    "formatted_address": "Melba St, Downer ACT, Australia",
+                    "geometry": {"location": {"lat": -35.24, "lng": 149.14}},
+                    "place_id": "street-1",
+                }
+            },
+        )
+
+    await mock_http(handler)
+    monkeypatch.setattr(geocode_service, "gazetteer", au_gazetteer)
+    monkeypatch.setattr(
+        geocode_service,
+        "get_settings",
+        lambda: type("S", (), {"google_maps_api_key": "KEY"})(),
+    )
+
+    results = await geocode_service.search_geocode("mel")
+    assert [r["place_id"] for r in results] == ["iata:MEL", "street-1"]
@@ -1,45 +1,29 @@
+import asyncio
 import logging
 import os
 
+import httpx
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
 from app.core.config import get_settings
 from app.core.logging import setup_logging
 from app.services import geocode_service
+from app.services.geocode_cache import autocomplete_cache
 
 pytestmark = pytest.mark.asyncio
 
 
-async def test_reverse_geocode_parses_label(monkeypatch: MonkeyPatch):
-    class DummyResp:
-        status_code = 200
+async def test_reverse_geocode_parses_label(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert "reverse" in request.url.path
+        assert request.url.params["point.lat"] == "1.0"
+        assert request.url.params["point.lon"] == "2.0"
+        return httpx.Response(
+            200, json={"features": [{"properties": {"label": "123 Fake St"}}]}
+        )
 
-        def raise_for_status(self) -> None:  # pragma: no cover - test dummy
-            return None
-
-        def json(self) -> dict:
-            return {"features": [{"properties": {"label": "123 Fake St"}}]}
-
-    class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None, headers=None):  # type: ignore[override]
-            assert "reverse" in url
-            assert params["point.lat"] == 1.0
-            assert params["point.lon"] == 2.0
-            return DummyResp()
-
-    monkeypatch.setattr(
-        geocode_service, "httpx", type("X", (), {"AsyncClient": DummyClient})
-    )
+    await mock_http(handler)
     monkeypatch.setattr(
         geocode_service, "get_settings", lambda: type("S", (), {"ors_api_key": "KEY"})()
     )
@@ -48,54 +32,28 @@ async def test_reverse_geocode_parses_label(monkeypatch: MonkeyPatch):
     assert addr == "123 Fake St"
 
 
-async def test_search_geocode_returns_details(monkeypatch: MonkeyPatch):
-    class AutoResp:
-        status_code = 200
-
-        def raise_for_status(self) -> None:  # pragma: no cover - test dummy
-            return None
-
-        def json(self) -> dict:
-            return {"predictions": [{"place_id": "sfo1"}]}
-
-    class DetailsResp:
-        status_code = 200
-
-        def raise_for_status(self) -> None:  # pragma: no cover - test dummy
-            return None
-
-        def json(self) -> dict:
-            return {
+async def test_search_geocode_returns_details(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if "autocomplete" in request.url.path:
+            assert params["input"] == "SFO"
+            assert params["components"] == "country:AU"
+            assert params["types"] == "address"
+            return httpx.Response(200, json={"predictions": [{"place_id": "sfo1"}]})
+        assert params["place_id"] == "sfo1"
+        return httpx.Response(
+            200,
+            json={
                 "result": {
                     "name": "San Francisco International Airport",
                     "formatted_address": "San Francisco International Airport, San Francisco, CA, USA",
                     "geometry": {"location": {"lat": 37.62, "lng": -122.38}},
                     "place_id": "sfo1",
                 }
-            }
-
-    class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None):  # type: ignore[override]
-            if "autocomplete" in url:
-                assert params["input"] == "SFO"
-                assert params["components"] == "country:AU"
-                assert params["types"] == "address"
-                return AutoResp()
-            assert params["place_id"] == "sfo1"
-            return DetailsResp()
+            },
+        )
 
-    monkeypatch.setattr(
-        geocode_service, "httpx", type("X", (), {"AsyncClient": DummyClient})
-    )
+    await mock_http(handler)
     monkeypatch.setattr(
         geocode_service,
         "get_settings",
@@ -114,32 +72,11 @@ async def test_search_geocode_returns_details(monkeypatch: MonkeyPatch):
     ]
 
 
-async def test_search_geocode_no_results(monkeypatch: MonkeyPatch):
-    class AutoResp:
-        status_code = 200
-
-        def raise_for_status(self) -> None:  # pragma: no cover - test dummy
-            return None
-
-        def json(self) -> dict:
-            return {"predictions": []}
-
-    class DummyClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None):  # type: ignore[override]
-            return AutoResp()
+async def test_search_geocode_no_results(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"predictions": []})
 
-    monkeypatch.setattr(
-        geocode_service, "httpx", type("X", (), {"AsyncClient": DummyClient})
-    )
+    await mock_http(handler)
     monkeypatch.setattr(
         geocode_service,
         "get_settings",
@@ -150,31 +87,62 @@ async def test_search_geocode_no_results(monkeypatch: MonkeyPatch):
     assert results == []
 
 
-async def test_reverse_geocode_debug_log(
-    monkeypatch: MonkeyPatch, capfd: pytest.CaptureFixture[str]
+async def test_search_geocode_coalesces_and_caches(
+    monkeypatch: MonkeyPatch, mock_http
 ):
-    class DummyResp:
-        status_code = 200
+    calls = {"autocomplete": 0, "details": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if "autocomplete" in request.url.path:
+            calls["autocomplete"] += 1
+            await asyncio.sleep(0.05)
+            return httpx.Response(
+                200, json={"predictions": [{"place_id": "a"}, {"place_id": "b"}]}
+            )
+        calls["details"] += 1
+        place_id = request.url.params["place_id"]
+        return httpx.Response(
+            200,
+            json={
+                "result": {
+                    "name": place_id,
+                    "formatted_address": place_id,
+                    "geometry": {"location": {"lat": 1.0, "lng": 2.0}},
+                    "place_id": place_id,
+                }
+            },
+        )
 
-        def raise_for_status(self) -> None:  # pragma: no cover - test dummy
-            return None
+    await mock_http(handler)
+    monkeypatch.setattr(
+        geocode_service,
+        "get_settings",
+        lambda: type("S", (), {"google_maps_api_key": "KEY"})(),
+    )
 
-        def json(self) -> dict:
-            return {"features": [{"properties": {"label": "123 Fake St"}}]}
+    first, second = await asyncio.gather(
+        geocode_service.search_geocode("1 Main St"),
+        geocode_service.search_geocode("1 main  st"),
+    )
+    assert first == second
+    assert calls == {"autocomplete": 1, "details": 2}
 
-    class DummyClient:
-        async def __aenter__(self):
-            return self
+    # Callers may mutate what they get back without touching the cache.
+    first[0]["name"] = "changed"
+    assert (await geocode_service.search_geocode("1 Main St"))[0]["name"] == "a"
+    assert calls == {"autocomplete": 1, "details": 2}
+    assert autocomplete_cache.stats()["coalesced"] == 1
 
-        async def __aexit__(self, *exc_info):
-            return None
 
-        async def get(self, url, params=None, headers=None):  # type: ignore[override]
-            return DummyResp()
+async def test_reverse_geocode_debug_log(
+    monkeypatch: MonkeyPatch, capfd: pytest.CaptureFixture[str], mock_http
+):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"features": [{"properties": {"label": "123 Fake St"}}]}
+        )
 
-    monkeypatch.setattr(
-        geocode_service, "httpx", type("X", (), {"AsyncClient": DummyClient})
-    )
+    await mock_http(handler)
     monkeypatch.setattr(
         geocode_service, "get_settings", lambda: type("S", (), {"ors_api_key": "KEY"})()
     )
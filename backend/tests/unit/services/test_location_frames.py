@@ -0,0 +1,15 @@
+from app.services import location_frames
+
+
+def test_round_trip_keeps_centimetre_precision():
+    frame = {"lat": -27.4698123, "lng": 153.0251456, "ts": 1700000000.25}
+    data = location_frames.encode(frame)
+    assert len(data) == 20
+    decoded = location_frames.decode(data)
+    assert decoded == frame
+    assert "speed" not in decoded
+
+
+def test_rejects_malformed_frames():
+    assert location_frames.decode(b"\x00" * 19) is None
+    assert location_frames.encode({"lat": 1.0, "lng": 2.0}) is None
@@ -1,17 +1,33 @@
+import json
 import uuid
+from datetime import datetime, timezone
 from types import SimpleNamespace
-from typing import Any
 
 import httpx
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
-from app.models.notification import NotificationType
-from app.models.user_v2 import UserRole
-from app.services.notifications import _send_onesignal, notification_map
-
-
-@pytest.mark.asyncio
-async def test_send_onesignal_uses_async_client(monkeypatch: MonkeyPatch):
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import hash_password
+from app.db.database import AsyncSessionLocal
+from app.models.notification import (
+    Notification,
+    NotificationRole,
+    NotificationStatus,
+    NotificationType,
+)
+from app.models.user_v2 import User, UserRole
+from app.services.notifications import (
+    NotificationDispatcher,
+    _send_onesignal,
+    notification_map,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def onesignal_settings(monkeypatch: MonkeyPatch):
     dummy_settings = SimpleNamespace(
         onesignal_app_id="aid",
         onesignal_api_key="key",
@@ -20,141 +36,107 @@ async def test_send_onesignal_uses_async_client(monkeypatch: MonkeyPatch):
         "app.services.notifications.get_settings", lambda: dummy_settings
     )
 
-    class Response:
-        def __init__(self, status_code=200, data=None):
-            self.status_code = status_code
-            self._data = data or {}
-
-        def json(self):
-            return self._data
-
-        def raise_for_status(self):
-            if self.status_code >= 400:
-                raise httpx.HTTPStatusError("error", request=None, response=None)
-
-    class DummyClient:
-        def __init__(self, *args, **kwargs):
-            self.calls = []
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
-
-        async def post(self, url, **kwargs):
-            self.calls.append((url, kwargs))
-            return Response(200)
-
-    dummy_client = DummyClient()
-    monkeypatch.setattr(httpx, "AsyncClient", lambda *args, **kwargs: dummy_client)
-
-    class DummyDB:
-        def __init__(self):
-            self.user = SimpleNamespace(
-                role=UserRole.DRIVER,
-                onesignal_player_id="tok",
-            )
-
-        async def get(self, model, pk):
-            return self.user
-
-    await _send_onesignal(
-        DummyDB(),
-        uuid.uuid4(),
-        UserRole.DRIVER,
-        NotificationType.ON_THE_WAY,
-        {"foo": "bar"},
-    )
-
-    assert len(dummy_client.calls) == 1
-    url, kwargs = dummy_client.calls[0]
-    assert "onesignal.com/api/v1/notifications" in url
-    assert kwargs["headers"]["Authorization"] == "Basic key"
-    assert kwargs["json"]["include_player_ids"] == ["tok"]
-    notif = kwargs["json"]["headings"]
-    assert notif == {"en": notification_map[NotificationType.ON_THE_WAY]["headings"]}
-    assert all(isinstance(v, str) for v in kwargs["json"]["data"].values())
-
 
-@pytest.mark.asyncio
-async def test_send_onesignal_skips_when_user_missing(monkeypatch: MonkeyPatch):
-    dummy_settings = SimpleNamespace(
-        onesignal_app_id="aid",
-        onesignal_api_key="key",
+async def _notify(
+    db: AsyncSession, player_id: str | None, payload: dict | None = None
+) -> Notification:
+    user = User(
+        email=f"user{uuid.uuid4().hex}@example.com",
+        full_name="User",
+        hashed_password=hash_password("pass"),
+        role=UserRole.CUSTOMER,
+        onesignal_player_id=player_id,
     )
-    monkeypatch.setattr(
-        "app.services.notifications.get_settings", lambda: dummy_settings
+    db.add(user)
+    await db.flush()
+    note = Notification(
+        type=NotificationType.ON_THE_WAY,
+        to_role=NotificationRole.CUSTOMER,
+        to_user_id=user.id,
+        payload=payload or {"booking_id": "b1"},
+        created_at=datetime.now(timezone.utc),
     )
+    db.add(note)
+    await db.commit()
+    return note
 
-    class DummyClient:
-        def __init__(self):
-            self.calls: list[tuple[str, dict[str, Any]]] = []
 
-        async def __aenter__(self):
-            return self
+async def test_send_onesignal_uses_async_client(onesignal_settings, mock_http):
+    calls: list[httpx.Request] = []
 
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={})
 
-        async def post(self, url, **kwargs):  # pragma: no cover - not expected
-            self.calls.append((url, kwargs))
-            return SimpleNamespace(
-                status_code=200, json=lambda: {}, raise_for_status=lambda: None
-            )
+    await mock_http(handler)
 
-    dummy_client = DummyClient()
-    monkeypatch.setattr(httpx, "AsyncClient", lambda *args, **kwargs: dummy_client)
+    await _send_onesignal(["tok1", "tok2"], NotificationType.ON_THE_WAY, {"foo": "bar"})
 
-    class DummyDB:
-        async def get(self, model, pk):
-            return None
+    assert len(calls) == 1
+    request = calls[0]
+    body = json.loads(request.content)
+    assert "onesignal.com/api/v1/notifications" in str(request.url)
+    assert request.headers["Authorization"] == "Basic key"
+    assert body["include_player_ids"] == ["tok1", "tok2"]
+    notif = body["headings"]
+    assert notif == {"en": notification_map[NotificationType.ON_THE_WAY]["headings"]}
+    assert all(isinstance(v, str) for v in body["data"].values())
 
-    await _send_onesignal(
-        DummyDB(), uuid.uuid4(), UserRole.DRIVER, NotificationType.ON_THE_WAY, {}
-    )
 
-    assert dummy_client.calls == []
+async def test_dispatcher_batches_recipients_and_skips_missing_players(
+    async_session: AsyncSession, onesignal_settings, mock_http
+):
+    marker = {"booking_id": uuid.uuid4().hex}
+    players = [f"tok-{uuid.uuid4().hex}" for _ in range(2)]
+    first = await _notify(async_session, players[0], marker)
+    second = await _notify(async_session, players[1], marker)
+    no_player = await _notify(async_session, None, marker)
 
+    requests: list[dict] = []
 
-@pytest.mark.asyncio
-async def test_send_onesignal_skips_when_player_missing(monkeypatch: MonkeyPatch):
-    dummy_settings = SimpleNamespace(
-        onesignal_app_id="aid",
-        onesignal_api_key="key",
-    )
-    monkeypatch.setattr(
-        "app.services.notifications.get_settings", lambda: dummy_settings
-    )
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"id": "n1"})
 
-    class DummyClient:
-        def __init__(self):
-            self.calls: list[tuple[str, dict[str, Any]]] = []
+    await mock_http(handler)
 
-        async def __aenter__(self):
-            return self
+    dispatcher = NotificationDispatcher(AsyncSessionLocal)
+    assert await dispatcher.run_once() >= 3
 
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
+    ours = [r for r in requests if r["data"].get("booking_id") == marker["booking_id"]]
+    assert len(ours) == 1
+    assert sorted(ours[0]["include_player_ids"]) == sorted(players)
 
-        async def post(self, url, **kwargs):  # pragma: no cover - not expected
-            self.calls.append((url, kwargs))
-            return SimpleNamespace(
-                status_code=200, json=lambda: {}, raise_for_status=lambda: None
-            )
+    for note in (first, second, no_player):
+        await async_session.refresh(note)
+    assert first.delivery_status is NotificationStatus.SENT
+    assert second.delivery_status is NotificationStatus.SENT
+    assert first.sent_at is not None
+    assert no_player.delivery_status is NotificationStatus.SKIPPED
+    assert await dispatcher.run_once() == 0
 
-    dummy_client = DummyClient()
-    monkeypatch.setattr(httpx, "AsyncClient", lambda *args, **kwargs: dummy_client)
 
-    class DummyDB:
-        def __init__(self):
-            self.user = SimpleNamespace(role=UserRole.DRIVER, onesignal_player_id=None)
+async def test_dispatcher_retries_with_backoff_then_fails(
+    async_session: AsyncSession, onesignal_settings, mock_http
+):
+    note = await _notify(async_session, f"tok-{uuid.uuid4().hex}")
 
-        async def get(self, model, pk):
-            return self.user
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"errors": ["unavailable"]})
 
-    await _send_onesignal(
-        DummyDB(), uuid.uuid4(), UserRole.DRIVER, NotificationType.ON_THE_WAY, {}
-    )
+    await mock_http(handler)
 
-    assert dummy_client.calls == []
+    dispatcher = NotificationDispatcher(
+        AsyncSessionLocal, max_attempts=2, retry_base_s=0.0
+    )
+    await dispatcher.run_once()
+    await async_session.refresh(note)
+    assert note.delivery_status is NotificationStatus.PENDING
+    assert note.attempts == 1
+    assert note.next_attempt_at is not None
+
+    await dispatcher.run_once()
+    await async_session.refresh(note)
+    assert note.delivery_status is NotificationStatus.FAILED
+    assert note.attempts == 2
+    assert dispatcher.stats()["retries"] >= 1
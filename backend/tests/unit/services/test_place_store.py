@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.models.place import ReverseGeocode
+from app.services import geocode_service
+from app.services.place_store import PlaceStore
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_nearest_label_within_radius():
+    store = PlaceStore(match_radius_m=40)
+    await store.put_label(-27.38420, 153.11750, "Brisbane Airport")
+    await store.put_label(-27.38450, 153.11750, "Airport Drive")
+
+    # ~10 m from the first point, ~25 m from the second
+    assert await store.nearest_label(-27.38429, 153.11750) == "Brisbane Airport"
+    # ~80 m away from both
+    assert await store.nearest_label(-27.38350, 153.11750) is None
+    stats = store.stats()
+    assert stats["label_hits"] == 1
+    assert stats["label_misses"] == 1
+
+
+async def test_persistent_places_and_labels_survive_restart():
+    first = PlaceStore(AsyncSessionLocal)
+    place = {
+        "place_id": "persist-1",
+        "name": "Hotel",
+        "address": "1 Queen St",
+        "lat": -27.47,
+        "lng": 153.02,
+    }
+    await first.put_place(place)
+    await first.put_label(-33.94610, 151.17720, "Sydney Airport")
+
+    restarted = PlaceStore(AsyncSessionLocal)
+    assert await restarted.get_place("persist-1") == place
+    assert await restarted.nearest_label(-33.94612, 151.17721) == "Sydney Airport"
+
+
+async def test_reverse_geocode_served_from_store(monkeypatch: MonkeyPatch, mock_http):
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(
+            200, json={"features": [{"properties": {"label": "1 Airport Dr"}}]}
+        )
+
+    await mock_http(handler)
+    monkeypatch.setattr(
+        geocode_service, "get_settings", lambda: type("S", (), {"ors_api_key": "KEY"})()
+    )
+
+    assert await geocode_service.reverse_geocode(-27.3842, 153.1175) == "1 Airport Dr"
+    assert await geocode_service.reverse_geocode(-27.38421, 153.11752) == "1 Airport Dr"
+    assert calls["count"] == 1
+
+
+async def test_put_label_upserts_the_same_spot():
+    store = PlaceStore(AsyncSessionLocal)
+    await store.put_label(-31.43040, 152.90890, "Old label")
+    await store.put_label(-31.430401, 152.908899, "Port Macquarie Airport")
+
+    async with AsyncSessionLocal() as db:
+        labels = (
+            await db.execute(
+                select(ReverseGeocode.label).where(
+                    ReverseGeocode.lat == -31.4304, ReverseGeocode.lng == 152.9089
+                )
+            )
+        ).scalars().all()
+    assert labels == ["Port Macquarie Airport"]
+    restarted = PlaceStore(AsyncSessionLocal)
+    assert await restarted.nearest_label(-31.4304, 152.9089) == "Port Macquarie Airport"
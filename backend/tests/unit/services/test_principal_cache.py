@@ -0,0 +1,53 @@
+import uuid
+
+import pytest
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import create_jwt_token
+from app.db.database import AsyncSessionLocal
+from app.models.user_v2 import User
+from app.schemas.user import UserUpdate
+from app.services import user_service
+from app.services.principal_cache import PrincipalCache, principal_cache
+
+
+def test_decode_caches_valid_tokens_only():
+    cache = PrincipalCache()
+    token = create_jwt_token(uuid.uuid4())
+
+    assert cache.decode(token) == cache.decode(token)
+    with pytest.raises(JWTError):
+        cache.decode("not.a.jwt")
+    assert cache.stats()["tokens"] == 1
+    assert cache.stats()["token_hit_rate"] == round(1 / 3, 3)
+
+
+async def test_snapshot_is_merged_and_invalidated_on_update_and_delete(
+    async_session: AsyncSession,
+):
+    user = User(email=f"{uuid.uuid4()}@example.com", full_name="Old", hashed_password="h")
+    async_session.add(user)
+    await async_session.commit()
+    invalidations = principal_cache.stats()["invalidations"]
+
+    async with AsyncSessionLocal() as db:
+        assert (await principal_cache.load_user(db, user.id)).full_name == "Old"
+    async with AsyncSessionLocal() as db:
+        cached = await principal_cache.load_user(db, user.id)
+        # A hit is bound to the caller's session like a loaded row.
+        assert cached in db
+        assert cached.full_name == "Old"
+
+    async with AsyncSessionLocal() as db:
+        await user_service.update_user(db, user.id, UserUpdate(full_name="New"))
+        await db.commit()
+    async with AsyncSessionLocal() as db:
+        assert (await principal_cache.load_user(db, user.id)).full_name == "New"
+
+    async with AsyncSessionLocal() as db:
+        await user_service.delete_user(db, user.id)
+        await db.commit()
+    async with AsyncSessionLocal() as db:
+        assert await principal_cache.load_user(db, user.id) is None
+    assert principal_cache.stats()["invalidations"] == invalidations + 2
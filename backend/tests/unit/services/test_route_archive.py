@@ -0,0 +1,155 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import hash_password
+from app.db.database import AsyncSessionLocal
+from app.models.booking import Booking, BookingStatus
+from app.models.route_point import RoutePoint
+from app.models.trip import Trip
+from app.models.user_v2 import User, UserRole
+from app.services.route_archive import (
+    RouteArchiver,
+    decode_polyline,
+    decode_track,
+    encode_polyline,
+    simplify,
+)
+from app.services.trip_metrics import point_distance_m
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_polyline_matches_reference_encoding():
+    # The worked example from Google's polyline algorithm documentation.
+    lat = [38.5, 40.7, 43.252]
+    lng = [-120.2, -120.95, -126.453]
+    encoded = encode_polyline(lat, lng)
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(encoded) == list(zip(lat, lng))
+
+
+def test_simplify_keeps_shape_within_tolerance_and_gap():
+    # Ten minutes at 1 Hz: east along a street, a right-angle turn, then a
+    # three-minute wait at the lights.
+    t = np.arange(600, dtype=float)
+    east = np.minimum(t, 300)
+    south = np.clip(t - 300, 0, 120)
+    lat = -27.47 - south * 0.0001
+    lng = 153.02 + east * 0.0001 + np.sin(t) * 0.00001  # ~1 m of jitter
+
+    kept = simplify(t, lat, lng, tolerance_m=5.0, max_gap_s=60.0)
+
+    assert kept[0] == 0 and kept[-1] == len(t) - 1
+    assert len(kept) < len(t) // 20
+    assert np.diff(t[kept]).max() <= 60
+    # Every dropped point is within tolerance of the segment between its
+    # kept neighbours.
+    steps = np.linspace(0.0, 1.0, 201)
+    for a, b in zip(kept, kept[1:]):
+        seg_lat = lat[a] + steps * (lat[b] - lat[a])
+        seg_lng = lng[a] + steps * (lng[b] - lng[a])
+        for i in range(a + 1, b):
+            nearest = min(
+                point_distance_m(lat[i], lng[i], p_lat, p_lng)
+                for p_lat, p_lng in zip(seg_lat, seg_lng)
+            )
+            assert nearest <= 5.0 + 0.5
+
+
+async def _completed_trip(async_session: AsyncSession) -> Booking:
+    customer = User(
+        email=f"test{uuid.uuid4().hex}@example.com",
+        full_name="Test",
+        hashed_password=hash_password("pass"),
+        role=UserRole.CUSTOMER,
+    )
+    async_session.add(customer)
+    await async_session.flush()
+    booking = Booking(
+        public_code=uuid.uuid4().hex[:6].upper(),
+        customer_id=customer.id,
+        pickup_address="A",
+        pickup_lat=-27.47,
+        pickup_lng=153.02,
+        dropoff_address="B",
+        dropoff_lat=-27.47,
+        dropoff_lng=153.05,
+        pickup_when=START,
+        passengers=1,
+        estimated_price_cents=1000,
+        deposit_required_cents=500,
+        status=BookingStatus.COMPLETED,
+    )
+    async_session.add(booking)
+    await async_session.flush()
+    async_session.add(
+        Trip(
+            booking_id=booking.id,
+            started_at=START,
+            ended_at=START + timedelta(seconds=299),
+        )
+    )
+    async_session.add_all(
+        RoutePoint(
+            booking_id=booking.id,
+            ts=START + timedelta(seconds=i),
+            lat=-27.47,
+            lng=153.02 + i * 0.0001,
+        )
+        for i in range(300)
+    )
+    await async_session.commit()
+    return booking
+
+
+async def test_compact_trip_replaces_points_with_encoded_track(
+    async_session: AsyncSession,
+) -> None:
+    booking = await _completed_trip(async_session)
+
+    archiver = RouteArchiver(AsyncSessionLocal, delay_s=0, max_gap_s=60.0)
+    assert await archiver.run_once() >= 1
+
+    remaining = await async_session.scalar(
+        select(func.count())
+        .select_from(RoutePoint)
+        .where(RoutePoint.booking_id == booking.id)
+    )
+    assert remaining == 0
+    trip = await async_session.scalar(
+        select(Trip).where(Trip.booking_id == booking.id)
+    )
+    ts, lat, lng = decode_track(trip)
+    assert ts[0] == START and ts[-1] == START + timedelta(seconds=299)
+    assert all(b - a <= timedelta(seconds=60) for a, b in zip(ts, ts[1:]))
+    assert len(ts) == len(lat) < 10
+    assert lng[-1] == pytest.approx(153.0499, abs=1e-5)
+    assert archiver.stats()["points_in"] >= 300
+
+
+async def test_failed_trip_is_not_reselected(async_session: AsyncSession) -> None:
+    booking = await _completed_trip(async_session)
+    trip = await async_session.scalar(
+        select(Trip).where(Trip.booking_id == booking.id)
+    )
+    attempted = []
+
+    class FailingArchiver(RouteArchiver):
+        async def compact_trip(self, db, trip):
+            attempted.append(trip.id)
+            raise RuntimeError("boom")
+
+    archiver = FailingArchiver(AsyncSessionLocal, delay_s=3600)
+    await archiver.run_once()
+    await archiver.run_once()
+
+    assert attempted.count(trip.id) == 1
+    await async_session.refresh(trip)
+    assert trip.route_compaction_attempts == 1
+    assert trip.route_compaction_failed_at is not None
+    assert trip.route_polyline is None
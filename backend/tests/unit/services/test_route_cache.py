@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from app.db.database import AsyncSessionLocal
+from app.services import route_cache as route_cache_module
+from app.services import routing
+from app.services.route_cache import RouteCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def _directions(distance_m: int, duration_s: int) -> dict:
+    return {
+        "status": "OK",
+        "routes": [
+            {
+                "legs": [
+                    {
+                        "distance": {"value": distance_m},
+                        "duration": {"value": duration_s},
+                    }
+                ]
+            }
+        ],
+    }
+
+
+async def test_nearby_points_share_a_key():
+    cache = RouteCache(precision=6)
+    departure = datetime(2030, 1, 1, 8, 10, tzinfo=timezone.utc)
+    a = cache.key(-27.4698, 153.0251, -27.3842, 153.1175, departure)
+    later = departure + timedelta(minutes=5)
+    b = cache.key(-27.4699, 153.0252, -27.3843, 153.1176, later)
+    next_day = departure + timedelta(days=1)
+    c = cache.key(-27.4698, 153.0251, -27.3842, 153.1175, next_day)
+    assert a == b
+    assert a != c
+
+
+async def test_lru_eviction_and_ttl(monkeypatch: MonkeyPatch):
+    cache = RouteCache(max_entries=2, ttl_s=60)
+    await cache.set("a", 1.0, 1.0)
+    await cache.set("b", 2.0, 2.0)
+    assert await cache.get("a") == (1.0, 1.0)
+    await cache.set("c", 3.0, 3.0)  # evicts "b", the least recently used
+
+    assert await cache.get("b") is None
+    assert await cache.get("c") == (3.0, 3.0)
+
+    real_time = route_cache_module.time.time
+    monkeypatch.setattr(route_cache_module.time, "time", lambda: real_time() + 120)
+    assert await cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+
+async def test_persistent_entries_survive_restart():
+    first = RouteCache(AsyncSessionLocal)
+    key = first.key(-27.0, 153.0, -27.1, 153.1)
+    await first.set(key, 12.5, 18.0)
+
+    restarted = RouteCache(AsyncSessionLocal)
+    assert await restarted.get(key) == (12.5, 18.0)
+    assert restarted.stats()["persistent_hits"] == 1
+    assert await restarted.get(key) == (12.5, 18.0)
+    assert restarted.stats()["hits"] == 1
+
+
+async def test_estimate_route_uses_cache(monkeypatch: MonkeyPatch, mock_http):
+    calls = {"count": 0}
+    departure = datetime.now(timezone.utc) + timedelta(days=1)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        assert request.url.params["departure_time"] == str(
+            int(departure.timestamp())
+        )
+        return httpx.Response(200, json=_directions(5000, 600))
+
+    monkeypatch.setattr(
+        routing,
+        "settings",
+        type("S", (), {"env": "prod", "google_maps_api_key": "x"})(),
+    )
+    await mock_http(handler)
+
+    first = await routing.estimate_route(1, 2, 3, 4, departure=departure)
+    second = await routing.estimate_route(1, 2, 3, 4, departure=departure)
+
+    assert first == second == (5.0, 10.0)
+    assert calls["count"] == 1
+    assert routing.route_cache.stats()["hits"] == 1
+
+
+async def test_future_departure_outlives_ttl(monkeypatch: MonkeyPatch):
+    cache = RouteCache(ttl_s=60, bucket_min=60)
+    departure = datetime.now(timezone.utc) + timedelta(days=2)
+    key = cache.key(1, 2, 3, 4, departure)
+    await cache.set(key, 5.0, 10.0, departure=departure)
+
+    real_time = route_cache_module.time.time
+    monkeypatch.setattr(route_cache_module.time, "time", lambda: real_time() + 3600)
+    assert await cache.get(key) == (5.0, 10.0)
@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.models.route_point import RoutePoint
+from app.services.route_ingest import RoutePointIngestor
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _count(session: AsyncSession, booking_id: uuid.UUID) -> int:
+    result = await session.execute(
+        select(func.count())
+        .select_from(RoutePoint)
+        .where(RoutePoint.booking_id == booking_id)
+    )
+    return result.scalar_one()
+
+
+async def test_points_buffered_until_flush(async_session: AsyncSession):
+    ingestor = RoutePointIngestor(AsyncSessionLocal, max_batch=10)
+    booking_id = uuid.uuid4()
+    start = datetime.now(timezone.utc)
+    for i in range(3):
+        await ingestor.add(booking_id, start + timedelta(seconds=i), -27.0, 153.0)
+
+    assert await _count(async_session, booking_id) == 0
+    assert ingestor.stats()["queue_depth"] == 3
+
+    assert await ingestor.flush(booking_id) == 3
+    assert await _count(async_session, booking_id) == 3
+    stats = ingestor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["flushes"] == 1
+    assert stats["points_written"] == 3
+
+
+async def test_full_buffer_triggers_bulk_insert(async_session: AsyncSession):
+    ingestor = RoutePointIngestor(AsyncSessionLocal, max_batch=4)
+    booking_id = uuid.uuid4()
+    start = datetime.now(timezone.utc)
+    for i in range(5):
+        await ingestor.add(booking_id, start + timedelta(seconds=i), -27.0, 153.0)
+
+    assert await _count(async_session, booking_id) == 4
+    assert ingestor.queue_depth == 1
+
+    await ingestor.stop()
+    assert await _count(async_session, booking_id) == 5
+    assert ingestor.stats()["flushes"] == 2
+
+
+async def test_failing_booking_does_not_block_others(async_session: AsyncSession):
+    ingestor = RoutePointIngestor(AsyncSessionLocal, max_batch=100, max_retries=2)
+    good, bad = uuid.uuid4(), uuid.uuid4()
+    start = datetime.now(timezone.utc)
+    await ingestor.add(good, start, -27.0, 153.0)
+    await ingestor.add(bad, start, None, 153.0)  # violates NOT NULL
+
+    assert await ingestor.flush() == 1
+    assert await _count(async_session, good) == 1
+    assert ingestor.stats()["bookings_failing"] == 1
+    assert ingestor.queue_depth == 1
+
+    # The second failure reaches max_retries and the point is dropped.
+    assert await ingestor.flush() == 0
+    stats = ingestor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["points_dropped"] == 1
+    assert stats["bookings_failing"] == 0
+
+
+async def test_buffer_is_capped(async_session: AsyncSession):
+    ingestor = RoutePointIngestor(AsyncSessionLocal, max_batch=100, max_buffer=3)
+    booking_id = uuid.uuid4()
+    start = datetime.now(timezone.utc)
+    for i in range(5):
+        await ingestor.add(booking_id, start + timedelta(seconds=i), -27.0, 153.0)
+    assert ingestor.queue_depth == 3
+    assert ingestor.stats()["points_dropped"] == 2
@@ -9,65 +9,53 @@ from app.services import route_metrics_service
 
 
 @pytest.mark.asyncio
-async def test_get_route_metrics(monkeypatch: MonkeyPatch):
-    async def fake_get(self, url, params=None):
-        assert params.get("departure_time") == 0
+async def test_get_route_metrics(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        assert params.get("departure_time") == "0"
         assert params.get("origins") == "1,2"
         assert params.get("destinations") == "3,4"
-
-        class Resp:
-            status_code = 200
-
-            def raise_for_status(self):
-                pass
-
-            def json(self):
-                return {
-                    "status": "OK",
-                    "rows": [
-                        {
-                            "elements": [
-                                {
-                                    "status": "OK",
-                                    "distance": {"value": 1234},
-                                    "duration": {"value": 567},
-                                }
-                            ]
-                        }
-                    ],
-                }
-
-        return Resp()
+        return httpx.Response(
+            200,
+            json={
+                "status": "OK",
+                "rows": [
+                    {
+                        "elements": [
+                            {
+                                "status": "OK",
+                                "distance": {"value": 1234},
+                                "duration": {"value": 567},
+                            }
+                        ]
+                    }
+                ],
+            },
+        )
 
     monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test")
     get_settings.cache_clear()
-    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    await mock_http(handler)
     ride_time = datetime.fromtimestamp(0, tz=timezone.utc)
     result = await route_metrics_service.get_route_metrics("1,2", "3,4", ride_time)
     assert result == pytest.approx({"km": 1.234, "min": 9.45})
 
 
 @pytest.mark.asyncio
-async def test_get_route_metrics_request_denied(monkeypatch: MonkeyPatch):
-    async def fake_get(self, url, params=None):
-        class Resp:
-            status_code = 200
-
-            def raise_for_status(self):
-                pass
-
-            def json(self):
-                return {
-                    "status": "REQUEST_DENIED",
-                    "error_message": "Invalid key",
-                    "rows": [],
-                }
-
-        return Resp()
+async def test_get_route_metrics_request_denied(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={
+                "status": "REQUEST_DENIED",
+                "error_message": "Invalid key",
+                "rows": [],
+            },
+        )
 
     monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test")
     get_settings.cache_clear()
-    monkeypatch.setattr(httpx.AsyncClient, "get", fake_get)
+    await mock_http(handler)
     with pytest.raises(RuntimeError) as exc:
         await route_metrics_service.get_route_metrics("1,2", "3,4")
     assert "Invalid key" in str(exc.value)
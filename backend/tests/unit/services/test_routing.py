@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 import httpx
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
@@ -6,51 +8,33 @@ from app.services import routing
 pytestmark = pytest.mark.asyncio
 
 
-async def test_estimate_route_retries_then_succeeds(monkeypatch: MonkeyPatch):
-    class DummyResp:
-        def __init__(self, status_code, data=None):
-            self.status_code = status_code
-            self._data = data or {}
-
-        def json(self):
-            return self._data
-
-        def raise_for_status(
-            self,
-        ) -> None:  # pragma: no cover - no HTTP errors in tests
-            return None
-
+async def test_estimate_route_retries_then_succeeds(
+    monkeypatch: MonkeyPatch, mock_http
+):
     calls = {"count": 0}
 
-    class DummyClient:
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None, timeout=None):  # type: ignore[override]
-            calls["count"] += 1
-            if calls["count"] == 1:
-                raise httpx.RequestError("boom")
-            if calls["count"] == 2:
-                return DummyResp(500)
-            return DummyResp(
-                200,
-                {
-                    "status": "OK",
-                    "routes": [
-                        {
-                            "legs": [
-                                {
-                                    "distance": {"value": 1000},
-                                    "duration": {"value": 600},
-                                }
-                            ]
-                        }
-                    ],
-                },
-            )
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise httpx.ConnectError("boom", request=request)
+        if calls["count"] == 2:
+            return httpx.Response(500)
+        return httpx.Response(
+            200,
+            json={
+                "status": "OK",
+                "routes": [
+                    {
+                        "legs": [
+                            {
+                                "distance": {"value": 1000},
+                                "duration": {"value": 600},
+                            }
+                        ]
+                    }
+                ],
+            },
+        )
 
     async def fake_sleep(_):
         return None
@@ -60,7 +44,7 @@ async def test_estimate_route_retries_then_succeeds(monkeypatch: MonkeyPatch):
         "settings",
         type("S", (), {"env": "prod", "google_maps_api_key": "x"})(),
     )
-    monkeypatch.setattr(routing.httpx, "AsyncClient", DummyClient)
+    await mock_http(handler)
     monkeypatch.setattr(routing.asyncio, "sleep", fake_sleep)
 
     distance, duration = await routing.estimate_route(1, 2, 3, 4)
@@ -68,28 +52,12 @@ async def test_estimate_route_retries_then_succeeds(monkeypatch: MonkeyPatch):
     assert calls["count"] == 3
 
 
-async def test_estimate_route_fails_after_retries(monkeypatch: MonkeyPatch):
-    class DummyResp:
-        status_code = 500
-
-        def json(self):
-            return {}
-
-        def raise_for_status(self) -> None:  # pragma: no cover
-            return None
-
+async def test_estimate_route_fails_after_retries(monkeypatch: MonkeyPatch, mock_http):
     calls = {"count": 0}
 
-    class DummyClient:
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None, timeout=None):  # type: ignore[override]
-            calls["count"] += 1
-            return DummyResp()
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(500)
 
     async def fake_sleep(_):
         return None
@@ -99,9 +67,75 @@ async def test_estimate_route_fails_after_retries(monkeypatch: MonkeyPatch):
         "settings",
         type("S", (), {"env": "prod", "google_maps_api_key": "x"})(),
     )
-    monkeypatch.setattr(routing.httpx, "AsyncClient", DummyClient)
+    await mock_http(handler)
     monkeypatch.setattr(routing.asyncio, "sleep", fake_sleep)
 
     with pytest.raises(ValueError, match="route service unavailable"):
         await routing.estimate_route(1, 2, 3, 4)
     assert calls["count"] == 3
+
+
+async def test_estimate_routes_batches_distance_matrix(
+    monkeypatch: MonkeyPatch, mock_http
+):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        assert "distancematrix" in request.url.path
+        origins = request.url.params["origins"].split("|")
+        destinations = request.url.params["destinations"].split("|")
+        assert len(origins) * len(destinations) <= routing.MATRIX_MAX_ELEMENTS
+        rows = [
+            {
+                "elements": [
+                    {
+                        "status": "OK",
+                        "distance": {"value": 1000 * (o + d + 1)},
+                        "duration": {"value": 60 * (o + d + 1)},
+                    }
+                    for d in range(len(destinations))
+                ]
+            }
+            for o in range(len(origins))
+        ]
+        return httpx.Response(200, json={"status": "OK", "rows": rows})
+
+    monkeypatch.setattr(
+        routing,
+        "settings",
+        type(
+            "S",
+            (),
+            {"env": "prod", "google_maps_api_key": "x", "leave_at_concurrency": 4},
+        )(),
+    )
+    await mock_http(handler)
+
+    departure = datetime.now(timezone.utc) + timedelta(days=1)
+    # 30 legs from one base go out as two rows (25 + 5 destinations). Three
+    # pickups to the airport share a column. The 9 unrelated trips are one
+    # element each, rather than one 9 x 9 matrix.
+    from_base = [(-27.0, 153.0, -27.0 - i / 100, 153.1, departure) for i in range(30)]
+    to_airport = [(-27.5 - i / 100, 153.0, -27.38, 153.12, departure) for i in range(3)]
+    trips = [
+        (-28.0 - i / 100, 153.0, -28.5 - i / 100, 153.2, departure) for i in range(9)
+    ]
+    estimates = await routing.estimate_routes(from_base + to_airport + trips)
+
+    elements = [
+        len(r.url.params["origins"].split("|"))
+        * len(r.url.params["destinations"].split("|"))
+        for r in requests
+    ]
+    assert sorted(elements) == [1] * 9 + [3, 5, 25]
+    assert {r.url.params["departure_time"] for r in requests} == {
+        str(int(departure.timestamp() // 3600 * 3600))
+    }
+    assert estimates[0] == (1.0, 1.0)
+    assert estimates[1] == (2.0, 2.0)
+    assert all(e is not None for e in estimates)
+
+    # Everything is now cached.
+    assert await routing.estimate_routes(from_base) == estimates[:30]
+    assert len(requests) == 12
@@ -7,32 +7,16 @@ from app.services import routing
 pytestmark = pytest.mark.asyncio
 
 
-async def test_estimate_route_no_route(monkeypatch: MonkeyPatch):
-    class DummyResp:
-        status_code = 200
-
-        def json(self):
-            return {"status": "ZERO_RESULTS", "routes": []}
-
-        def raise_for_status(self) -> None:  # pragma: no cover - no HTTP errors
-            return None
-
-    class DummyClient:
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *exc_info):
-            return None
-
-        async def get(self, url, params=None, timeout=None):  # type: ignore[override]
-            return DummyResp()
+async def test_estimate_route_no_route(monkeypatch: MonkeyPatch, mock_http):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"status": "ZERO_RESULTS", "routes": []})
 
     monkeypatch.setattr(
         routing,
         "settings",
         type("S", (), {"env": "prod", "google_maps_api_key": "x"})(),
     )
-    monkeypatch.setattr(routing.httpx, "AsyncClient", DummyClient)
+    await mock_http(handler)
 
     with pytest.raises(ValueError, match="no route found"):
         await routing.estimate_route(1, 2, 3, 4)
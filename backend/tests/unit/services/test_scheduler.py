@@ -1,17 +1,22 @@
 import asyncio
+import threading
 import uuid
 from datetime import datetime, timedelta, timezone
-from unittest.mock import AsyncMock
 
 import pytest
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy import select
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import hash_password
+from app.db.database import AsyncSessionLocal, sync_url
 from app.models.booking import Booking, BookingStatus
 from app.models.notification import Notification, NotificationRole, NotificationType
 from app.models.settings import AdminConfig
 from app.models.user_v2 import User, UserRole
+from app.services import scheduler as scheduler_service
 from app.services import settings_service
 from app.services.scheduler import _leave_now_job
 
@@ -21,9 +26,8 @@ pytestmark = pytest.mark.asyncio
 async def test_leave_now_job_creates_notifications(
     async_session: AsyncSession, mocker
 ) -> None:
-    dispatch = mocker.patch(
-        "app.services.notifications.dispatch_notification",
-        new_callable=AsyncMock,
+    submit = mocker.patch(
+        "app.services.notifications.notification_dispatcher.submit"
     )
 
     driver = User(
@@ -88,18 +92,120 @@ async def test_leave_now_job_creates_notifications(
     assert (NotificationType.ON_THE_WAY, NotificationRole.CUSTOMER) in roles_types
     assert all(n.to_user_id for n in notes)
 
-    assert dispatch.await_count == 2
-    driver_call = next(
-        call
-        for call in dispatch.await_args_list
-        if call.kwargs["to_role"] is UserRole.DRIVER
-        and call.kwargs["notif_type"] is NotificationType.LEAVE_NOW
+    assert {call.args[0] for call in submit.call_args_list} == {n.id for n in notes}
+    by_role = {n.to_role: n for n in notes}
+    assert by_role[NotificationRole.DRIVER].to_user_id == driver.id
+    assert by_role[NotificationRole.CUSTOMER].to_user_id == booking.customer_id
+
+
+async def test_reconcile_restores_missing_leave_jobs(
+    async_session: AsyncSession, monkeypatch
+) -> None:
+    store = SQLAlchemyJobStore(
+        url=str(sync_url), tablename=scheduler_service.JOBS_TABLE
+    )
+    persistent = AsyncIOScheduler(
+        jobstores={"default": store},
+        job_defaults={"coalesce": True, "misfire_grace_time": None},
+    )
+    monkeypatch.setattr(scheduler_service, "scheduler", persistent)
+    persistent.start(paused=True)
+    try:
+        customer = User(
+            email=f"test{uuid.uuid4().hex}@example.com",
+            full_name="Test",
+            hashed_password=hash_password("pass"),
+            role=UserRole.CUSTOMER,
+        )
+        async_session.add(customer)
+        await async_session.flush()
+        now = datetime.now(timezone.utc)
+
+        def _booking(pickup_in: timedelta, leave_at, status) -> Booking:
+            return Booking(
+                public_code=uuid.uuid4().hex[:6].upper(),
+                customer_id=customer.id,
+                pickup_address="A",
+                pickup_lat=-27.4,
+                pickup_lng=153.1,
+                dropoff_address="B",
+                dropoff_lat=-27.5,
+                dropoff_lng=153.0,
+                pickup_when=now + pickup_in,
+                passengers=1,
+                estimated_price_cents=1000,
+                deposit_required_cents=500,
+                leave_at=leave_at,
+                status=status,
+            )
+
+        confirmed = BookingStatus.DRIVER_CONFIRMED
+        scheduled = _booking(timedelta(days=2), now + timedelta(days=1), confirmed)
+        overdue = _booking(timedelta(hours=1), now - timedelta(minutes=10), confirmed)
+        unplanned = _booking(timedelta(hours=3), None, confirmed)
+        pending = _booking(timedelta(hours=3), None, BookingStatus.PENDING)
+        async_session.add_all([scheduled, overdue, unplanned, pending])
+        await async_session.commit()
+
+        scheduler_service._add_leave_now_job(scheduled.id, scheduled.leave_at)
+        orphan_id = uuid.uuid4()
+        scheduler_service._add_leave_now_job(orphan_id, now)
+        orphan = scheduler_service.leave_now_job_id(orphan_id)
+        run_time = persistent.get_job(
+            scheduler_service.leave_now_job_id(scheduled.id)
+        ).next_run_time
+
+        counts = await scheduler_service.reconcile_leave_jobs(AsyncSessionLocal)
+        assert counts["added"] >= 2
+        assert counts["removed"] >= 1
+
+        job_ids = {job.id for job in persistent.get_jobs()}
+        assert orphan not in job_ids
+        assert scheduler_service.leave_now_job_id(pending.id) not in job_ids
+        kept = persistent.get_job(scheduler_service.leave_now_job_id(scheduled.id))
+        assert kept.next_run_time == run_time
+        # A leave time that passed while no worker ran fires once, now.
+        late = persistent.get_job(scheduler_service.leave_now_job_id(overdue.id))
+        assert late.next_run_time <= datetime.now(timezone.utc)
+        assert persistent.get_job(scheduler_service.leave_now_job_id(unplanned.id))
+        await async_session.refresh(unplanned)
+        assert unplanned.leave_at is not None
+
+        again = await scheduler_service.reconcile_leave_jobs(AsyncSessionLocal)
+        assert again["added"] == 0
+        assert again["removed"] == 0
+    finally:
+        persistent.remove_all_jobs()
+        persistent.shutdown(wait=False)
+
+
+async def test_schedule_leave_now_adds_job_off_the_event_loop(mocker) -> None:
+    leave_at = datetime.now(timezone.utc) + timedelta(hours=2)
+    mocker.patch.object(
+        scheduler_service, "compute_leave_at", mocker.AsyncMock(return_value=leave_at)
+    )
+    threads: list[int] = []
+    mocker.patch.object(
+        scheduler_service,
+        "_add_leave_now_job",
+        lambda booking_id, run_date: threads.append(threading.get_ident()),
     )
-    assert driver_call.kwargs["to_user_id"] == driver.id
-    customer_call = next(
-        call
-        for call in dispatch.await_args_list
-        if call.kwargs["to_role"] is UserRole.CUSTOMER
-        and call.kwargs["notif_type"] is NotificationType.ON_THE_WAY
+    booking = type("B", (), {"id": uuid.uuid4(), "leave_at": None})()
+
+    assert await scheduler_service.schedule_leave_now(booking) == leave_at
+    assert booking.leave_at == leave_at
+    assert threads and threads[0] != threading.get_ident()
+
+
+async def test_runner_election_uses_advisory_lock_on_postgres(mocker) -> None:
+    mocker.patch.object(
+        scheduler_service, "sync_url", make_url("postgresql://u:p@db/app")
     )
-    assert customer_call.kwargs["to_user_id"] == booking.customer_id
+    advisory = mocker.patch.object(
+        scheduler_service, "_acquire_advisory_lock", return_value=False
+    )
+    file_lock = mocker.patch.object(scheduler_service, "_acquire_file_lock")
+
+    assert scheduler_service._acquire_lock() is False
+    advisory.assert_called_once_with()
+    file_lock.assert_not_called()
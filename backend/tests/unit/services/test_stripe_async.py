@@ -0,0 +1,73 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+import stripe
+
+from app.services import stripe_client
+from app.services.stripe_async import (
+    AsyncStripe,
+    StripeTimeout,
+    idempotency_key,
+    outcome_unknown,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_charges_run_concurrently_with_stable_idempotency_keys(mocker):
+    keys: list[str] = []
+
+    def slow_create(**kwargs):
+        time.sleep(0.2)  # a blocking SDK round trip
+        keys.append(kwargs["idempotency_key"])
+        return stripe_client._StubIntent(id="pi_test")
+
+    mocker.patch.object(stripe_client.stripe.PaymentIntent, "create", slow_create)
+    facade = AsyncStripe(workers=4, timeout_s=5)
+    booking_id = uuid.uuid4()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                facade.charge_deposit(500, booking_id, payment_method="pm_test")
+                for _ in range(4)
+            )
+        )
+        assert time.perf_counter() - started < 0.6
+        await facade.charge_deposit(500, booking_id, payment_method="pm_other")
+        await facade.charge_final(500, booking_id, payment_method="pm_test")
+    finally:
+        facade.shutdown()
+
+    # Repeats of one charge share a key; another card or payment type does not.
+    assert len(set(keys[:4])) == 1
+    assert len(set(keys)) == 3
+    assert all(str(booking_id) in key for key in keys)
+
+
+async def test_slow_calls_time_out(mocker):
+    mocker.patch.object(
+        stripe_client.stripe.PaymentIntent,
+        "create",
+        lambda **kwargs: time.sleep(0.3),
+    )
+    facade = AsyncStripe(workers=1, timeout_s=0.05)
+    try:
+        with pytest.raises(StripeTimeout):
+            await facade.charge_final(500, uuid.uuid4(), payment_method="pm_test")
+    finally:
+        facade.shutdown()
+    assert facade.stats()["timeouts"] == 1
+
+
+async def test_only_connection_errors_leave_the_outcome_unknown():
+    assert outcome_unknown(StripeTimeout("slow"))
+    assert outcome_unknown(stripe.error.APIConnectionError("reset"))
+    assert not outcome_unknown(stripe.error.CardError("declined", None, "declined"))
+    assert not outcome_unknown(stripe.error.InvalidRequestError("bad", None))
+    booking_id = uuid.uuid4()
+    assert idempotency_key("deposit", booking_id, 500, "pm", 0) != idempotency_key(
+        "deposit", booking_id, 500, "pm", 1
+    )
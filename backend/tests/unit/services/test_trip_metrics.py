@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.booking_service import _haversine
+from app.services.trip_metrics import compute_metrics
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _track(points: list[tuple[float, float]]):
+    ts = [START + timedelta(seconds=i) for i in range(len(points))]
+    lat, lng = zip(*points)
+    return ts, lat, lng
+
+
+def _loop_distance(points: list[tuple[float, float]]) -> float:
+    return sum(_haversine(*a, *b) for a, b in zip(points, points[1:]))
+
+
+def test_matches_python_loop_on_clean_track():
+    # Roughly 15 m/s due east for two minutes.
+    points = [(-27.47, 153.02 + i * 0.00015) for i in range(120)]
+    metrics = compute_metrics(*_track(points))
+    assert metrics.distance_m == pytest.approx(_loop_distance(points), rel=1e-6)
+    assert metrics.duration_s == 119
+    assert metrics.started_at == START
+    assert metrics.dropped == 0
+
+
+def test_drops_spikes_and_stationary_jitter():
+    moving = [(-27.47, 153.02 + i * 0.00015) for i in range(60)]
+    clean = _loop_distance(moving)
+    end = moving[-1]
+    # A parked car whose fix wanders a few metres for a minute.
+    parked = [
+        (end[0] + (0.00002 if i % 2 else -0.00002), end[1]) for i in range(60)
+    ]
+    points = moving[:30] + [(-27.0, 153.5)] + moving[30:] + parked
+
+    metrics = compute_metrics(*_track(points))
+
+    assert metrics.dropped == 1
+    assert metrics.distance_m == pytest.approx(clean, rel=0.02)
+
+
+def test_empty_track():
+    metrics = compute_metrics([], [], [])
+    assert metrics.distance_m == 0.0
+    assert metrics.started_at is None
@@ -0,0 +1,118 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.security import hash_password
+from app.models.booking import Booking, BookingStatus
+from app.models.route_point import RoutePoint
+from app.models.user_v2 import User, UserRole
+from app.services.trip_metrics import compute_metrics
+from app.services.trip_odometer import TripOdometer
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _feed(odometer: TripOdometer, booking_id, points, offset: int = 0):
+    for i, (lat, lng) in enumerate(points):
+        odometer.record(booking_id, START + timedelta(seconds=offset + i), lat, lng)
+    return odometer.get(booking_id)
+
+
+def test_matches_batch_metrics_on_clean_track():
+    points = [(-27.47, 153.02 + i * 0.00015) for i in range(120)]
+    reading = _feed(TripOdometer(), uuid.uuid4(), points)
+
+    ts = [START + timedelta(seconds=i) for i in range(len(points))]
+    batch = compute_metrics(ts, *zip(*points))
+    assert reading.distance_m == pytest.approx(batch.distance_m, rel=1e-6)
+    assert reading.duration_s == batch.duration_s == 119
+    assert reading.points == 120
+
+
+def test_spike_is_dropped_and_confirmed_jump_is_kept():
+    odometer = TripOdometer()
+    booking_id = uuid.uuid4()
+    points = [(-27.47, 153.02 + i * 0.00015) for i in range(10)]
+    spiked = points[:5] + [(-27.0, 153.5)] + points[5:]
+    reading = _feed(odometer, booking_id, spiked)
+    assert reading.dropped == 1
+    clean = _feed(TripOdometer(), uuid.uuid4(), points)
+    assert reading.distance_m == pytest.approx(clean.distance_m)
+
+    # A gap in reporting followed by consistent fixes far away is accepted.
+    far = [(-27.40, 153.10 + i * 0.00015) for i in range(3)]
+    before = reading.distance_m
+    _feed(odometer, booking_id, far, offset=11)
+    assert reading.points == 13
+    assert reading.distance_m > before + 10_000
+
+
+def test_stationary_jitter_adds_nothing():
+    odometer = TripOdometer()
+    booking_id = uuid.uuid4()
+    parked = [(-27.47 + (0.00002 if i % 2 else -0.00002), 153.02) for i in range(60)]
+    reading = _feed(odometer, booking_id, parked)
+    assert reading.distance_m == 0.0
+    assert reading.duration_s == 59
+
+
+def test_late_frames_are_ignored():
+    odometer = TripOdometer()
+    booking_id = uuid.uuid4()
+    odometer.record(booking_id, START + timedelta(seconds=5), -27.47, 153.02)
+    odometer.record(booking_id, START, -27.48, 153.03)
+    assert odometer.get(booking_id).points == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnect_resumes_from_saved_reading(async_session, mocker):
+    customer = User(
+        email=f"odo{uuid.uuid4().hex}@example.com",
+        full_name="Odo",
+        hashed_password=hash_password("pass"),
+        role=UserRole.CUSTOMER,
+    )
+    async_session.add(customer)
+    await async_session.flush()
+    booking = Booking(
+        public_code=uuid.uuid4().hex[:6].upper(),
+        customer_id=customer.id,
+        pickup_address="A",
+        pickup_lat=-27.47,
+        pickup_lng=153.02,
+        dropoff_address="B",
+        dropoff_lat=-27.47,
+        dropoff_lng=153.04,
+        pickup_when=START,
+        passengers=1,
+        estimated_price_cents=1000,
+        deposit_required_cents=500,
+        status=BookingStatus.IN_PROGRESS,
+    )
+    async_session.add(booking)
+    await async_session.commit()
+    points = [(-27.47, 153.02 + i * 0.00015) for i in range(120)]
+    async_session.add_all(
+        RoutePoint(
+            booking_id=booking.id,
+            ts=START + timedelta(seconds=i),
+            lat=lat,
+            lng=lng,
+        )
+        for i, (lat, lng) in enumerate(points)
+    )
+    await async_session.commit()
+
+    # The first socket saw 60 points; the rest arrived after a reconnect.
+    first = TripOdometer()
+    _feed(first, booking.id, points[:60])
+    await first.save(async_session, booking.id)
+
+    rescan = mocker.patch("app.services.trip_odometer.load_trip_metrics")
+    resumed = await TripOdometer().load(async_session, booking.id)
+    rescan.assert_not_called()
+    whole = _feed(TripOdometer(), uuid.uuid4(), points)
+    assert resumed.distance_m == pytest.approx(whole.distance_m)
+    assert resumed.points == 120
+    assert resumed.duration_s == 119
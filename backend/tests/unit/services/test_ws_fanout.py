@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.ws_fanout import Fanout
+
+pytestmark = pytest.mark.asyncio
+
+
+def _position(ts: int) -> str:
+    return json.dumps({"lat": 1.0, "lng": 2.0, "ts": ts})
+
+
+async def test_queue_keeps_newest_position_and_every_status():
+    fanout = Fanout(max_send_hz=0)
+    queue = fanout.queue()
+    queue.put(_position(1))
+    queue.put(json.dumps({"status": "ARRIVED_PICKUP"}))
+    queue.put(_position(2))
+    queue.put(json.dumps({"type": "fare", "fare_cents": 100}))
+    queue.put(json.dumps({"status": "IN_PROGRESS"}))
+    queue.put(json.dumps({"type": "fare", "fare_cents": 200}))
+    queue.put(_position(3))
+
+    sent = [json.loads(await queue.get()) for _ in range(len(queue))]
+    assert sent == [
+        {"status": "ARRIVED_PICKUP"},
+        {"status": "IN_PROGRESS"},
+        {"type": "fare", "fare_cents": 200},
+        {"lat": 1.0, "lng": 2.0, "ts": 3},
+    ]
+    assert fanout.stats()["coalesced"] == 3
+
+
+class _RecordingSocket:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+        self.closed: int | None = None
+
+    async def send_text(self, message: str) -> None:
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = code
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_pump_limits_send_rate():
+    delays: list[float] = []
+    release = asyncio.Event()
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+        await release.wait()
+        release.clear()
+
+    fanout = Fanout(max_send_hz=20, sleep=fake_sleep)
+    queue = fanout.queue()
+    socket = _RecordingSocket()
+    queue.put(_position(0))
+    pump = asyncio.create_task(fanout.pump(socket, queue))
+    await _settle()
+    # The pump is waiting out its send interval; later positions coalesce.
+    for ts in range(1, 50):
+        queue.put(_position(ts))
+    release.set()
+    await _settle()
+    pump.cancel()
+
+    assert [json.loads(m)["ts"] for m in socket.sent] == [0, 49]
+    assert delays == [0.05, 0.05]
+    assert fanout.stats()["coalesced"] == 48
+
+
+async def test_pump_closes_subscriber_that_falls_behind():
+    fanout = Fanout(max_send_hz=0, max_pending=3)
+    queue = fanout.queue()
+    for i in range(4):
+        queue.put(json.dumps({"status": f"S{i}"}))
+    queue.put(json.dumps({"status": "ignored"}))
+    assert len(queue) == 0
+
+    socket = _RecordingSocket()
+    await asyncio.wait_for(fanout.pump(socket, queue), timeout=1)
+    assert socket.sent == []
+    assert socket.closed == 1013
+    assert fanout.stats()["overflowed"] == 1
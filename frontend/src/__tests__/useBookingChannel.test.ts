@@ -75,4 +75,24 @@ describe('useBookingChannel', () => {
       status: 'ARRIVED_PICKUP',
     });
   });
+
+  it('applies the snapshot sent on connect', () => {
+    const { result } = renderHook(() => useBookingChannel('45'));
+    const ws = WSStub.instances[3];
+    act(() => {
+      ws.onmessage?.({
+        data: JSON.stringify({
+          type: 'snapshot',
+          status: 'IN_PROGRESS',
+          position: { lat: 3, lng: 4, ts: 9 },
+          points: [{ lat: 3, lng: 4, ts: 9 }],
+        }),
+      });
+    });
+    expect(result.current).toMatchObject({
+      lat: 3,
+      lng: 4,
+      status: 'IN_PROGRESS',
+    });
+  });
 });
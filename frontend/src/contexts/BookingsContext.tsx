@@ -144,7 +144,10 @@ export function BookingsProvider({ children }: { children: ReactNode }) {
       );
       ws.onmessage = (e) => {
         try {
-          const data = JSON.parse(e.data) as Partial<Booking> & { id: string };
+          const msg = JSON.parse(e.data);
+          // The first message is a snapshot carrying the current booking.
+          const data = (msg.type === 'snapshot' ? msg.booking : msg) as
+            Partial<Booking> & { id: string };
           setBookings((prev) =>
             prev.map((item) =>
               item.id === data.id ? { ...item, ...data } : item,
@@ -28,7 +28,13 @@ export function useBookingChannel(bookingId: string | null) {
       return createReconnectingWebSocket(wsUrl, {
         onMessage: (e) => {
           try {
-            const data = JSON.parse(e.data);
+            let data = JSON.parse(e.data);
+            if (data.type === "snapshot") {
+              // Sent first on connect: the last known position and status.
+              data = data.position
+                ? { ...data.position, status: data.status }
+                : { status: data.status };
+            }
             if (typeof data.lat === "number" && typeof data.lng === "number") {
               setUpdate(data);
             } else if (typeof data.status === "string") {